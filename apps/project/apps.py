@@ -3,3 +3,6 @@ from django.apps import AppConfig
 
 class ProjectConfig(AppConfig):
     name = 'project'
+
+    def ready(self):
+        import project.signals  # noqa
@@ -1,11 +1,14 @@
 import django_filters
 
 from .models import Project
+from utils.search import TrigramIContains, order_by_similarity
 
 
 class ProjectFilter(django_filters.FilterSet):
     title = django_filters.CharFilter(field_name='title',
-                                      lookup_expr='icontains')
+                                      lookup_expr=TrigramIContains.lookup_name)
+    title_similar = django_filters.CharFilter(field_name='title',
+                                              method=order_by_similarity)
 
     class Meta:
         model = Project
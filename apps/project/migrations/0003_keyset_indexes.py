@@ -0,0 +1,19 @@
+# Generated by Django 3.0.5 on 2026-10-17 15:34
+
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    atomic = False
+
+    dependencies = [
+        ('project', '0002_auto_20201112_1149'),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name='project',
+            index=models.Index(fields=['created_at', 'id'], name='project_project_keyset_idx'),
+        ),
+    ]
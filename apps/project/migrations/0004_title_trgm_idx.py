@@ -0,0 +1,22 @@
+# Generated by Django 3.0.5 on 2026-10-17 15:35
+
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+    atomic = False
+
+    dependencies = [
+        ('project', '0003_keyset_indexes'),
+    ]
+
+    operations = [
+        # shared by the task and project indexes, left installed when reversed
+        migrations.RunSQL('CREATE EXTENSION IF NOT EXISTS pg_trgm', migrations.RunSQL.noop),
+        AddIndexConcurrently(
+            model_name='project',
+            index=GinIndex(fields=['title'], name='project_project_title_trgm_idx', opclasses=['gin_trgm_ops']),
+        ),
+    ]
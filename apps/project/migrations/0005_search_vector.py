@@ -0,0 +1,54 @@
+# Generated by Django 3.0.5 on 2026-10-17 15:40
+
+import django.contrib.postgres.search
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, transaction
+
+BATCH_SIZE = 10000
+
+
+def populate_search_vector(apps, schema_editor):
+    """
+    Touch the titles in batches of ids so the trigger computes the
+    vectors, each batch in its own transaction
+    """
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute('SELECT MAX(id) FROM project_project')
+        last_id = cursor.fetchone()[0] or 0
+        for batch_start in range(0, last_id + 1, BATCH_SIZE):
+            with transaction.atomic():
+                cursor.execute(
+                    'UPDATE project_project SET title = title WHERE id >= %s AND id < %s',
+                    [batch_start, batch_start + BATCH_SIZE],
+                )
+
+
+class Migration(migrations.Migration):
+    atomic = False
+
+    dependencies = [
+        ('project', '0004_title_trgm_idx'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='project',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.RunSQL(
+            '''
+            CREATE TRIGGER project_project_search_vector_update
+            BEFORE INSERT OR UPDATE OF title, description ON project_project
+            FOR EACH ROW EXECUTE PROCEDURE
+            tsvector_update_trigger(search_vector, 'pg_catalog.english', title, description)
+            ''',
+            'DROP TRIGGER project_project_search_vector_update ON project_project',
+        ),
+        migrations.RunPython(populate_search_vector, migrations.RunPython.noop),
+        AddIndexConcurrently(
+            model_name='project',
+            index=GinIndex(fields=['search_vector'], name='project_project_search_idx'),
+        ),
+    ]
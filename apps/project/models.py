@@ -1,8 +1,11 @@
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVectorField
 from django.db import models
 
 from utils.models import BaseModel
 
 from usergroup.models import UserGroup
+from usergroup.scopes import get_scope_ids
 
 
 class Client(models.Model):
@@ -25,6 +28,19 @@ class Project(BaseModel):
     user_group = models.ManyToManyField(UserGroup, blank=True)
     client = models.ForeignKey(Client, on_delete=models.CASCADE,
                                 blank=True, null=True)
+    # title and description, maintained by a database trigger
+    search_vector = SearchVectorField(null=True, editable=False)
+
+    class Meta:
+        indexes = [
+            # keyset pagination of the list
+            models.Index(fields=['created_at', 'id'],
+                         name='project_project_keyset_idx'),
+            # substring and similarity search of the title
+            GinIndex(fields=['title'], opclasses=['gin_trgm_ops'],
+                     name='project_project_title_trgm_idx'),
+            GinIndex(fields=['search_vector'], name='project_project_search_idx'),
+        ]
 
     def __str__(self):
         return self.title
@@ -37,9 +53,19 @@ class Project(BaseModel):
          Model and schema setup
         member of the group
         """
-        return Project.objects.filter(
-            user_group__members=user
-        ).distinct()
+        return Project.objects.filter(id__in=Project.get_ids_for(user))
+
+    @staticmethod
+    def get_ids_for(user):
+        """
+        Ids of the projects accessible to the user, cached
+        """
+        return get_scope_ids(
+            user, 'project',
+            lambda: Project.objects.filter(
+                user_group__members=user
+            ).values_list('id', flat=True).distinct()
+        )
 
 
 class Tag(BaseModel):
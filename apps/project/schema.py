@@ -1,12 +1,10 @@
 import graphene
 from graphene_django import DjangoObjectType
-from graphene_django_extras import (
-    DjangoObjectField,
-    DjangoObjectType,
-    DjangoFilterListField,
-)
+from graphene_django_extras import DjangoObjectType
 from project.models import Client, Project, Tag
 from project.filters import ProjectFilter
+from utils.optimizer import OptimizedObjectField
+from utils.pagination import KeysetFilterListField
 
 
 class ClientType(DjangoObjectType):
@@ -18,12 +16,16 @@ class ClientType(DjangoObjectType):
 class ProjectType(DjangoObjectType):
     class Meta:
         model = Project
+        exclude_fields = ('search_vector',)
         fields = '__all__'
 
 
 class ProjectListType(DjangoObjectType):
+    cursor = graphene.String()
+
     class Meta:
         model = Project
+        exclude_fields = ('search_vector',)
         filterset_class = ProjectFilter
 
 
@@ -34,7 +36,7 @@ class TagType(DjangoObjectType):
 
 
 class Query(object):
-    client = DjangoObjectField(ClientType)
-    project = DjangoObjectField(ProjectType)
-    project_list = DjangoFilterListField(ProjectListType)
-    tag = DjangoObjectField(TagType)
+    client = OptimizedObjectField(ClientType)
+    project = OptimizedObjectField(ProjectType)
+    project_list = KeysetFilterListField(ProjectListType)
+    tag = OptimizedObjectField(TagType)
@@ -0,0 +1,10 @@
+from django.db.models.signals import m2m_changed
+from django.dispatch import receiver
+
+from project.models import Project
+from usergroup.scopes import group_access_changed
+
+
+@receiver(m2m_changed, sender=Project.user_group.through)
+def project_user_group_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    group_access_changed(instance, action, reverse, pk_set, 'user_group')
@@ -0,0 +1,82 @@
+"""
+Cached results of the summary and dashboard queries.
+
+Results are keyed by user, operation and period. Each user has a result
+version which is replaced whenever a change may alter their results: a
+change of their time summary or of the summary of a project they can
+access. Keys also hold the permission scope version of the user, so a
+change of membership invalidates them too.
+"""
+from uuid import uuid4
+
+from django.core.cache import cache
+from django.db import transaction
+
+from usergroup.models import GroupMember
+from usergroup.scopes import version_key as scope_version_key
+
+RESULT_CACHE_TIMEOUT = 60 * 60 * 24
+
+
+def version_key(user_id):
+    return f'summary-result-version:{user_id}'
+
+
+def get_versions(user_id):
+    keys = [version_key(user_id), scope_version_key(user_id)]
+    versions = cache.get_many(keys)
+    missing = {key: uuid4().hex for key in keys if key not in versions}
+    if missing:
+        cache.set_many(missing, None)
+        versions.update(missing)
+    return ':'.join(versions[key] for key in keys)
+
+
+def get_cached_result(user, operation, period, compute):
+    """
+    Result of the operation for the user over the period,
+    compute is only called on a cache miss
+    """
+    key = f'summary-result:{operation}:{user.pk}:{period}:{get_versions(user.pk)}'
+    result = cache.get(key)
+    if result is None:
+        result = compute()
+        cache.set(key, result, RESULT_CACHE_TIMEOUT)
+    return result
+
+
+def invalidate_users(user_ids):
+    """
+    Drop the cached results of the users, again once the transaction
+    commits so a concurrent request cannot cache the old summary
+    """
+    def replace_versions():
+        cache.set_many({
+            version_key(user_id): uuid4().hex
+            for user_id in user_ids
+        }, None)
+
+    user_ids = set(user_ids)
+    if user_ids:
+        replace_versions()
+        transaction.on_commit(replace_versions)
+
+
+def invalidate_projects(project_ids):
+    """
+    Drop the cached results of the users who can access the projects
+    """
+    project_ids = {project_id for project_id in project_ids if project_id}
+    if project_ids:
+        invalidate_users(GroupMember.objects.filter(
+            group__project__in=project_ids
+        ).values_list('member', flat=True))
+
+
+def invalidate_summaries(summaries):
+    """
+    Drop the cached results depending on the given daily summary rows
+    """
+    rows = set(summaries.order_by().values_list('user', 'project').distinct())
+    invalidate_users(user for user, _ in rows)
+    invalidate_projects(project for _, project in rows)
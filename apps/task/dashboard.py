@@ -0,0 +1,142 @@
+import datetime
+
+from django.db.models import BooleanField, Case, DateField, F, Q, Sum, Value, When
+
+from project.models import Project
+from task.cache import get_cached_result
+from task.models import DailyTimeSummary
+
+
+def seconds_to_duration(seconds):
+    if seconds is None:
+        return None
+    return datetime.timedelta(seconds=seconds)
+
+
+class Dashboard:
+    """
+    Every section of the dashboard of a user, folded from a single
+    aggregate over the daily time summary:
+
+    - this_week: time of the user per day of the current week
+    - hours_by_project: time of the user per accessible project
+    - most_active_project: same, limited to the current week
+    - my_project: time of everyone per accessible project and task group status
+    """
+
+    SECTIONS = ('this_week', 'hours_by_project', 'most_active_project', 'my_project')
+
+    def __init__(self, user, today=None):
+        today = today or datetime.date.today()
+        self.start_week = today - datetime.timedelta(today.weekday())
+        self.end_week = self.start_week + datetime.timedelta(6)
+        self.user = user
+        self.project_ids = set(Project.get_ids_for(user))
+        self.compute()
+
+    def __getstate__(self):
+        # only the computed sections are cached
+        return {name: getattr(self, name) for name in self.SECTIONS}
+
+    @staticmethod
+    def for_request(info):
+        """
+        Dashboard of the current user, computed once per request
+        and cached until the summaries it reads change
+        """
+        request = info.context
+        if not request.user.is_authenticated:
+            return None
+        if not hasattr(request, '_dashboard'):
+            today = datetime.date.today()
+            request._dashboard = get_cached_result(
+                request.user, 'dashboard', today.isoformat(),
+                lambda: Dashboard(request.user, today),
+            )
+        return request._dashboard
+
+    def get_rows(self):
+        return DailyTimeSummary.objects.filter(
+            Q(user=self.user) | Q(project__in=self.project_ids)
+        ).annotate(
+            is_mine=Case(
+                When(user=self.user, then=Value(True)),
+                default=Value(False),
+                output_field=BooleanField(),
+            ),
+            week_date=Case(
+                When(date__range=[self.start_week, self.end_week], then=F('date')),
+                default=None,
+                output_field=DateField(),
+            ),
+        ).order_by().values(
+            'is_mine',
+            'week_date',
+            'project',
+            project_name=F('project__title'),
+            client_name=F('project__client__name'),
+            edited_on=F('project__modified_at'),
+            status=F('task__task_group__status'),
+        ).annotate(
+            seconds=Sum('total_seconds'),
+        )
+
+    def compute(self):
+        week_days = {}
+        projects = {}
+        week_projects = {}
+        my_projects = {}
+        for row in self.get_rows():
+            seconds = row['seconds']
+            if row['is_mine'] and row['week_date']:
+                week_days[row['week_date']] = week_days.get(row['week_date'], 0) + seconds
+            if row['project'] not in self.project_ids:
+                continue
+            project = (row['project'], row['project_name'])
+            if row['is_mine']:
+                projects[project] = projects.get(project, 0) + seconds
+                if row['week_date']:
+                    week_projects[project] = week_projects.get(project, 0) + seconds
+            key = (row['project'], row['status'])
+            if key not in my_projects:
+                my_projects[key] = dict(
+                    project_name=row['project_name'],
+                    client_name=row['client_name'],
+                    edited_on=row['edited_on'],
+                    status=row['status'],
+                    hours_spent=0,
+                )
+            my_projects[key]['hours_spent'] += seconds
+
+        self.this_week = dict(
+            total_hours=self.total(week_days),
+            total_hours_day=[
+                dict(date=date, duration=seconds_to_duration(seconds))
+                for date, seconds in sorted(week_days.items())
+            ],
+        )
+        self.hours_by_project = dict(
+            project_total=self.total(projects),
+            project_particular=self.per_project(projects),
+        )
+        self.most_active_project = dict(
+            project_total=self.total(week_projects),
+            project_particular=self.per_project(week_projects),
+        )
+        self.my_project = [
+            dict(project, hours_spent=seconds_to_duration(project['hours_spent']))
+            for _, project in sorted(my_projects.items(), key=lambda item: item[0][0])
+        ]
+
+    @staticmethod
+    def total(durations):
+        if not durations:
+            return None
+        return seconds_to_duration(sum(durations.values()))
+
+    @staticmethod
+    def per_project(durations):
+        return [
+            dict(project_name=project_name, duration=seconds_to_duration(seconds))
+            for (_, project_name), seconds in sorted(durations.items())
+        ]
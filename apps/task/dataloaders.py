@@ -0,0 +1,26 @@
+from collections import defaultdict
+
+from promise import Promise
+from promise.dataloader import DataLoader
+
+from task.models import TimeEntry
+
+
+class TimeEntriesByDateLoader(DataLoader):
+    """
+    Time entries of a user for each requested date, loaded with one query
+    """
+
+    def __init__(self, user_id, **kwargs):
+        super().__init__(**kwargs)
+        self.user_id = user_id
+
+    def batch_load_fn(self, dates):
+        entries = defaultdict(list)
+        queryset = TimeEntry.objects.filter(
+            user=self.user_id,
+            date__in=dates,
+        ).select_related('task', 'user').order_by('start_time', 'id')
+        for entry in queryset:
+            entries[entry.date].append(entry)
+        return Promise.resolve([entries[date] for date in dates])
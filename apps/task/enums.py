@@ -1,5 +1,11 @@
 import graphene
 
 from .models import TaskGroup
+from .search import SEARCH_TYPES
 
 StatusGrapheneEnum = graphene.Enum.from_enum(TaskGroup.STATUS)
+
+SearchTypeGrapheneEnum = graphene.Enum(
+    'SearchType',
+    [(search_type.upper(), search_type) for search_type in SEARCH_TYPES],
+)
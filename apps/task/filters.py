@@ -1,12 +1,17 @@
 import django_filters
 
 from task.models import Task, TaskGroup, TimeEntry
+from utils.search import TrigramIContains, order_by_similarity
 
 
 class TaskFilter(django_filters.FilterSet):
     title_contains = django_filters.CharFilter(
         field_name='title',
-        lookup_expr='icontains'
+        lookup_expr=TrigramIContains.lookup_name
+    )
+    title_similar = django_filters.CharFilter(
+        field_name='title',
+        method=order_by_similarity
     )
 
     class Meta:
@@ -17,7 +22,11 @@ class TaskFilter(django_filters.FilterSet):
 class TaskGroupFilter(django_filters.FilterSet):
     title_contains = django_filters.CharFilter(
         field_name='title',
-        lookup_expr='icontains'
+        lookup_expr=TrigramIContains.lookup_name
+    )
+    title_similar = django_filters.CharFilter(
+        field_name='title',
+        method=order_by_similarity
     )
     start_date_lte = django_filters.CharFilter(
         field_name='start_date',
@@ -54,3 +63,16 @@ class TimeEntryFilter(django_filters.FilterSet):
     class Meta:
         model = TimeEntry
         fields = ()
+
+
+class TimeEntryExportFilter(TimeEntryFilter):
+    project = django_filters.NumberFilter(
+        field_name='task__task_group__project',
+    )
+    client = django_filters.NumberFilter(
+        field_name='task__task_group__project__client',
+    )
+
+    class Meta:
+        model = TimeEntry
+        fields = ['user']
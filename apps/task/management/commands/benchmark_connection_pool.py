@@ -0,0 +1,62 @@
+import copy
+import statistics
+import threading
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+
+from chrono.db.base import DatabaseWrapper, close_pools
+
+
+class Command(BaseCommand):
+    help = 'Measure the per-request latency of opening a connection per request against the connection pool'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--requests', type=int, default=500,
+            help='Requests timed per mode and thread',
+        )
+        parser.add_argument(
+            '--threads', type=int, default=1,
+            help='Concurrent request threads, more than --pool-size makes them wait',
+        )
+        parser.add_argument(
+            '--pool-size', type=int, default=(connection.settings_dict.get('POOL') or {}).get('MAX_SIZE') or 20,
+        )
+
+    def handle(self, *args, **options):
+        # contrib.postgres looks up the hstore oids on the first connection
+        connection.ensure_connection()
+        self.stdout.write(f'{"mode":>8} {"median (ms)":>12} {"p95 (ms)":>10}')
+        for mode, pool in (('connect', None), ('pool', {'MAX_SIZE': options['pool_size']})):
+            settings_dict = copy.deepcopy(connection.settings_dict)
+            settings_dict['POOL'] = pool
+            timings = []
+            threads = [
+                threading.Thread(target=self.run, args=(settings_dict, options['requests'], timings))
+                for _ in range(options['threads'])
+            ]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            timings.sort()
+            self.stdout.write(
+                f'{mode:>8} {statistics.median(timings):>12.3f} '
+                f'{timings[int(len(timings) * 0.95) - 1]:>10.3f}'
+            )
+            if pool:
+                wrapper = DatabaseWrapper(settings_dict, alias=connection.alias)
+                self.stdout.write(f'{"":>8} {wrapper.get_pool(wrapper.get_connection_params()).stats()}')
+        close_pools()
+
+    def run(self, settings_dict, requests, timings):
+        # what a request does with CONN_MAX_AGE=0: connect, query, close
+        wrapper = DatabaseWrapper(settings_dict, alias=connection.alias)
+        for _ in range(requests):
+            start = time.perf_counter()
+            with wrapper.cursor() as cursor:
+                cursor.execute('SELECT count(*) FROM task_task')
+            wrapper.close()
+            timings.append((time.perf_counter() - start) * 1000)
@@ -0,0 +1,61 @@
+import statistics
+import time
+
+from django.core.management.base import BaseCommand
+from graphql.backend.core import GraphQLCoreBackend
+from graphql.validation import validate
+
+from chrono.schema import schema
+from chrono.views import CachedDocumentBackend
+
+OPERATIONS = {
+    'dashboard': '''
+        query DashBoard{
+            dashboard {
+                thisWeek { totalHours totalHoursDay { date duration } }
+                hoursByProject { projectTotal projectParticular { duration projectName } }
+                mostActiveProject { projectTotal projectParticular { duration projectName } }
+                myProject { projectName clientName editedOn status hoursSpent }
+            }
+        }
+    ''',
+    'summaryWeekly': '''
+        query SummaryWeekly{
+            summaryWeekly {
+                totalHoursWeekly
+                totalHoursDay { date duration taskList { id duration description } }
+            }
+        }
+    ''',
+}
+
+
+class Command(BaseCommand):
+    help = 'Measure the parse and validation time of the hot operations with and without the document cache'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--iterations', type=int, default=1000,
+            help='Documents prepared per operation and backend',
+        )
+
+    def handle(self, *args, **options):
+        def uncached(query):
+            # what every request paid before: parse, then validate on execute
+            document = GraphQLCoreBackend().document_from_string(schema, query)
+            validate(schema, document.document_ast)
+
+        cached_backend = CachedDocumentBackend(maxsize=16)
+
+        def cached(query):
+            cached_backend.document_from_string(schema, query)
+
+        self.stdout.write(f'{"operation":>14} {"backend":>9} {"median (us)":>12}')
+        for name, query in OPERATIONS.items():
+            for backend, prepare in (('uncached', uncached), ('cached', cached)):
+                timings = []
+                for _ in range(options['iterations']):
+                    start = time.perf_counter()
+                    prepare(query)
+                    timings.append((time.perf_counter() - start) * 1000000)
+                self.stdout.write(f'{name:>14} {backend:>9} {statistics.median(timings):>12.1f}')
@@ -0,0 +1,141 @@
+import datetime
+import json
+import statistics
+import time
+
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+
+from task.management.commands.generate_dataset import DATASET_DOMAIN
+from task.models import Task, TimeEntry
+from user.models import User
+
+OPERATIONS = {
+    'summaryWeekly': '''
+        query SummaryWeekly{
+            summaryWeekly {
+                totalHoursWeekly
+                totalHoursDay { date duration taskList { id duration description } }
+            }
+        }
+    ''',
+    'summaryMonthly': '''
+        query SummaryMonthly{
+            summaryMonthly {
+                totalHoursMonthly
+                totalHoursDay { date duration }
+            }
+        }
+    ''',
+    'dashboard': '''
+        query DashBoard{
+            dashboard {
+                thisWeek { totalHours totalHoursDay { date duration } }
+                hoursByProject { projectTotal projectParticular { duration projectName } }
+                mostActiveProject { projectTotal projectParticular { duration projectName } }
+                myProject { projectName clientName editedOn status hoursSpent }
+            }
+        }
+    ''',
+    'taskList': '''
+        query TaskList($user: ID){
+            taskList(user: $user, first: 50) { id title taskGroup { id title } }
+        }
+    ''',
+    'createTimeEntry': '''
+        mutation CreateTimeEntry($input: TimeEntryCreateInputType!){
+            createTimeentry(data: $input){ ok errors { field messages } result { id } }
+        }
+    ''',
+}
+
+# created entries are put on days the dataset does not use, and deleted
+CREATE_DATE = datetime.date(2100, 1, 1)
+
+
+def percentile(timings, q):
+    return timings[max(int(len(timings) * q) - 1, 0)]
+
+
+class Command(BaseCommand):
+    help = 'Measure the latency and SQL count of the hot GraphQL operations against the generated dataset'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--operations', nargs='+', choices=list(OPERATIONS), default=list(OPERATIONS),
+        )
+        parser.add_argument(
+            '--iterations', type=int, default=200,
+            help='Requests timed per operation, spread over the users',
+        )
+        parser.add_argument('--users', type=int, default=50, help='Dataset users the requests are made as')
+        parser.add_argument(
+            '--warm', action='store_true',
+            help='Keep the cached summaries between requests, by default every request computes them',
+        )
+
+    def handle(self, *args, **options):
+        users = list(
+            User.objects.filter(email__endswith=f'@{DATASET_DOMAIN}').order_by('id')[:options['users']]
+        )
+        if not users:
+            raise CommandError('No dataset in this database, run generate_dataset first')
+        clients = []
+        for user in users:
+            client = Client()
+            client.force_login(user)
+            clients.append((user, client))
+        tasks = dict(Task.objects.filter(user__in=users).order_by('user', 'id').distinct('user').values_list('user', 'id'))
+
+        self.stdout.write(f'{"operation":>16} {"p50 (ms)":>9} {"p95 (ms)":>9} {"p99 (ms)":>9} {"queries":>8}')
+        created = []
+        try:
+            for name in options['operations']:
+                timings, query_counts = [], []
+                for i in range(options['iterations']):
+                    user, client = clients[i % len(clients)]
+                    variables = self.get_variables(name, user, tasks, i)
+                    if not options['warm']:
+                        cache.clear()
+                    # single top-level fields, so their SQL runs in this thread
+                    with CaptureQueriesContext(connection) as context:
+                        start = time.perf_counter()
+                        response = client.post(
+                            '/graphql',
+                            json.dumps({'query': OPERATIONS[name], 'variables': variables}),
+                            content_type='application/json',
+                        )
+                        timings.append((time.perf_counter() - start) * 1000)
+                    content = json.loads(response.content)
+                    if 'errors' in content:
+                        raise CommandError(f'{name}: {content["errors"]}')
+                    if name == 'createTimeEntry':
+                        created.append(content['data']['createTimeentry']['result']['id'])
+                    query_counts.append(len(context.captured_queries))
+                timings.sort()
+                self.stdout.write(
+                    f'{name:>16} {percentile(timings, 0.5):>9.2f} {percentile(timings, 0.95):>9.2f} '
+                    f'{percentile(timings, 0.99):>9.2f} {statistics.median(query_counts):>8g}'
+                )
+        finally:
+            # one by one, so the daily summary follows
+            for entry in TimeEntry.objects.filter(id__in=created):
+                entry.delete()
+
+    @staticmethod
+    def get_variables(name, user, tasks, i):
+        if name == 'taskList':
+            return {'user': user.id}
+        if name == 'createTimeEntry':
+            start = datetime.datetime.combine(CREATE_DATE, datetime.time()) + datetime.timedelta(minutes=i)
+            return {'input': {
+                'user': user.id,
+                'task': tasks.get(user.id) or next(iter(tasks.values())),
+                'date': start.date().isoformat(),
+                'startTime': start.time().isoformat(),
+                'endTime': (start + datetime.timedelta(seconds=30)).time().isoformat(),
+            }}
+        return None
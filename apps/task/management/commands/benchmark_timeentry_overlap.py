@@ -0,0 +1,74 @@
+import datetime
+import statistics
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+
+from task.models import TimeEntry
+from user.models import User
+
+
+class Command(BaseCommand):
+    help = 'Measure TimeEntry overlap validation latency as a user\'s history grows'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--sizes', type=int, nargs='+',
+            default=[100, 1000, 10000, 100000],
+            help='History sizes (number of existing entries) to measure',
+        )
+        parser.add_argument(
+            '--iterations', type=int, default=200,
+            help='Validations timed per history size',
+        )
+
+    def handle(self, *args, **options):
+        # everything is rolled back, the benchmark leaves no data behind
+        with transaction.atomic():
+            self.run(options['sizes'], options['iterations'])
+            transaction.set_rollback(True)
+
+    def run(self, sizes, iterations):
+        user = User.objects.create(
+            username='overlap-benchmark',
+            email='overlap-benchmark@chrono.local',
+        )
+        first_day = datetime.date(2000, 1, 1)
+        created = 0
+        self.stdout.write(f'{"entries":>10} {"median (ms)":>12} {"p95 (ms)":>10}')
+        for size in sorted(sizes):
+            # four one hour entries per day
+            entries = []
+            for i in range(created, size):
+                start = datetime.time(8 + (i % 4) * 2)
+                end = datetime.time(9 + (i % 4) * 2)
+                entry = TimeEntry(
+                    user=user,
+                    date=first_day + datetime.timedelta(days=i // 4),
+                    start_time=start,
+                    end_time=end,
+                )
+                entry.update_time_fields()
+                entries.append(entry)
+            TimeEntry.objects.bulk_create(entries, batch_size=5000)
+            created = max(created, size)
+            with connection.cursor() as cursor:
+                cursor.execute('ANALYZE task_timeentry')
+
+            timings = []
+            for i in range(iterations):
+                values = {
+                    'user': user,
+                    'date': first_day + datetime.timedelta(days=i % (created // 4 or 1)),
+                    'start_time': datetime.time(8, 30),
+                    'end_time': datetime.time(9, 30),
+                }
+                start = time.perf_counter()
+                TimeEntry.clean_dates(values)
+                timings.append((time.perf_counter() - start) * 1000)
+            timings.sort()
+            self.stdout.write(
+                f'{created:>10} {statistics.median(timings):>12.3f} '
+                f'{timings[int(len(timings) * 0.95) - 1]:>10.3f}'
+            )
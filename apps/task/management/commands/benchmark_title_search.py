@@ -0,0 +1,61 @@
+import statistics
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+
+from task.models import Task
+
+
+class Command(BaseCommand):
+    help = 'Compare icontains against the trigram indexed title lookups on a large task table'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--tasks', type=int, default=1000000,
+            help='Number of tasks in the table',
+        )
+        parser.add_argument(
+            '--iterations', type=int, default=20,
+            help='Queries timed per lookup and term',
+        )
+        parser.add_argument(
+            '--terms', nargs='+', default=['review', 'a3f9', 'deploy 7c'],
+            help='Searched substrings',
+        )
+
+    def handle(self, *args, **options):
+        # everything is rolled back, the benchmark leaves no data behind
+        with transaction.atomic():
+            self.run(options['tasks'], options['iterations'], options['terms'])
+            transaction.set_rollback(True)
+
+    def run(self, tasks, iterations, terms):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                '''
+                INSERT INTO task_task (title, description, created_at, modified_at)
+                SELECT (ARRAY['design', 'review', 'deploy', 'fix', 'write', 'plan'])[1 + g %% 6]
+                       || ' ' || md5(g::text), '', now(), now()
+                FROM generate_series(1, %s) g
+                ''',
+                [tasks],
+            )
+            cursor.execute('ANALYZE task_task')
+
+        lookups = {
+            'icontains': lambda term: Task.objects.filter(title__icontains=term),
+            'trigram_icontains': lambda term: Task.objects.filter(title__trigram_icontains=term),
+            'trigram_similar': lambda term: Task.objects.filter(title__trigram_similar=term),
+        }
+        self.stdout.write(f'{"lookup":>18} {"term":>10} {"rows":>8} {"median (ms)":>12}')
+        for term in terms:
+            for name, lookup in lookups.items():
+                timings = []
+                for _ in range(iterations):
+                    start = time.perf_counter()
+                    rows = len(lookup(term)[:50].values_list('id', flat=True))
+                    timings.append((time.perf_counter() - start) * 1000)
+                self.stdout.write(
+                    f'{name:>18} {term:>10} {rows:>8} {statistics.median(timings):>12.3f}'
+                )
@@ -0,0 +1,208 @@
+import datetime
+import io
+import random
+
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from project.models import Client, Project
+from task.models import DailyTimeSummary, Task, TaskGroup, TimeEntry
+from user.models import User
+from usergroup.models import GroupMember, UserGroup
+
+# users of the dataset are user<n>@dataset.chrono, all with this password
+DATASET_DOMAIN = 'dataset.chrono'
+DATASET_PASSWORD = 'chrono-dataset'
+
+WORDS = (
+    'api', 'backend', 'billing', 'bug', 'client', 'dashboard', 'deploy', 'design',
+    'docs', 'export', 'frontend', 'invoice', 'login', 'meeting', 'migration', 'mobile',
+    'onboarding', 'payment', 'performance', 'planning', 'release', 'report', 'review',
+    'search', 'security', 'setup', 'support', 'sync', 'testing', 'timesheet', 'upload',
+)
+
+# working day of the generated entries, 06:00 to 22:00
+DAY_START = 6 * 3600
+DAY_LENGTH = 16 * 3600
+
+
+class Command(BaseCommand):
+    help = 'Generate a deterministic synthetic dataset for benchmarks, into an empty database'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=5000)
+        parser.add_argument('--projects', type=int, default=500)
+        parser.add_argument('--tasks', type=int, default=200000)
+        parser.add_argument('--time-entries', type=int, default=20000000)
+        parser.add_argument(
+            '--days', type=int, default=365,
+            help='The time entries are spread over the days up to today',
+        )
+        parser.add_argument(
+            '--groups-per-user', type=int, default=3,
+            help='Project groups each user is a member of',
+        )
+        parser.add_argument('--seed', type=int, default=1)
+        parser.add_argument('--batch-size', type=int, default=10000)
+
+    def handle(self, *args, **options):
+        if User.objects.filter(email__endswith=f'@{DATASET_DOMAIN}').exists():
+            raise CommandError('The dataset was already generated in this database')
+        self.random = random.Random(options['seed'])
+        self.batch_size = options['batch_size']
+
+        users = self.create_users(options['users'])
+        groups = self.create_groups(users, options['projects'], options['groups_per_user'])
+        projects = self.create_projects(groups)
+        tasks = self.create_tasks(projects, groups, options['tasks'])
+        self.create_time_entries(users, tasks, options['time_entries'], options['days'])
+
+        self.log('Daily summary')
+        DailyTimeSummary.rebuild()
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE')
+        self.log('Done')
+
+    def log(self, message):
+        self.stdout.write(f'{datetime.datetime.now():%H:%M:%S} {message}')
+
+    def title(self, words=3):
+        return ' '.join(self.random.choice(WORDS) for _ in range(words)).capitalize()
+
+    def bulk_create(self, model, objects):
+        return model.objects.bulk_create(objects, batch_size=self.batch_size)
+
+    def create_users(self, count):
+        self.log(f'{count} users')
+        # hashed once, the hasher is far slower than the inserts
+        password = make_password(DATASET_PASSWORD)
+        return self.bulk_create(User, [
+            User(
+                username=f'user{i}',
+                email=f'user{i}@{DATASET_DOMAIN}',
+                first_name=self.random.choice(WORDS).capitalize(),
+                password=password,
+            )
+            for i in range(count)
+        ])
+
+    def create_groups(self, users, count, groups_per_user):
+        """
+        A group per project, {group: members}
+        """
+        self.log(f'{count} groups')
+        groups = self.bulk_create(UserGroup, [UserGroup(title=f'Team {i}') for i in range(count)])
+        members = {group: [] for group in groups}
+        for user in users:
+            for group in self.random.sample(groups, min(groups_per_user, len(groups))):
+                members[group].append(user)
+        self.bulk_create(GroupMember, [
+            GroupMember(group=group, member=member)
+            for group, group_members in members.items()
+            for member in group_members
+        ])
+        return members
+
+    def create_projects(self, groups):
+        self.log(f'{len(groups)} projects')
+        clients = self.bulk_create(Client, [
+            Client(name=f'Client {i}') for i in range(max(len(groups) // 5, 1))
+        ])
+        projects = self.bulk_create(Project, [
+            Project(
+                title=self.title(),
+                description=self.title(8),
+                client=self.random.choice(clients),
+                created_by=self.random.choice(members) if members else None,
+            )
+            for members in groups.values()
+        ])
+        Through = Project.user_group.through
+        self.bulk_create(Through, [
+            Through(project=project, usergroup=group)
+            for project, group in zip(projects, groups)
+        ])
+        return projects
+
+    def create_tasks(self, projects, groups, count):
+        """
+        Tasks spread over ten task groups per project, each assigned to
+        a member of the project. {user id: [task ids]}
+        """
+        self.log(f'{len(projects) * 10} task groups, {count} tasks')
+        project_groups = list(groups)
+        task_groups = self.bulk_create(TaskGroup, [
+            TaskGroup(title=self.title(), project=project)
+            for project in projects
+            for _ in range(10)
+        ])
+        Through = TaskGroup.user_group.through
+        self.bulk_create(Through, [
+            Through(taskgroup=task_group, usergroup=project_groups[i // 10])
+            for i, task_group in enumerate(task_groups)
+        ])
+        tasks = {}
+        for start in range(0, count, self.batch_size):
+            batch = []
+            for i in range(start, min(start + self.batch_size, count)):
+                task_group = task_groups[i % len(task_groups)]
+                members = groups[project_groups[(i % len(task_groups)) // 10]]
+                user = self.random.choice(members) if members else None
+                batch.append(Task(
+                    title=self.title(),
+                    description=self.title(12),
+                    task_group=task_group,
+                    user=user,
+                    created_by=user,
+                ))
+            for task in self.bulk_create(Task, batch):
+                tasks.setdefault(task.user_id, []).append(task.id)
+        return tasks
+
+    def create_time_entries(self, users, tasks, count, days):
+        """
+        Copied in, the entries of a user on a day split the working day
+        into slots so they never overlap
+        """
+        self.log(f'{count} time entries')
+        today = datetime.date.today()
+        all_tasks = [task for user_tasks in tasks.values() for task in user_tasks]
+        per_user, extra = divmod(count, len(users))
+        columns = (
+            'description', 'date', 'start_time', 'end_time', 'time_range',
+            'duration_seconds', 'task_id', 'user_id', 'created_at', 'modified_at',
+        )
+        now = datetime.datetime.now(datetime.timezone.utc).isoformat()
+        buffer = io.StringIO()
+        rows = 0
+        for position, user in enumerate(users):
+            user_tasks = tasks.get(user.id) or all_tasks
+            user_entries = per_user + (position < extra)
+            for day in range(days):
+                entries = user_entries // days + (day < user_entries % days)
+                if not entries:
+                    continue
+                date = today - datetime.timedelta(days=day)
+                slot = DAY_LENGTH // entries
+                for j in range(entries):
+                    start = DAY_START + j * slot
+                    end = start + self.random.randint(max(slot // 2, 1), max(slot, 1))
+                    buffer.write('\t'.join(map(str, (
+                        '', date, seconds_to_time(start), seconds_to_time(end), f'[{start},{end})',
+                        end - start, self.random.choice(user_tasks), user.id, now, now,
+                    ))) + '\n')
+                    rows += 1
+            if rows >= self.batch_size * 10 or position == len(users) - 1:
+                buffer.seek(0)
+                with connection.cursor() as cursor:
+                    cursor.copy_expert(
+                        f'COPY {TimeEntry._meta.db_table} ({", ".join(columns)}) FROM STDIN',
+                        buffer,
+                    )
+                buffer = io.StringIO()
+                rows = 0
+
+
+def seconds_to_time(seconds):
+    return datetime.time(seconds // 3600, seconds % 3600 // 60, seconds % 60)
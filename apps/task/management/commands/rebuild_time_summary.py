@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+
+from task.models import DailyTimeSummary
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the daily time summary from the time entries'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=5000,
+            help='Summary rows inserted per query',
+        )
+
+    def handle(self, *args, **options):
+        DailyTimeSummary.rebuild(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(
+            f'Rebuilt {DailyTimeSummary.objects.count()} summary rows'
+        ))
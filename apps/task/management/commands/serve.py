@@ -0,0 +1,91 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.urls import get_resolver
+from gunicorn.app.base import BaseApplication
+
+from chrono.db.base import close_pools
+
+# caches kept in the memory of each process, the workers would not see each
+# other's invalidations (scopes, summaries) and serve stale results
+PROCESS_CACHES = ('django.core.cache.backends.locmem.LocMemCache',)
+
+
+def warm_up():
+    """
+    Load everything a request needs in the master process, so the workers
+    share it copy-on-write instead of each building it on its first request.
+    """
+    from chrono.schema import schema
+    from chrono.views import document_backend, get_persisted_queries
+
+    # imports the views and builds the type map of the schema
+    get_resolver().url_patterns
+    for query in get_persisted_queries().values():
+        document_backend.document_from_string(schema, query)
+    # a connection opened here would be shared by every worker
+    connections.close_all()
+    close_pools()
+
+
+class ChronoApplication(BaseApplication):
+    def __init__(self, options):
+        self.options = options
+        super().__init__()
+
+    def load_config(self):
+        for key, value in self.options.items():
+            self.cfg.set(key, value)
+
+    def load(self):
+        from chrono.asgi import application
+
+        warm_up()
+        return application
+
+
+class Command(BaseCommand):
+    help = 'Run the pre-forking production server, HUP restarts the workers gracefully'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--bind', default=settings.SERVER_BIND)
+        parser.add_argument(
+            '--workers', type=int, default=settings.SERVER_WORKERS,
+            help='Worker processes forked from the preloaded master',
+        )
+        parser.add_argument(
+            '--max-requests', type=int, default=settings.SERVER_MAX_REQUESTS,
+            help='Requests after which a worker is replaced, 0 never replaces it',
+        )
+        parser.add_argument(
+            '--max-requests-jitter', type=int, default=settings.SERVER_MAX_REQUESTS_JITTER,
+            help='Random extra requests, so the workers are not replaced all at once',
+        )
+        parser.add_argument(
+            '--timeout', type=int, default=settings.SERVER_TIMEOUT,
+            help='Seconds after which a silent worker is killed',
+        )
+        parser.add_argument(
+            '--graceful-timeout', type=int, default=settings.SERVER_GRACEFUL_TIMEOUT,
+            help='Seconds a worker gets to finish its requests on reload or shutdown',
+        )
+        parser.add_argument('--pidfile', default=None, help='Where the master writes its pid, for signals')
+
+    def handle(self, *args, **options):
+        backend = settings.CACHES['default']['BACKEND']
+        if options['workers'] > 1 and backend in PROCESS_CACHES:
+            raise CommandError(
+                f'{backend} is not shared by the {options["workers"]} workers, set CACHE_BACKEND '
+                'and CACHE_LOCATION to a memcached or redis cache, or run a single worker'
+            )
+        ChronoApplication({
+            'bind': options['bind'],
+            'workers': options['workers'],
+            'worker_class': 'uvicorn.workers.UvicornWorker',
+            'preload_app': True,
+            'max_requests': options['max_requests'],
+            'max_requests_jitter': options['max_requests_jitter'],
+            'timeout': options['timeout'],
+            'graceful_timeout': options['graceful_timeout'],
+            'pidfile': options['pidfile'],
+        }).run()
@@ -0,0 +1,108 @@
+# Generated by Django 3.0.5 on 2026-10-17 15:21
+
+import django.contrib.postgres.constraints
+import django.contrib.postgres.fields.ranges
+from django.contrib.postgres.operations import BtreeGistExtension
+from django.db import migrations
+
+
+# An entry without end_time only occupies its starting second
+POPULATE_TIME_RANGE = '''
+UPDATE task_timeentry SET time_range = CASE
+    WHEN end_time IS NULL THEN int4range(
+        FLOOR(EXTRACT(EPOCH FROM start_time))::int,
+        FLOOR(EXTRACT(EPOCH FROM start_time))::int + 1
+    )
+    WHEN end_time >= start_time THEN int4range(
+        FLOOR(EXTRACT(EPOCH FROM start_time))::int,
+        FLOOR(EXTRACT(EPOCH FROM end_time))::int
+    )
+END
+'''
+
+# Entries created before the constraint may overlap, the validation missed
+# containment and equal starts. Ordered by start, each entry is trimmed to
+# start where the entries before it on the day end, those it falls within
+# are closed as empty entries so the constraint can be added. The original
+# times of the trimmed entries are kept in task_timeentry_overlap_backup,
+# restored when the migration is reversed.
+OVERLAPPING_ENTRIES = '''
+SELECT entry.id, entry.start_time, entry.end_time, earlier.previous_end
+FROM task_timeentry AS entry
+JOIN (
+    SELECT id, max(upper(time_range)) OVER (
+        PARTITION BY user_id, date ORDER BY lower(time_range), id
+        ROWS BETWEEN UNBOUNDED PRECEDING AND 1 PRECEDING
+    ) AS previous_end
+    FROM task_timeentry
+    WHERE user_id IS NOT NULL AND time_range IS NOT NULL AND NOT isempty(time_range)
+) AS earlier ON earlier.id = entry.id
+WHERE earlier.previous_end > lower(entry.time_range)
+'''
+
+TRIM_OVERLAPPING_ENTRIES = [
+    '''
+    CREATE TABLE task_timeentry_overlap_backup (
+        id integer PRIMARY KEY,
+        start_time time NOT NULL,
+        end_time time,
+        previous_end integer NOT NULL
+    )
+    ''',
+    f'''
+    INSERT INTO task_timeentry_overlap_backup (id, start_time, end_time, previous_end)
+    {OVERLAPPING_ENTRIES}
+    ''',
+    '''
+    UPDATE task_timeentry AS entry SET
+        start_time = CASE WHEN backup.previous_end < upper(entry.time_range)
+            THEN time '00:00' + backup.previous_end * interval '1 second'
+            ELSE entry.start_time
+        END,
+        end_time = CASE WHEN backup.previous_end < upper(entry.time_range)
+            THEN entry.end_time
+            ELSE entry.start_time
+        END,
+        time_range = CASE WHEN backup.previous_end < upper(entry.time_range)
+            THEN int4range(backup.previous_end, upper(entry.time_range))
+            ELSE 'empty'
+        END
+    FROM task_timeentry_overlap_backup AS backup
+    WHERE entry.id = backup.id
+    ''',
+    # rows updated twice in the transaction queue deferred foreign key
+    # checks, which would keep the table from being altered
+    'SET CONSTRAINTS ALL IMMEDIATE',
+]
+
+RESTORE_OVERLAPPING_ENTRIES = [
+    '''
+    UPDATE task_timeentry AS entry
+    SET start_time = backup.start_time, end_time = backup.end_time
+    FROM task_timeentry_overlap_backup AS backup
+    WHERE entry.id = backup.id
+    ''',
+    'DROP TABLE task_timeentry_overlap_backup',
+]
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('task', '0002_taskgroup_project'),
+    ]
+
+    operations = [
+        BtreeGistExtension(),
+        migrations.AddField(
+            model_name='timeentry',
+            name='time_range',
+            field=django.contrib.postgres.fields.ranges.IntegerRangeField(blank=True, editable=False, null=True),
+        ),
+        migrations.RunSQL(POPULATE_TIME_RANGE, migrations.RunSQL.noop),
+        migrations.RunSQL(TRIM_OVERLAPPING_ENTRIES, RESTORE_OVERLAPPING_ENTRIES),
+        migrations.AddConstraint(
+            model_name='timeentry',
+            constraint=django.contrib.postgres.constraints.ExclusionConstraint(expressions=[('user', '='), ('date', '='), ('time_range', '&&')], name='task_timeentry_no_overlap'),
+        ),
+    ]
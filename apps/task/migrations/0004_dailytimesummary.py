@@ -0,0 +1,45 @@
+# Generated by Django 3.0.5 on 2026-10-17 15:26
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+POPULATE_SUMMARY = '''
+INSERT INTO task_dailytimesummary (user_id, date, task_id, project_id, total_seconds, entry_count)
+SELECT entry.user_id, entry.date, entry.task_id, task_group.project_id,
+    COALESCE(EXTRACT(EPOCH FROM SUM(entry.end_time - entry.start_time)), 0)::int,
+    COUNT(*)
+FROM task_timeentry entry
+    LEFT JOIN task_task task ON task.id = entry.task_id
+    LEFT JOIN task_taskgroup task_group ON task_group.id = task.task_group_id
+WHERE entry.user_id IS NOT NULL
+GROUP BY entry.user_id, entry.date, entry.task_id, task_group.project_id
+'''
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('project', '0002_auto_20201112_1149'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('task', '0003_timeentry_time_range'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailyTimeSummary',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('total_seconds', models.PositiveIntegerField(default=0)),
+                ('entry_count', models.PositiveIntegerField(default=0)),
+                ('project', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, to='project.Project')),
+                ('task', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, to='task.Task')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'unique_together': {('user', 'date', 'task', 'project')},
+            },
+        ),
+        migrations.RunSQL(POPULATE_SUMMARY, migrations.RunSQL.noop),
+    ]
@@ -0,0 +1,48 @@
+# Generated by Django 3.0.5 on 2026-10-17 15:30
+
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models, transaction
+
+BATCH_SIZE = 10000
+
+
+def populate_duration_seconds(apps, schema_editor):
+    """
+    Fill duration_seconds in batches of ids, each batch in its own
+    transaction so the table is never locked for long
+    """
+    TimeEntry = apps.get_model('task', 'TimeEntry')
+    last_id = TimeEntry.objects.order_by('-id').values_list('id', flat=True).first() or 0
+    with schema_editor.connection.cursor() as cursor:
+        for batch_start in range(0, last_id + 1, BATCH_SIZE):
+            with transaction.atomic():
+                cursor.execute(
+                    '''
+                    UPDATE task_timeentry SET duration_seconds =
+                        FLOOR(EXTRACT(EPOCH FROM end_time))::int
+                        - FLOOR(EXTRACT(EPOCH FROM start_time))::int
+                    WHERE id >= %s AND id < %s AND end_time >= start_time
+                    ''',
+                    [batch_start, batch_start + BATCH_SIZE],
+                )
+
+
+class Migration(migrations.Migration):
+    atomic = False
+
+    dependencies = [
+        ('task', '0004_dailytimesummary'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='timeentry',
+            name='duration_seconds',
+            field=models.IntegerField(blank=True, editable=False, null=True),
+        ),
+        migrations.RunPython(populate_duration_seconds, migrations.RunPython.noop),
+        AddIndexConcurrently(
+            model_name='timeentry',
+            index=models.Index(fields=['user', 'date', 'duration_seconds'], name='task_timeentry_duration_idx'),
+        ),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 3.0.5 on 2026-10-17 15:34
+
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    atomic = False
+
+    dependencies = [
+        ('task', '0005_timeentry_duration_seconds'),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name='task',
+            index=models.Index(fields=['created_at', 'id'], name='task_task_keyset_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='taskgroup',
+            index=models.Index(fields=['created_at', 'id'], name='task_taskgroup_keyset_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='timeentry',
+            index=models.Index(fields=['date', 'start_time', 'id'], name='task_timeentry_keyset_idx'),
+        ),
+    ]
@@ -0,0 +1,87 @@
+# Generated by Django 3.0.5 on 2026-10-17 15:40
+
+import django.contrib.postgres.search
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, transaction
+
+BATCH_SIZE = 10000
+
+# columns of the search vector of each table
+SEARCH_COLUMNS = {
+    'task_task': ['title', 'description'],
+    'task_taskgroup': ['title', 'description'],
+    'task_timeentry': ['description'],
+}
+
+CREATE_TRIGGER = '''
+    CREATE TRIGGER {table}_search_vector_update
+    BEFORE INSERT OR UPDATE OF {columns} ON {table}
+    FOR EACH ROW EXECUTE PROCEDURE
+    tsvector_update_trigger(search_vector, 'pg_catalog.english', {columns})
+'''
+
+DROP_TRIGGER = 'DROP TRIGGER {table}_search_vector_update ON {table}'
+
+
+def populate_search_vector(apps, schema_editor):
+    """
+    Touch the searched columns in batches of ids so the triggers
+    compute the vectors, each batch in its own transaction
+    """
+    with schema_editor.connection.cursor() as cursor:
+        for table, columns in SEARCH_COLUMNS.items():
+            cursor.execute(f'SELECT MAX(id) FROM {table}')
+            last_id = cursor.fetchone()[0] or 0
+            for batch_start in range(0, last_id + 1, BATCH_SIZE):
+                with transaction.atomic():
+                    cursor.execute(
+                        f'UPDATE {table} SET {columns[0]} = {columns[0]} WHERE id >= %s AND id < %s',
+                        [batch_start, batch_start + BATCH_SIZE],
+                    )
+
+
+class Migration(migrations.Migration):
+    atomic = False
+
+    dependencies = [
+        ('task', '0007_title_trgm_idx'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='task',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='taskgroup',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='timeentry',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        *[
+            migrations.RunSQL(
+                CREATE_TRIGGER.format(table=table, columns=', '.join(columns)),
+                DROP_TRIGGER.format(table=table),
+            )
+            for table, columns in SEARCH_COLUMNS.items()
+        ],
+        migrations.RunPython(populate_search_vector, migrations.RunPython.noop),
+        AddIndexConcurrently(
+            model_name='task',
+            index=GinIndex(fields=['search_vector'], name='task_task_search_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='taskgroup',
+            index=GinIndex(fields=['search_vector'], name='task_taskgroup_search_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='timeentry',
+            index=GinIndex(fields=['search_vector'], name='task_timeentry_search_idx'),
+        ),
+    ]
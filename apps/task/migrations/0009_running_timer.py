@@ -0,0 +1,51 @@
+# Generated by Django 3.0.5 on 2026-10-17 16:20
+
+from django.db import migrations, models
+
+# an open entry is a running timer, all but the latest of a user are closed
+# as empty entries so the unique index can be built
+CLOSE_EXTRA_TIMERS = '''
+    UPDATE task_timeentry
+    SET end_time = start_time, time_range = 'empty', duration_seconds = 0
+    WHERE id IN (
+        SELECT id FROM (
+            SELECT id, row_number() OVER (
+                PARTITION BY user_id ORDER BY date DESC, start_time DESC, id DESC
+            ) AS position
+            FROM task_timeentry
+            WHERE end_time IS NULL AND user_id IS NOT NULL
+        ) AS timers
+        WHERE position > 1
+    )
+'''
+
+
+class Migration(migrations.Migration):
+    atomic = False
+
+    dependencies = [
+        ('task', '0008_search_vector'),
+    ]
+
+    operations = [
+        migrations.RunSQL(CLOSE_EXTRA_TIMERS, migrations.RunSQL.noop),
+        migrations.SeparateDatabaseAndState(
+            database_operations=[
+                migrations.RunSQL(
+                    'CREATE UNIQUE INDEX CONCURRENTLY task_timeentry_one_running_timer '
+                    'ON task_timeentry (user_id) WHERE end_time IS NULL',
+                    'DROP INDEX CONCURRENTLY task_timeentry_one_running_timer',
+                ),
+            ],
+            state_operations=[
+                migrations.AddConstraint(
+                    model_name='timeentry',
+                    constraint=models.UniqueConstraint(
+                        condition=models.Q(end_time__isnull=True),
+                        fields=('user',),
+                        name='task_timeentry_one_running_timer',
+                    ),
+                ),
+            ],
+        ),
+    ]
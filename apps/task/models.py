@@ -1,17 +1,28 @@
-from collections import OrderedDict
-from datetime import datetime
+from collections import OrderedDict, defaultdict
+from datetime import datetime, time, timedelta
+from functools import reduce
+from operator import or_
 
-from django.db import models
-from django.db.models import F, Sum
+from django.contrib.postgres.constraints import ExclusionConstraint
+from django.contrib.postgres.fields import IntegerRangeField, RangeOperators
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVectorField
+from django.db import models, transaction
+from django.db.models import Count, F, Sum
 from django.core.exceptions import ValidationError
+from django.utils import timezone
+from django.utils.dateparse import parse_time
+from psycopg2.extras import NumericRange
 from django_enumfield import enum
 from django.utils.translation import gettext_lazy as _, gettext
 
 
 from user.models import User
 from usergroup.models import UserGroup
+from usergroup.scopes import get_scope_ids
 
 from project.models import Project
+from task.cache import invalidate_projects, invalidate_summaries, invalidate_users
 
 from utils.models import BaseModel
 
@@ -38,15 +49,40 @@ class TaskGroup(BaseModel):
     user_group = models.ManyToManyField(UserGroup, blank=True,)
     project = models.ForeignKey(Project, on_delete=models.CASCADE,
                                 blank=True, null=True)
+    # title and description, maintained by a database trigger
+    search_vector = SearchVectorField(null=True, editable=False)
+
+    class Meta:
+        indexes = [
+            # keyset pagination of the list
+            models.Index(fields=['created_at', 'id'],
+                         name='task_taskgroup_keyset_idx'),
+            # substring and similarity search of the title
+            GinIndex(fields=['title'], opclasses=['gin_trgm_ops'],
+                     name='task_taskgroup_title_trgm_idx'),
+            GinIndex(fields=['search_vector'], name='task_taskgroup_search_idx'),
+        ]
 
     def __str__(self):
         return self.title
 
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        summaries = DailyTimeSummary.objects.filter(task__task_group=self)
+        # the status and project of the group are part of the dashboard
+        invalidate_summaries(summaries)
+        # keep the summary in sync when the task group moves to another project
+        if summaries.exclude(project=self.project_id).update(project=self.project_id):
+            invalidate_projects([self.project_id])
+
     @staticmethod
     def get_for(user):
-        return TaskGroup.objects.filter(
-            user_group__members=user
-        ).distinct()
+        return TaskGroup.objects.filter(id__in=get_scope_ids(
+            user, 'taskgroup',
+            lambda: TaskGroup.objects.filter(
+                user_group__members=user
+            ).values_list('id', flat=True).distinct()
+        ))
 
 
 class Task(BaseModel):
@@ -58,17 +94,65 @@ class Task(BaseModel):
                                     blank=True, null=True)
     user = models.ForeignKey(User, on_delete=models.CASCADE,
                              blank=True, null=True)
+    # title and description, maintained by a database trigger
+    search_vector = SearchVectorField(null=True, editable=False)
+
+    class Meta:
+        indexes = [
+            # keyset pagination of the list
+            models.Index(fields=['created_at', 'id'],
+                         name='task_task_keyset_idx'),
+            # substring and similarity search of the title
+            GinIndex(fields=['title'], opclasses=['gin_trgm_ops'],
+                     name='task_task_title_trgm_idx'),
+            GinIndex(fields=['search_vector'], name='task_task_search_idx'),
+        ]
 
     def __str__(self):
         return self.title
 
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        Task.sync_summaries([self])
+
+    @staticmethod
+    def sync_summaries(tasks):
+        """
+        Keep the summary in sync when the tasks move to another project,
+        one update per project they moved to
+        """
+        by_project = defaultdict(list)
+        for task in tasks:
+            by_project[task.task_group.project_id if task.task_group else None].append(task.pk)
+        for project, task_ids in by_project.items():
+            moved = DailyTimeSummary.objects.filter(task__in=task_ids).exclude(project=project)
+            invalidate_summaries(moved)
+            if moved.update(project=project):
+                invalidate_projects([project])
+
+
+def local_now():
+    """
+    Naive local time to the second, as the times of the entries are stored
+    """
+    return timezone.localtime().replace(tzinfo=None, microsecond=0)
+
 
 class TimeEntry(models.Model):
+    OVERLAP_CONSTRAINT = 'task_timeentry_no_overlap'
+    RUNNING_TIMER_CONSTRAINT = 'task_timeentry_one_running_timer'
+
     description = models.TextField(blank=True)
     date = models.DateField()
     start_time = models.TimeField()
     end_time = models.TimeField(default=None, blank=True,
                                 null=True)
+    # seconds since midnight covered by the entry, kept in sync on save
+    time_range = IntegerRangeField(blank=True, null=True, editable=False)
+    # null until the entry has an end_time, kept in sync on save
+    duration_seconds = models.IntegerField(blank=True, null=True, editable=False)
+    # description, maintained by a database trigger
+    search_vector = SearchVectorField(null=True, editable=False)
     task = models.ForeignKey(Task, on_delete=models.CASCADE,
                              blank=True, null=True)
     user = models.ForeignKey(User, on_delete=models.CASCADE,
@@ -76,45 +160,335 @@ class TimeEntry(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     modified_at = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        constraints = [
+            ExclusionConstraint(
+                name='task_timeentry_no_overlap',
+                expressions=[
+                    ('user', RangeOperators.EQUAL),
+                    ('date', RangeOperators.EQUAL),
+                    ('time_range', RangeOperators.OVERLAPS),
+                ],
+            ),
+            # an entry without end_time is a running timer, one per user;
+            # the partial index also finds the running timers of any users
+            # without reading their history
+            models.UniqueConstraint(
+                fields=['user'],
+                condition=models.Q(end_time__isnull=True),
+                name='task_timeentry_one_running_timer',
+            ),
+        ]
+        indexes = [
+            # covers the duration sums of a user over a date range
+            models.Index(fields=['user', 'date', 'duration_seconds'],
+                         name='task_timeentry_duration_idx'),
+            # keyset pagination of the list
+            models.Index(fields=['date', 'start_time', 'id'],
+                         name='task_timeentry_keyset_idx'),
+            GinIndex(fields=['search_vector'], name='task_timeentry_search_idx'),
+        ]
 
     def __str__(self):
         return f'{self.task.title} by {str(self.user)} {str(self.start_time)}'
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # summary row the entry is counted in, refreshed when the entry moves
+        instance._loaded_summary_key = (instance.__dict__.get('user_id'),
+                                        instance.__dict__.get('date'))
+        return instance
+
+    @property
+    def summary_keys(self):
+        return {getattr(self, '_loaded_summary_key', None), (self.user_id, self.date)}
+
+    def update_time_fields(self):
+        """
+        Sync the columns derived from start_time and end_time
+        """
+        self.time_range = TimeEntry.get_time_range(self.start_time, self.end_time)
+        if self.end_time is None or self.time_range is None:
+            self.duration_seconds = None
+        elif self.time_range.isempty:
+            self.duration_seconds = 0
+        else:
+            self.duration_seconds = self.time_range.upper - self.time_range.lower
+
+    def save(self, *args, **kwargs):
+        self.update_time_fields()
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            DailyTimeSummary.refresh(self.summary_keys)
+        self._loaded_summary_key = (self.user_id, self.date)
+
+    def delete(self, *args, **kwargs):
+        with transaction.atomic():
+            deleted = super().delete(*args, **kwargs)
+            DailyTimeSummary.refresh(self.summary_keys)
+        return deleted
+
+    @staticmethod
+    def get_for(user):
+        """
+        Own entries of the user and the entries of their projects
+        """
+        if not user.is_authenticated:
+            return TimeEntry.objects.none()
+        return TimeEntry.objects.filter(
+            models.Q(user=user) |
+            models.Q(task__task_group__project__in=Project.get_ids_for(user))
+        )
+
+    @staticmethod
+    def get_time_range(start_time, end_time=None):
+        """
+        Range of seconds since midnight occupied by the entry.
+        An entry without end_time only occupies its starting second.
+        """
+        if isinstance(start_time, str):
+            start_time = parse_time(start_time)
+        if isinstance(end_time, str):
+            end_time = parse_time(end_time)
+        if not isinstance(start_time, time):
+            return None
+        start = start_time.hour * 3600 + start_time.minute * 60 + start_time.second
+        if end_time is None:
+            return NumericRange(start, start + 1)
+        end = end_time.hour * 3600 + end_time.minute * 60 + end_time.second
+        if end < start:
+            return None
+        if end == start:
+            return NumericRange(empty=True)
+        return NumericRange(start, end)
+
     @staticmethod
-    def clean_dates(values, instance=None):
+    def clean_dates(values, instance=None, check_overlap=True):
         errors = OrderedDict()
         start_time = values.get('start_time', getattr(instance, 'start_time', None))
         end_time = values.get('end_time', getattr(instance, 'end_time', None))
         date = values.get('date', getattr(instance, 'date', None))
-        user = values.get('user',getattr(instance, 'date', None))
+        user = values.get('user', getattr(instance, 'user', None))
         if end_time and start_time > end_time:
             errors['end_time'] = gettext('start_time must be less than end_time')
+            return errors
+        if not check_overlap:
+            return errors
 
-        time_check = models.Q(
-            start_time__lt=start_time,
-            end_time__gt=start_time
+        time_range = TimeEntry.get_time_range(start_time, end_time)
+        if time_range is None or time_range.isempty:
+            return errors
+        # single probe of the exclusion constraint's GiST index
+        queryset = TimeEntry.objects.filter(
+            user=user,
+            date=date,
+            time_range__overlap=time_range,
         )
-        # provided the end_time
-        if end_time:
-            time_check |= models.Q(
-                start_time__lt=end_time,
-                end_time__gt=end_time
+        if instance is not None and instance.pk:
+            queryset = queryset.exclude(pk=instance.pk)
+        if queryset.exists():
+            errors['date'] = TimeEntry.overlap_error()
+
+        return errors
+
+    @staticmethod
+    def clean_bulk_dates(values_list):
+        """
+        Overlap check for a batch of entries, against each other and
+        against the stored entries of the same (user, date).
+        Returns errors for each item of the batch.
+        """
+        errors = [OrderedDict() for _ in values_list]
+        # (user, date) -> [(start, end, position in batch or None)]
+        intervals = defaultdict(list)
+        updated_ids = set()
+        for pos, values in enumerate(values_list):
+            if values.get('id'):
+                updated_ids.add(values['id'])
+            user = values.get('user')
+            time_range = TimeEntry.get_time_range(values['start_time'], values.get('end_time'))
+            if user is None or time_range is None or time_range.isempty:
+                continue
+            intervals[(getattr(user, 'pk', user), values['date'])].append(
+                (time_range.lower, time_range.upper, pos)
             )
-        if TimeEntry.objects.filter(
-                time_check,
-                date=date,
-                user=user,
-                ).exists():
-            errors['date'] = gettext('This time entry overlaps with another '
-                                     'for this day')
+        if not intervals:
+            return errors
 
+        stored_entries = TimeEntry.objects.filter(
+            reduce(or_, (models.Q(user=user, date=date) for user, date in intervals)),
+            time_range__isnull=False,
+        ).exclude(id__in=updated_ids).values_list('user', 'date', 'time_range')
+        for user, date, time_range in stored_entries:
+            if not time_range.isempty:
+                intervals[(user, date)].append((time_range.lower, time_range.upper, None))
+
+        for items in intervals.values():
+            items.sort(key=lambda item: item[:2])
+            last_end, last_pos = None, None
+            for start, end, pos in items:
+                if last_end is not None and start < last_end:
+                    for overlapping in (pos, last_pos):
+                        if overlapping is not None:
+                            errors[overlapping]['date'] = TimeEntry.overlap_error()
+                if last_end is None or end > last_end:
+                    last_end, last_pos = end, pos
         return errors
 
+    @staticmethod
+    def overlap_error():
+        return gettext('This time entry overlaps with another '
+                       'for this day')
+
+    @staticmethod
+    def running_timer_error():
+        return gettext('A timer is already running')
+
     @property
     def duration(self):
         if not self.end_time:
-            return 0
+            # a running timer, up to now
+            return max(local_now() - datetime.combine(self.date, self.start_time), timedelta())
         end_datetime = datetime.combine(self.date, self.end_time)
         start_datetime = datetime.combine(self.date, self.start_time)
         difference = end_datetime - start_datetime
         return difference
+
+    @staticmethod
+    def running_timer(user):
+        return TimeEntry.objects.filter(user=user, end_time__isnull=True).first()
+
+    @staticmethod
+    def start_timer(user, task, description=''):
+        """
+        Open an entry starting now, it runs until stop_timer
+        """
+        now = local_now()
+        entry = TimeEntry(
+            user=user,
+            task=task,
+            description=description,
+            date=now.date(),
+            start_time=now.time(),
+        )
+        entry.save()
+        return entry
+
+    def stop_timer(self):
+        """
+        Close the running entry now, or where the next entry of the user
+        starts when one was logged while the timer ran. Entries do not span
+        days, a timer running past midnight ends its day at 23:59:59 and
+        goes on in an entry for each following day.
+        """
+        stop = local_now()
+        next_entry = TimeEntry.objects.filter(
+            models.Q(date=self.date, start_time__gt=self.start_time) |
+            models.Q(date__gt=self.date, date__lte=stop.date()),
+            user=self.user_id,
+        ).exclude(pk=self.pk).order_by('date', 'start_time').first()
+        if next_entry is not None:
+            stop = min(stop, datetime.combine(next_entry.date, next_entry.start_time))
+        with transaction.atomic():
+            if stop.date() == self.date:
+                self.end_time = max(stop.time(), self.start_time)
+                self.save()
+                return
+            self.end_time = time.max.replace(microsecond=0)
+            self.save()
+            date = self.date + timedelta(days=1)
+            while date <= stop.date():
+                end_time = stop.time() if date == stop.date() else self.end_time
+                if end_time > time.min:
+                    TimeEntry(
+                        user_id=self.user_id,
+                        task_id=self.task_id,
+                        description=self.description,
+                        date=date,
+                        start_time=time.min,
+                        end_time=end_time,
+                    ).save()
+                date += timedelta(days=1)
+
+
+class DailyTimeSummary(models.Model):
+    """
+    Time spent by a user on a task per day, maintained along with the
+    time entries so aggregates scale with days instead of entries
+    """
+    user = models.ForeignKey(User, on_delete=models.CASCADE)
+    date = models.DateField()
+    task = models.ForeignKey(Task, on_delete=models.CASCADE,
+                             blank=True, null=True)
+    project = models.ForeignKey(Project, on_delete=models.CASCADE,
+                                blank=True, null=True)
+    total_seconds = models.PositiveIntegerField(default=0)
+    entry_count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        unique_together = ('user', 'date', 'task', 'project')
+
+    def __str__(self):
+        return f'{str(self.user)} {str(self.date)} {self.total_seconds}s'
+
+    @staticmethod
+    def summarize(time_entries):
+        """
+        Summary rows, not saved yet, of the given time entries
+        """
+        rows = time_entries.order_by().values(
+            'user', 'date', 'task',
+            project_id=F('task__task_group__project'),
+        ).annotate(
+            duration=Sum('duration_seconds'),
+            count=Count('id'),
+        )
+        for row in rows.iterator():
+            yield DailyTimeSummary(
+                user_id=row['user'],
+                date=row['date'],
+                task_id=row['task'],
+                project_id=row['project_id'],
+                total_seconds=row['duration'] or 0,
+                entry_count=row['count'],
+            )
+
+    @staticmethod
+    def refresh(keys):
+        """
+        Recompute the summary of the given (user_id, date) pairs
+        """
+        keys = {key for key in keys if key and key[0] is not None}
+        if not keys:
+            return
+        query = reduce(or_, (models.Q(user=user, date=date) for user, date in keys))
+        with transaction.atomic():
+            # serialize concurrent refreshes of the same user
+            list(User.objects.select_for_update().filter(
+                pk__in={user for user, _ in keys}
+            ).order_by('pk').values_list('pk', flat=True))
+            previous = DailyTimeSummary.objects.filter(query)
+            invalidate_summaries(previous)
+            previous.delete()
+            summaries = DailyTimeSummary.objects.bulk_create(
+                DailyTimeSummary.summarize(TimeEntry.objects.filter(query, user__isnull=False))
+            )
+            invalidate_users({user for user, _ in keys})
+            invalidate_projects({summary.project_id for summary in summaries})
+
+    @staticmethod
+    def rebuild(batch_size=5000):
+        """
+        Recompute the whole summary from the time entries
+        """
+        with transaction.atomic():
+            DailyTimeSummary.objects.all().delete()
+            batch = []
+            for summary in DailyTimeSummary.summarize(TimeEntry.objects.filter(user__isnull=False)):
+                batch.append(summary)
+                if len(batch) >= batch_size:
+                    DailyTimeSummary.objects.bulk_create(batch)
+                    batch = []
+            DailyTimeSummary.objects.bulk_create(batch)
+            invalidate_users(User.objects.values_list('pk', flat=True))
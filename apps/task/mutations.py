@@ -1,6 +1,8 @@
+from django.db import IntegrityError, transaction
 from django.utils.translation import gettext
 import graphene
 from graphene_file_upload.scalars import Upload
+from rest_framework import serializers
 
 from task.enums import StatusGrapheneEnum
 from task.models import Task, TaskGroup, TimeEntry
@@ -13,10 +15,17 @@ from task.schema import (
 )
 from task.serializers import (
     TaskSerializer,
+    TaskUpdateSerializer,
     TaskGroupSerializer,
     TimeEntrySerializer,
+    TimeEntryUpsertSerializer,
+)
+from utils.error_types import (
+    ArrayNestedErrorType,
+    CustomErrorType,
+    mutation_is_not_valid,
+    serializer_error_to_error_types,
 )
-from utils.error_types import CustomErrorType, mutation_is_not_valid
 
 
 class TaskCreateInputType(graphene.InputObjectType):
@@ -74,6 +83,27 @@ class TaskGroupUpdateInputType(graphene.InputObjectType):
     project = graphene.ID()
 
 
+class TaskBulkCreateInputType(TaskCreateInputType):
+    """
+    Task Bulk Create Input Type, uuid is used as key for the item errors
+    """
+    uuid = graphene.String()
+
+
+class TaskBulkUpdateInputType(TaskUpdateInputType):
+    """
+    Task Bulk Update Input Type, uuid is used as key for the item errors
+    """
+    uuid = graphene.String()
+
+
+class TaskGroupBulkCreateInputType(TaskGroupCreateInputType):
+    """
+    Task-Group Bulk Create Input Type, uuid is used as key for the item errors
+    """
+    uuid = graphene.String()
+
+
 class TimeEntryCreateInputType(graphene.InputObjectType):
     """
     Time Entry Create Input Type
@@ -98,6 +128,20 @@ class TimeEntryUpdateInputType(graphene.InputObjectType):
     user = graphene.ID()
 
 
+class TimeEntryBulkCreateInputType(TimeEntryCreateInputType):
+    """
+    Time Entry Bulk Create Input Type, uuid is used as key for the item errors
+    """
+    uuid = graphene.String()
+
+
+class TimeEntryUpsertInputType(TimeEntryBulkCreateInputType):
+    """
+    Time Entry Upsert Input Type, entries with id are updated
+    """
+    id = graphene.ID()
+
+
 class CreateTaskGroup(graphene.Mutation):
     class Arguments:
         data = TaskGroupCreateInputType(required=True)
@@ -228,6 +272,84 @@ class DeleteTask(graphene.Mutation):
         return DeleteTask(result=instance, errors=None, ok=True)
 
 
+class CreateTasks(graphene.Mutation):
+    class Arguments:
+        data = graphene.List(graphene.NonNull(TaskBulkCreateInputType), required=True)
+
+    errors = graphene.List(CustomErrorType)
+    ok = graphene.Boolean()
+    result = graphene.List(TaskType)
+
+    @staticmethod
+    def mutate(root, info, data):
+        serializer = TaskSerializer(data=data, many=True)
+        if errors := mutation_is_not_valid(serializer):
+            return CreateTasks(errors=errors, ok=False)
+        instances = serializer.save()
+        return CreateTasks(result=instances, errors=None, ok=True)
+
+
+class UpdateTasks(graphene.Mutation):
+    class Arguments:
+        data = graphene.List(graphene.NonNull(TaskBulkUpdateInputType), required=True)
+
+    errors = graphene.List(CustomErrorType)
+    ok = graphene.Boolean()
+    result = graphene.List(TaskType)
+
+    @staticmethod
+    def mutate(root, info, data):
+        serializer = TaskUpdateSerializer(data=data, many=True, partial=True)
+        if errors := mutation_is_not_valid(serializer):
+            return UpdateTasks(errors=errors, ok=False)
+        instances = serializer.save()
+        return UpdateTasks(result=instances, errors=None, ok=True)
+
+
+class DeleteTasks(graphene.Mutation):
+    class Arguments:
+        ids = graphene.List(graphene.NonNull(graphene.ID), required=True)
+
+    errors = graphene.List(CustomErrorType)
+    ok = graphene.Boolean()
+    result = graphene.List(TaskType)
+
+    @staticmethod
+    def mutate(root, info, ids):
+        ids = list(dict.fromkeys(ids))
+        instances = Task.objects.in_bulk([int(id) for id in ids if id.isdigit()])
+        missing = [id for id in ids if not id.isdigit() or int(id) not in instances]
+        if missing:
+            return DeleteTasks(errors=[
+                CustomErrorType(field='ids', array_errors=[
+                    ArrayNestedErrorType(key=id, object_errors=[
+                        CustomErrorType(field='id', messages=gettext('Task does not exist.'))
+                    ])
+                    for id in missing
+                ])
+            ], ok=False)
+        with transaction.atomic():
+            Task.objects.filter(id__in=instances).delete()
+        return DeleteTasks(result=[instances[int(id)] for id in ids], errors=None, ok=True)
+
+
+class CreateTaskGroups(graphene.Mutation):
+    class Arguments:
+        data = graphene.List(graphene.NonNull(TaskGroupBulkCreateInputType), required=True)
+
+    errors = graphene.List(CustomErrorType)
+    ok = graphene.Boolean()
+    result = graphene.List(TaskGroupType)
+
+    @staticmethod
+    def mutate(root, info, data):
+        serializer = TaskGroupSerializer(data=data, many=True)
+        if errors := mutation_is_not_valid(serializer):
+            return CreateTaskGroups(errors=errors, ok=False)
+        instances = serializer.save()
+        return CreateTaskGroups(result=instances, errors=None, ok=True)
+
+
 class CreateTimeEntry(graphene.Mutation):
     class Arguments:
         data = TimeEntryCreateInputType(required=True)
@@ -241,7 +363,10 @@ class CreateTimeEntry(graphene.Mutation):
         serializer = TimeEntrySerializer(data=data)
         if errors := mutation_is_not_valid(serializer):
             return CreateTimeEntry(errors=errors, ok=False)
-        instance = serializer.save()
+        try:
+            instance = serializer.save()
+        except serializers.ValidationError as e:
+            return CreateTimeEntry(errors=serializer_error_to_error_types(e.detail), ok=False)
         return CreateTimeEntry(result=instance, errors=None, ok=True)
 
 
@@ -267,7 +392,10 @@ class UpdateTimeEntry(graphene.Mutation):
                                          partial=True)
         if errors:= mutation_is_not_valid(serializer):
             return UpdateTimeEntry(errors=errors, ok=False)
-        instance = serializer.save()
+        try:
+            instance = serializer.save()
+        except serializers.ValidationError as e:
+            return UpdateTimeEntry(errors=serializer_error_to_error_types(e.detail), ok=False)
         return UpdateTimeEntry(result=instance, errors=None, ok=True)
 
 
@@ -293,13 +421,128 @@ class DeleteTimeEntry(graphene.Mutation):
         return DeleteTimeEntry(result=instance, errors=None, ok=True)
 
 
+def timer_integrity_error(error):
+    """
+    Errors of a timer write refused by a constraint of the time entries
+    """
+    if TimeEntry.RUNNING_TIMER_CONSTRAINT in str(error):
+        message = TimeEntry.running_timer_error()
+    elif TimeEntry.OVERLAP_CONSTRAINT in str(error):
+        message = TimeEntry.overlap_error()
+    else:
+        raise error
+    return [CustomErrorType(field='nonFieldErrors', messages=message)]
+
+
+class StartTimer(graphene.Mutation):
+    class Arguments:
+        task = graphene.ID(required=True)
+        description = graphene.String()
+
+    errors = graphene.List(CustomErrorType)
+    ok = graphene.Boolean()
+    result = graphene.Field(TimeEntryType)
+
+    @staticmethod
+    def mutate(root, info, task, description=''):
+        user = info.context.user
+        if not user.is_authenticated:
+            return StartTimer(errors=[
+                CustomErrorType(field='nonFieldErrors',
+                                messages=gettext('Authentication required'))
+            ], ok=False)
+        instance = Task.objects.filter(id=task).first()
+        if instance is None:
+            return StartTimer(errors=[
+                CustomErrorType(field='task', messages=gettext('Task does not exist.'))
+            ], ok=False)
+        if TimeEntry.running_timer(user):
+            return StartTimer(errors=[
+                CustomErrorType(field='nonFieldErrors', messages=TimeEntry.running_timer_error())
+            ], ok=False)
+        # the checks can race with another start, the constraints have the final say
+        try:
+            entry = TimeEntry.start_timer(user, instance, description or '')
+        except IntegrityError as e:
+            return StartTimer(errors=timer_integrity_error(e), ok=False)
+        return StartTimer(result=entry, errors=None, ok=True)
+
+
+class StopTimer(graphene.Mutation):
+    errors = graphene.List(CustomErrorType)
+    ok = graphene.Boolean()
+    result = graphene.Field(TimeEntryType)
+
+    @staticmethod
+    def mutate(root, info):
+        user = info.context.user
+        entry = TimeEntry.running_timer(user) if user.is_authenticated else None
+        if entry is None:
+            return StopTimer(errors=[
+                CustomErrorType(field='nonFieldErrors', messages=gettext('No timer is running'))
+            ], ok=False)
+        try:
+            entry.stop_timer()
+        except IntegrityError as e:
+            return StopTimer(errors=timer_integrity_error(e), ok=False)
+        return StopTimer(result=entry, errors=None, ok=True)
+
+
+class CreateTimeEntries(graphene.Mutation):
+    class Arguments:
+        data = graphene.List(graphene.NonNull(TimeEntryBulkCreateInputType), required=True)
+
+    errors = graphene.List(CustomErrorType)
+    ok = graphene.Boolean()
+    result = graphene.List(TimeEntryType)
+
+    @staticmethod
+    def mutate(root, info, data):
+        serializer = TimeEntrySerializer(data=data, many=True)
+        if errors := mutation_is_not_valid(serializer):
+            return CreateTimeEntries(errors=errors, ok=False)
+        try:
+            instances = serializer.save()
+        except serializers.ValidationError as e:
+            return CreateTimeEntries(errors=serializer_error_to_error_types(e.detail), ok=False)
+        return CreateTimeEntries(result=instances, errors=None, ok=True)
+
+
+class UpsertTimeEntries(graphene.Mutation):
+    class Arguments:
+        data = graphene.List(graphene.NonNull(TimeEntryUpsertInputType), required=True)
+
+    errors = graphene.List(CustomErrorType)
+    ok = graphene.Boolean()
+    result = graphene.List(TimeEntryType)
+
+    @staticmethod
+    def mutate(root, info, data):
+        serializer = TimeEntryUpsertSerializer(data=data, many=True)
+        if errors := mutation_is_not_valid(serializer):
+            return UpsertTimeEntries(errors=errors, ok=False)
+        try:
+            instances = serializer.save()
+        except serializers.ValidationError as e:
+            return UpsertTimeEntries(errors=serializer_error_to_error_types(e.detail), ok=False)
+        return UpsertTimeEntries(result=instances, errors=None, ok=True)
+
+
 class Mutation(object):
     create_task = CreateTask.Field()
     update_task = UpdateTask.Field()
     delete_task = DeleteTask.Field()
+    create_tasks = CreateTasks.Field()
+    update_tasks = UpdateTasks.Field()
+    delete_tasks = DeleteTasks.Field()
     create_taskGroup = CreateTaskGroup.Field()
     update_taskGroup = UpdateTaskGroup.Field()
     delete_taskGroup = DeleteTaskGroup.Field()
+    create_task_groups = CreateTaskGroups.Field()
     create_timeEntry = CreateTimeEntry.Field()
     update_timeEntry = UpdateTimeEntry.Field()
     delete_timeEntry = DeleteTimeEntry.Field()
+    create_time_entries = CreateTimeEntries.Field()
+    upsert_time_entries = UpsertTimeEntries.Field()
+    start_timer = StartTimer.Field()
+    stop_timer = StopTimer.Field()
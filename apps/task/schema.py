@@ -6,32 +6,58 @@ from django.utils.timezone import now
 
 import graphene
 from graphene_django import DjangoObjectType
-from graphene_django_extras import (
-    DjangoObjectField,
-    DjangoObjectType,
-    DjangoFilterListField,
-)
+from graphene_django_extras import DjangoObjectType
 #from graphene_django_extras.paginations import LimitOffsetGraphqlPagination
 
 from user.schema import UserType
+from usergroup.models import GroupMember, UserGroup
 from usergroup.schema import UserGroupType
-from task.models import TaskGroup, Task, TimeEntry
-from task.enums import StatusGrapheneEnum
+from task.models import TaskGroup, Task, TimeEntry, DailyTimeSummary
+from task.cache import get_cached_result
+from task.dashboard import Dashboard, seconds_to_duration
+from task.dataloaders import TimeEntriesByDateLoader
+from task.enums import SearchTypeGrapheneEnum, StatusGrapheneEnum
 from task.filters import TaskFilter, TaskGroupFilter, TimeEntryFilter
-from project.models import Project
+from task.search import search
+from utils.dataloaders import get_dataloader
+from utils.optimizer import OptimizedObjectField, optimize, resolver_hints
+from utils.pagination import KeysetFilterListField, page_size
+
+
+def daily_durations(summary):
+    """
+    Total duration for each day of the summary rows
+    """
+    rows = summary.values('date').order_by('date').annotate(
+        duration=Sum('total_seconds'),
+    ).values('date', 'duration')
+    return [
+        dict(row, duration=seconds_to_duration(row['duration']))
+        for row in rows
+    ]
+
+
+def total_duration(summary):
+    return seconds_to_duration(
+        summary.aggregate(total=Sum('total_seconds'))['total']
+    )
 
 
 class TaskGroupType(DjangoObjectType):
     class Meta:
         model = TaskGroup
+        exclude_fields = ('search_vector',)
         fields = '__all__'
 
     status = graphene.Field(StatusGrapheneEnum)
 
 
 class TaskGroupListType(DjangoObjectType):
+    cursor = graphene.String()
+
     class Meta:
         model = TaskGroup
+        exclude_fields = ('search_vector',)
         filterset_class = TaskGroupFilter
 
 
@@ -39,29 +65,45 @@ class TaskType(DjangoObjectType):
 
     class Meta:
         model = Task
+        exclude_fields = ('search_vector',)
         fields = '__all__'
 
 
 class TaskListType(DjangoObjectType):
+    cursor = graphene.String()
+
     class Meta:
         model = Task
+        exclude_fields = ('search_vector',)
         filterset_class = TaskFilter
 
 
+@resolver_hints(only=('date', 'start_time', 'end_time', 'duration_seconds'))
+def resolve_time_entry_duration(root, info):
+    # a running timer counts up to now
+    if root.end_time is None:
+        return root.duration
+    # read from the stored column instead of combining the times
+    return seconds_to_duration(root.duration_seconds)
+
+
 class TimeEntryType(DjangoObjectType):
-    duration = graphene.String()
+    duration = graphene.String(resolver=resolve_time_entry_duration)
     day_total = graphene.String()
 
     class Meta:
         model = TimeEntry
+        exclude_fields = ('search_vector',)
         fields = '__all__'
 
 
 class TimeEntryTypeList(DjangoObjectType):
-    duration = graphene.String()
+    duration = graphene.String(resolver=resolve_time_entry_duration)
+    cursor = graphene.String()
 
     class Meta:
         model = TimeEntry
+        exclude_fields = ('search_vector',)
         filterset_class = TimeEntryFilter
 
 
@@ -71,13 +113,10 @@ class SummaryDay(graphene.ObjectType):
     task_list = graphene.List(TimeEntryType)
 
     def resolve_task_list(root, info, **kwargs):
-        date = root.get('date', None)
-        user = info.context.user
-        queryset = TimeEntry.objects.filter(
-                user=user,
-                date=date
-        )
-        return queryset
+        # entries of every day in the response are loaded at once
+        return get_dataloader(
+            info, TimeEntriesByDateLoader, info.context.user.pk
+        ).load(root.get('date', None))
 
 
 class ProjectDetail(graphene.ObjectType):
@@ -93,6 +132,13 @@ class DashBoardMyProject(graphene.ObjectType):
     hours_spent = graphene.String()
 
 
+class SearchResultType(graphene.ObjectType):
+    id = graphene.ID()
+    type = SearchTypeGrapheneEnum()
+    label = graphene.String()
+    rank = graphene.Float()
+
+
 class SummaryWeekType(graphene.ObjectType):
     total_hours_weekly = graphene.String()
     total_hours_day = graphene.List(SummaryDay)
@@ -124,125 +170,60 @@ class DashBoardType(graphene.ObjectType):
     most_active_project = graphene.Field(SummaryMostActiveProject)
     my_project = graphene.List(DashBoardMyProject)
 
-    def resolve_this_week(root, info, *args, **kwargs):
-        date = datetime.date.today()
-        start_week = date - datetime.timedelta(date.weekday())
-        end_week = start_week + datetime.timedelta(6)
-        user = info.context.user
-        queryset = TimeEntry.objects.filter(
-            user=info.context.user,
-            date__range=[start_week, end_week]
-        ).order_by().values('date')
-        if user.is_authenticated:
-            # week total duration
-            hours_week = queryset.annotate(
-                duration=F('end_time') - F('start_time'),
-            ).aggregate(sum=Sum('duration'))['sum']
+    # every section reads its slice of the dashboard computed once per request
 
-            hours_day = queryset.annotate(
-                duration=Sum(F('end_time') - F('start_time'))
-            )
-            return SummaryWeekDashBoard(
-                total_hours=hours_week,
-                total_hours_day=hours_day
-            )
-        else:
-            return None
+    def resolve_this_week(root, info, *args, **kwargs):
+        if dashboard := Dashboard.for_request(info):
+            return SummaryWeekDashBoard(**dashboard.this_week)
+        return None
 
     def resolve_hours_by_project(root, info, *args, **kwargs):
-        user = info.context.user
-        if not user:
-            return None
-        else:
-            # get the project for the user
-            projects = Project.get_for(user)
-            queryset = TimeEntry.objects.filter(
-                user=user,
-                task__task_group__project__in=projects
-            )
-            total_project_hours = queryset.annotate(
-                duration=F('end_time') - F('start_time'),
-            ).aggregate(sum=Sum('duration'))['sum']
-
-            each_project_hours = queryset.order_by().values('task__task_group__project').annotate(
-                duration=Sum(F('end_time') - F('start_time')),
-            ).values('duration', project_name=F('task__task_group__project__title'))
-
-            return SummaryProjectDashBoard(
-                project_total=total_project_hours,
-                project_particular=each_project_hours
-            )
+        if dashboard := Dashboard.for_request(info):
+            return SummaryProjectDashBoard(**dashboard.hours_by_project)
+        return None
 
     def resolve_most_active_project(root, info, *args, **kwargs):
-        # gives the most active project in the week
-        date = datetime.date.today()
-        start_week = date - datetime.timedelta(date.weekday())
-        end_week = start_week + datetime.timedelta(6)
-        user = info.context.user
-        if not user:
-            return None
-        else:
-            # get the project for the user
-            projects = Project.get_for(user)
-            queryset = TimeEntry.objects.filter(
-                user=user,
-                task__task_group__project__in=projects,
-                date__lte=end_week,
-                date__gte=start_week
-            )
-            total_project_hours = queryset.annotate(
-                duration=F('end_time') - F('start_time'),
-            ).aggregate(sum=Sum('duration'))['sum']
-
-            each_project_hours = queryset.order_by().values('task__task_group__project').annotate(
-                duration=Sum(F('end_time') - F('start_time')),
-            ).values('duration', project_name=F('task__task_group__project__title'))
-
-            return SummaryMostActiveProject(
-                project_total=total_project_hours,
-                project_particular=each_project_hours
-            )
+        if dashboard := Dashboard.for_request(info):
+            return SummaryMostActiveProject(**dashboard.most_active_project)
+        return None
 
     def resolve_my_project(root, info, *args, **kwargs):
-        user = info.context.user
-        if not user:
-            return None
-        else:
-            # get the projects for the user
-            projects = Project.get_for(user=user)
-            queryset = TimeEntry.objects.filter(
-                task__task_group__project__in=projects
-            ).order_by('task__task_group__project').values('task__task_group__project').annotate(
-                duration=Sum(F('end_time') - F('start_time'))
-            ).values(
-                hours_spent=F('duration'),
-                project_name=F('task__task_group__project__title'),
-                client_name=F('task__task_group__project__client__name'),
-                edited_on=F('task__task_group__project__modified_at'),
-                status=F('task__task_group__status')
-                )
-            return queryset
+        if dashboard := Dashboard.for_request(info):
+            return dashboard.my_project
+        return None
 
 
 class Query(object):
     taskgroup = graphene.Field(TaskGroupType)
-    taskgroup_list = DjangoFilterListField(TaskGroupListType)
-    task = DjangoObjectField(TaskType)
+    taskgroup_list = KeysetFilterListField(TaskGroupListType)
+    task = OptimizedObjectField(TaskType)
     task_user = graphene.List(TaskType)
-    task_list = DjangoFilterListField(TaskListType)
-    timeentry = DjangoObjectField(TimeEntryType)
+    task_list = KeysetFilterListField(TaskListType)
+    timeentry = OptimizedObjectField(TimeEntryType)
+    timeentry_list = KeysetFilterListField(
+        TimeEntryTypeList,
+        ordering=('date', 'start_time', 'id'),
+        scope=TimeEntry.get_for,
+    )
     summary_weekly = graphene.Field(SummaryWeekType)
     summary_monthly = graphene.Field(SummaryMonthType)
     dashboard = graphene.Field(DashBoardType)
+    running_timers = graphene.List(TimeEntryType, group=graphene.ID(required=True))
+    search = graphene.List(
+        SearchResultType,
+        query=graphene.String(required=True),
+        types=graphene.List(graphene.NonNull(SearchTypeGrapheneEnum)),
+        first=graphene.Int(default_value=20),
+    )
 
     def resolve_task_user(root, info):
         user = info.context.user
         if not user:
             return None
         else:
-            return Task.objects.filter(
+            return optimize(Task.objects.filter(
                 user=user,
-            )
+            ), info)
 
     def resolve_summary_weekly(root, info, **kwargs):
         date = datetime.date.today()
@@ -250,27 +231,17 @@ class Query(object):
         end_week = start_week + datetime.timedelta(6)
         user = info.context.user
         if user.is_authenticated:
-            # week total duration
-            hours_week = TimeEntry.objects.filter(
+            summary = DailyTimeSummary.objects.filter(
                 user=user,
                 date__range=[start_week, end_week]
-            ).order_by().values('date').annotate(
-                duration=F('end_time') - F('start_time'),
-            ).aggregate(
-                total_duration=Sum(F('duration'))
-            )['total_duration']
-
-            # day total_duration
-            hours_day = TimeEntry.objects.filter(
-                user=user,
-                date__range=[start_week, end_week]
-            ).values('date').order_by('date').annotate(
-                duration=Sum(F('end_time') - F('start_time'))
-            ).values('date', 'duration')
-
+            )
+            total, days = get_cached_result(
+                user, 'summary_weekly', start_week.isoformat(),
+                lambda: (total_duration(summary), daily_durations(summary)),
+            )
             return SummaryWeekType(
-                total_hours_weekly=hours_week,
-                total_hours_day=hours_day,
+                total_hours_weekly=total,
+                total_hours_day=days,
             )
         else:
             return None
@@ -281,33 +252,40 @@ class Query(object):
         first_day = date + relativedelta(day=1)
         user = info.context.user
         if user.is_authenticated:
-
-            # monthly total_duration
-            hours_monthly = TimeEntry.objects.filter(
-                user=user,
-                date__gte=first_day,
-                date__lte=last_day,
-            ).values('date').order_by().annotate(
-                duration=F('end_time') - F('start_time'),
-            ).aggregate(
-                total_duration=Sum(F('duration'))
-            )['total_duration']
-
-            # day total_duration
-            hours_day = TimeEntry.objects.filter(
+            summary = DailyTimeSummary.objects.filter(
                 user=user,
                 date__gte=first_day,
                 date__lte=last_day,
-            ).values('date').order_by('date').annotate(
-                duration=Sum(F('end_time') - F('start_time'))
-            ).values('date', 'duration')
-
+            )
+            total, days = get_cached_result(
+                user, 'summary_monthly', first_day.isoformat(),
+                lambda: (total_duration(summary), daily_durations(summary)),
+            )
             return SummaryMonthType(
-                total_hours_monthly=hours_monthly,
-                total_hours_day=hours_day
+                total_hours_monthly=total,
+                total_hours_day=days
             )
         else:
             return None
 
     def resolve_dashboard(root, info, **kwargs):
+        # computed here so it overlaps with the other top-level fields
+        Dashboard.for_request(info)
         return DashBoardType()
+
+    def resolve_running_timers(root, info, group):
+        user = info.context.user
+        if not user.is_authenticated or not UserGroup.get_for(user).filter(pk=group).exists():
+            return None
+        # the open entries of the members, read from the partial index of the
+        # running timers however long their history is
+        return optimize(TimeEntry.objects.filter(
+            end_time__isnull=True,
+            user__in=GroupMember.objects.filter(group=group).values('member'),
+        ).order_by('date', 'start_time'), info)
+
+    def resolve_search(root, info, query, types=None, first=20):
+        user = info.context.user
+        if not user.is_authenticated:
+            return None
+        return search(user, query, types, page_size(first))
@@ -0,0 +1,48 @@
+from django.contrib.postgres.search import SearchQuery, SearchRank
+from django.db.models import CharField, F, Q, Value
+
+from project.models import Project
+from task.models import Task, TaskGroup, TimeEntry
+
+SEARCH_CONFIG = 'english'
+
+SEARCH_TYPES = ('project', 'task_group', 'task', 'time_entry')
+
+
+def get_searchable(user):
+    """
+    Querysets searched for each type, limited to what the user can access,
+    and the field labelling a result
+    """
+    project_ids = Project.get_ids_for(user)
+    return {
+        'project': (Project.objects.filter(id__in=project_ids), 'title'),
+        'task_group': (TaskGroup.objects.filter(project__in=project_ids), 'title'),
+        'task': (Task.objects.filter(
+            Q(task_group__project__in=project_ids) | Q(user=user)
+        ), 'title'),
+        'time_entry': (TimeEntry.objects.filter(
+            Q(task__task_group__project__in=project_ids) | Q(user=user)
+        ), 'description'),
+    }
+
+
+def search(user, query, types=None, first=20):
+    """
+    Results of every type matching the query, most relevant first,
+    ranked and limited by a single UNION ALL query
+    """
+    search_query = SearchQuery(query, config=SEARCH_CONFIG)
+    searchable = get_searchable(user)
+    results = [
+        queryset.filter(search_vector=search_query).annotate(
+            type=Value(name, output_field=CharField()),
+            label=F(label_field),
+            rank=SearchRank(F('search_vector'), search_query),
+        ).values('id', 'type', 'label', 'rank')
+        for name, (queryset, label_field) in searchable.items()
+        if not types or name in types
+    ]
+    if not results:
+        return []
+    return list(results[0].union(*results[1:], all=True).order_by('-rank', 'type', 'id')[:first])
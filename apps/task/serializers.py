@@ -1,22 +1,236 @@
-from collections import OrderedDict
+from collections import OrderedDict, defaultdict
 from datetime import datetime
 
 from django.core.exceptions import ValidationError
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from django.utils.translation import gettext
 from rest_framework import serializers
 
-from .models import Task, TaskGroup, TimeEntry
+from usergroup.scopes import invalidate_groups
+from .models import DailyTimeSummary, Task, TaskGroup, TimeEntry
+
+
+class BulkPrimaryKeyRelatedField(serializers.PrimaryKeyRelatedField):
+    """
+    Looks the object up among those the list serializer loaded for the
+    whole batch, outside of a batch it queries as usual
+    """
+
+    def to_internal_value(self, data):
+        related_objects = getattr(self.root, 'related_objects', None)
+        if related_objects is None:
+            return super().to_internal_value(data)
+        model = self.get_queryset().model
+        try:
+            pk = model._meta.pk.to_python(data)
+        except (TypeError, ValueError, ValidationError):
+            self.fail('incorrect_type', data_type=type(data).__name__)
+        try:
+            return related_objects[model][pk]
+        except KeyError:
+            self.fail('does_not_exist', pk_value=data)
+
+
+class BulkListSerializer(serializers.ListSerializer):
+    """
+    Loads the related objects of the whole batch with one IN query per
+    related model before the items are validated
+    """
+
+    def related_fields(self):
+        for field in self.child.fields.values():
+            relation = getattr(field, 'child_relation', field)
+            if not field.read_only and isinstance(relation, BulkPrimaryKeyRelatedField):
+                yield field, relation.get_queryset().model
+
+    def load_related_objects(self, data):
+        pks = defaultdict(set)
+        for field, model in self.related_fields():
+            model_pks = pks[model]
+            for item in data:
+                values = item.get(field.field_name) if isinstance(item, dict) else None
+                if not isinstance(values, list):
+                    values = [values]
+                for value in values:
+                    try:
+                        model_pks.add(model._meta.pk.to_python(value))
+                    except (TypeError, ValueError, ValidationError):
+                        # reported by the field
+                        pass
+            model_pks.discard(None)
+        return {model: model._default_manager.in_bulk(model_pks) for model, model_pks in pks.items()}
+
+    def to_internal_value(self, data):
+        if isinstance(data, list):
+            self.related_objects = self.load_related_objects(data)
+        return super().to_internal_value(data)
+
+    def save(self, **kwargs):
+        with transaction.atomic():
+            return super().save(**kwargs)
+
+
+class TaskListSerializer(BulkListSerializer):
+    """
+    Creates a batch of tasks with bulk queries, items with an id update
+    the existing task
+    """
+
+    def to_internal_value(self, data):
+        validated_data = super().to_internal_value(data)
+        ids = [attrs['id'] for attrs in validated_data if attrs.get('id')]
+        self.existing_tasks = Task.objects.in_bulk(ids)
+        errors = [
+            {'id': [gettext('Task does not exist.')]}
+            if attrs.get('id') and attrs['id'] not in self.existing_tasks else {}
+            for attrs in validated_data
+        ]
+        if any(errors):
+            raise serializers.ValidationError(errors)
+        return validated_data
+
+    def create(self, validated_data):
+        now = timezone.now()
+        tasks, new_tasks, updated_tasks, moved_tasks = [], [], [], []
+        updated_fields = {'modified_at'}
+        for attrs in validated_data:
+            attrs = dict(attrs)
+            task = self.existing_tasks.get(attrs.pop('id', None)) or Task()
+            for field, value in attrs.items():
+                setattr(task, field, value)
+            if task.pk:
+                task.modified_at = now
+                updated_fields.update(attrs)
+                updated_tasks.append(task)
+                if 'task_group' in attrs:
+                    moved_tasks.append(task)
+            else:
+                new_tasks.append(task)
+            tasks.append(task)
+
+        Task.objects.bulk_create(new_tasks)
+        if updated_tasks:
+            Task.objects.bulk_update(updated_tasks, fields=sorted(updated_fields))
+        Task.sync_summaries(moved_tasks)
+        return tasks
 
 
 class TaskSerializer(serializers.ModelSerializer):
+    serializer_related_field = BulkPrimaryKeyRelatedField
+
     class Meta:
         model = Task
         fields = '__all__'
+        list_serializer_class = TaskListSerializer
+
+
+class TaskUpdateSerializer(TaskSerializer):
+    id = serializers.IntegerField()
+
+
+class TaskGroupListSerializer(BulkListSerializer):
+    """
+    Creates a batch of task groups with bulk queries, the users and user
+    groups with one insert per many to many table
+    """
+
+    def create(self, validated_data):
+        many_to_many = ('users', 'user_group')
+        task_groups = []
+        for attrs in validated_data:
+            task_groups.append(TaskGroup(**{
+                field: value for field, value in attrs.items() if field not in many_to_many
+            }))
+        TaskGroup.objects.bulk_create(task_groups)
+
+        for field in many_to_many:
+            descriptor = getattr(TaskGroup, field)
+            Through = descriptor.through
+            Through.objects.bulk_create([
+                Through(**{
+                    descriptor.field.m2m_field_name(): task_group,
+                    descriptor.field.m2m_reverse_field_name(): related,
+                })
+                for task_group, attrs in zip(task_groups, validated_data)
+                for related in dict.fromkeys(attrs.get(field, []))
+            ])
+        # the m2m_changed signal is not sent by the bulk insert
+        invalidate_groups({
+            user_group.pk for attrs in validated_data for user_group in attrs.get('user_group', [])
+        })
+        return task_groups
 
 
 class TaskGroupSerializer(serializers.ModelSerializer):
+    serializer_related_field = BulkPrimaryKeyRelatedField
+
     class Meta:
         model = TaskGroup
         fields = '__all__'
+        list_serializer_class = TaskGroupListSerializer
+
+
+class TimeEntryListSerializer(serializers.ListSerializer):
+    """
+    Validates a batch of time entries in a single pass and writes them
+    with bulk queries. Items with an id update the existing entry.
+    """
+
+    def to_internal_value(self, data):
+        validated_data = super().to_internal_value(data)
+        errors = TimeEntry.clean_bulk_dates(validated_data)
+
+        ids = [attrs['id'] for attrs in validated_data if attrs.get('id')]
+        self.existing_entries = TimeEntry.objects.in_bulk(ids)
+        for pos, attrs in enumerate(validated_data):
+            if attrs.get('id') and attrs['id'] not in self.existing_entries:
+                errors[pos]['id'] = gettext('TimeEntry does not exist.')
+
+        if any(errors):
+            raise serializers.ValidationError(errors)
+        return validated_data
+
+    def create(self, validated_data):
+        now = timezone.now()
+        entries, new_entries, updated_entries = [], [], []
+        summary_keys = set()
+        for attrs in validated_data:
+            attrs = dict(attrs)
+            entry = self.existing_entries.get(attrs.pop('id', None)) or TimeEntry()
+            for field, value in attrs.items():
+                setattr(entry, field, value)
+            summary_keys.update(entry.summary_keys)
+            entry.update_time_fields()
+            if entry.pk:
+                entry.modified_at = now
+                updated_entries.append(entry)
+            else:
+                new_entries.append(entry)
+            entries.append(entry)
+
+        TimeEntry.objects.bulk_create(new_entries)
+        TimeEntry.objects.bulk_update(updated_entries, fields=[
+            'description', 'date', 'start_time', 'end_time', 'time_range',
+            'duration_seconds', 'task', 'user', 'modified_at',
+        ])
+        DailyTimeSummary.refresh(summary_keys)
+        return entries
+
+    def save(self, **kwargs):
+        try:
+            with transaction.atomic():
+                return super().save(**kwargs)
+        except IntegrityError as e:
+            if TimeEntry.RUNNING_TIMER_CONSTRAINT in str(e):
+                raise serializers.ValidationError({
+                    'non_field_errors': [TimeEntry.running_timer_error()]
+                })
+            if TimeEntry.OVERLAP_CONSTRAINT not in str(e):
+                raise
+            raise serializers.ValidationError({
+                'non_field_errors': [TimeEntry.overlap_error()]
+            })
 
 
 class TimeEntrySerializer(serializers.ModelSerializer):
@@ -24,10 +238,36 @@ class TimeEntrySerializer(serializers.ModelSerializer):
     class Meta:
         model = TimeEntry
         fields = '__all__'
+        list_serializer_class = TimeEntryListSerializer
 
     def validate(self, attrs):
         errors = OrderedDict()
-        errors.update(TimeEntry.clean_dates(attrs, self.instance))
+        # a batch is checked for overlaps at once by the list serializer
+        in_batch = isinstance(self.parent, serializers.ListSerializer)
+        errors.update(TimeEntry.clean_dates(attrs, self.instance,
+                                            check_overlap=not in_batch))
         if errors:
             raise ValidationError(errors)
         return attrs
+
+    def save(self, **kwargs):
+        # overlap check in validate can race with a concurrent write,
+        # the exclusion constraint has the final say
+        try:
+            with transaction.atomic():
+                return super().save(**kwargs)
+        except IntegrityError as e:
+            # an entry without end_time while a timer runs
+            if TimeEntry.RUNNING_TIMER_CONSTRAINT in str(e):
+                raise serializers.ValidationError({
+                    'end_time': [TimeEntry.running_timer_error()]
+                })
+            if TimeEntry.OVERLAP_CONSTRAINT not in str(e):
+                raise
+            raise serializers.ValidationError({
+                'date': [TimeEntry.overlap_error()]
+            })
+
+
+class TimeEntryUpsertSerializer(TimeEntrySerializer):
+    id = serializers.IntegerField(required=False)
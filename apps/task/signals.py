@@ -0,0 +1,33 @@
+from django.db.models.signals import m2m_changed, post_save, pre_delete
+from django.dispatch import receiver
+
+from project.models import Client, Project
+from task.cache import invalidate_projects, invalidate_summaries
+from task.models import DailyTimeSummary, Task, TaskGroup
+from usergroup.scopes import group_access_changed
+
+
+@receiver(m2m_changed, sender=TaskGroup.user_group.through)
+def task_group_user_group_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    group_access_changed(instance, action, reverse, pk_set, 'user_group')
+
+
+@receiver(post_save, sender=Project)
+@receiver(pre_delete, sender=Project)
+def project_changed(sender, instance, **kwargs):
+    invalidate_projects([instance.pk])
+
+
+@receiver(post_save, sender=Client)
+def client_changed(sender, instance, **kwargs):
+    invalidate_projects(instance.project_set.values_list('pk', flat=True))
+
+
+@receiver(pre_delete, sender=Task)
+def task_deleted(sender, instance, **kwargs):
+    invalidate_summaries(DailyTimeSummary.objects.filter(task=instance))
+
+
+@receiver(pre_delete, sender=TaskGroup)
+def task_group_deleted(sender, instance, **kwargs):
+    invalidate_summaries(DailyTimeSummary.objects.filter(task__task_group=instance))
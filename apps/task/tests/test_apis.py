@@ -1,6 +1,11 @@
 import json
 from datetime import datetime, timedelta, time
 
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from mock import patch
+
+from task.models import Task, TaskGroup, TimeEntry
 
 from utils.tests import ChronoGraphQLTestCase
 from utils.factories import (
@@ -167,6 +172,181 @@ class TestDeleteTask(ChronoGraphQLTestCase):
                          self.task.id)
 
 
+class TasksBulk(ChronoGraphQLTestCase):
+    def setUp(self):
+        self.user = UserFactory.create()
+        self.task_group = TaskGroupFactory.create()
+        self.create_mutation = '''mutation CreateTasks($input: [TaskBulkCreateInputType!]!){
+            createTasks(data: $input){
+                errors {
+                    field
+                    messages
+                    arrayErrors {
+                        key
+                        objectErrors {
+                            field
+                            messages
+                        }
+                    }
+                }
+                result {
+                    id
+                    title
+                    user {
+                        id
+                    }
+                }
+                ok
+            }
+        }'''
+        self.update_mutation = '''mutation UpdateTasks($input: [TaskBulkUpdateInputType!]!){
+            updateTasks(data: $input){
+                errors {
+                    field
+                    messages
+                    arrayErrors {
+                        key
+                        objectErrors {
+                            field
+                            messages
+                        }
+                    }
+                }
+                result {
+                    id
+                    title
+                }
+                ok
+            }
+        }'''
+        self.delete_mutation = '''mutation DeleteTasks($ids: [ID!]!){
+            deleteTasks(ids: $ids){
+                errors {
+                    field
+                    arrayErrors {
+                        key
+                    }
+                }
+                result {
+                    id
+                    title
+                }
+                ok
+            }
+        }'''
+
+    def get_input(self, count):
+        return [
+            {
+                "uuid": str(i),
+                "title": f"Task {i}",
+                "taskGroup": self.task_group.id,
+                "user": self.user.id,
+                "createdBy": self.user.id,
+            }
+            for i in range(count)
+        ]
+
+    def test_valid_tasks_creation(self):
+        response = self.query(
+            self.create_mutation,
+            input_data=self.get_input(3),
+        )
+
+        content = json.loads(response.content)
+        self.assertResponseNoErrors(response)
+        self.assertTrue(content['data']['createTasks']['ok'], content)
+        self.assertIsNone(content['data']['createTasks']['errors'], content)
+        self.assertEqual([item['title'] for item in content['data']['createTasks']['result']],
+                         ['Task 0', 'Task 1', 'Task 2'])
+        self.assertEqual(Task.objects.filter(user=self.user).count(), 3)
+
+    def test_tasks_creation_query_count(self):
+        # one IN query per related model, whatever the size of the batch
+        with CaptureQueriesContext(connection) as small:
+            self.query(self.create_mutation, input_data=self.get_input(2))
+        with CaptureQueriesContext(connection) as large:
+            self.query(self.create_mutation, input_data=self.get_input(20))
+        self.assertEqual(len(small), len(large))
+        self.assertEqual(Task.objects.filter(user=self.user).count(), 22)
+
+    def test_invalid_tasks_creation(self):
+        input = self.get_input(3)
+        input[1]['user'] = 0
+        response = self.query(
+            self.create_mutation,
+            input_data=input,
+        )
+
+        content = json.loads(response.content)
+        self.assertFalse(content['data']['createTasks']['ok'], content)
+        array_errors = content['data']['createTasks']['errors'][0]['arrayErrors']
+        self.assertEqual([error['key'] for error in array_errors], ['1'])
+        self.assertEqual(array_errors[0]['objectErrors'][0]['field'], 'user')
+        self.assertFalse(Task.objects.filter(user=self.user).exists())
+
+    def test_valid_tasks_update(self):
+        tasks = TaskFactory.create_batch(2)
+        response = self.query(
+            self.update_mutation,
+            input_data=[
+                {"uuid": "a", "id": tasks[0].id, "title": "Renamed"},
+                {"uuid": "b", "id": tasks[1].id, "taskGroup": self.task_group.id},
+            ],
+        )
+
+        content = json.loads(response.content)
+        self.assertResponseNoErrors(response)
+        self.assertTrue(content['data']['updateTasks']['ok'], content)
+        tasks[0].refresh_from_db()
+        tasks[1].refresh_from_db()
+        self.assertEqual(tasks[0].title, 'Renamed')
+        self.assertEqual(tasks[1].task_group, self.task_group)
+
+    def test_update_missing_task(self):
+        task = TaskFactory.create()
+        response = self.query(
+            self.update_mutation,
+            input_data=[
+                {"uuid": "a", "id": task.id, "title": "Renamed"},
+                {"uuid": "b", "id": task.id + 1000, "title": "Renamed"},
+            ],
+        )
+
+        content = json.loads(response.content)
+        self.assertFalse(content['data']['updateTasks']['ok'], content)
+        array_errors = content['data']['updateTasks']['errors'][0]['arrayErrors']
+        self.assertEqual([error['key'] for error in array_errors], ['b'])
+        task.refresh_from_db()
+        self.assertNotEqual(task.title, 'Renamed')
+
+    def test_valid_tasks_delete(self):
+        tasks = TaskFactory.create_batch(3)
+        response = self.query(
+            self.delete_mutation,
+            variables={'ids': [tasks[0].id, tasks[1].id]},
+        )
+
+        content = json.loads(response.content)
+        self.assertTrue(content['data']['deleteTasks']['ok'], content)
+        self.assertEqual([int(item['id']) for item in content['data']['deleteTasks']['result']],
+                         [tasks[0].id, tasks[1].id])
+        self.assertEqual(list(Task.objects.filter(id__in=[task.id for task in tasks])), [tasks[2]])
+
+    def test_delete_missing_task(self):
+        task = TaskFactory.create()
+        response = self.query(
+            self.delete_mutation,
+            variables={'ids': [task.id, task.id + 1000]},
+        )
+
+        content = json.loads(response.content)
+        self.assertFalse(content['data']['deleteTasks']['ok'], content)
+        self.assertEqual(content['data']['deleteTasks']['errors'][0]['arrayErrors'],
+                         [{'key': str(task.id + 1000)}])
+        self.assertTrue(Task.objects.filter(id=task.id).exists())
+
+
 class TestTaskListQuery(ChronoGraphQLTestCase):
     def setUp(self):
         self.task1_title = 'change the filter'
@@ -174,7 +354,7 @@ class TestTaskListQuery(ChronoGraphQLTestCase):
         self.task2 = TaskFactory.create(title='mock-up design')
         self.qy = '''
             query taskList($title:String, $user: ID, $taskGroup: ID){
-                taskList(titleContains: $title, user: $user, taskGroup: $taskGroup){
+                taskList(titleContains: $title, user: $user, taskGroup: $taskGroup, first: 20){
                     id
                 }
             }
@@ -205,6 +385,123 @@ class TestTaskListQuery(ChronoGraphQLTestCase):
         self.assertResponseNoErrors(response)
         self.assertEqual(int(content['data']['taskList'][0]['id']), output)
 
+    def test_task_list_title_case_insensitive(self):
+        with CaptureQueriesContext(connection) as context:
+            response = self.query(
+                self.qy,
+                variables={"title": 'CHANGE THE'}
+            )
+        content = json.loads(response.content)
+        self.assertResponseNoErrors(response)
+        self.assertEqual([int(task['id']) for task in content['data']['taskList']], [self.task1.id])
+        self.assertIn('ILIKE', context.captured_queries[-1]['sql'])
+
+    def test_task_list_title_similar(self):
+        task3 = TaskFactory.create(title='change the filters')
+        response = self.query(
+            '''
+            query taskList($title:String){
+                taskList(titleSimilar: $title, first: 20){
+                    id
+                }
+            }
+            ''',
+            variables={"title": 'change the filters'}
+        )
+        content = json.loads(response.content)
+        self.assertResponseNoErrors(response)
+        self.assertEqual(
+            [int(task['id']) for task in content['data']['taskList']],
+            [task3.id, self.task1.id]
+        )
+
+
+class TestKeysetPagination(ChronoGraphQLTestCase):
+    def setUp(self):
+        self.user = UserFactory.create()
+        self.force_login(self.user)
+        self.tasks = TaskFactory.create_batch(5, user=self.user)
+        for hour in range(5):
+            TimeEntryFactory.create(
+                date=datetime(2020, 1, 1).date(),
+                start_time=time(10 + hour),
+                end_time=time(10 + hour, 30),
+                user=self.user,
+                task=self.tasks[0],
+            )
+        self.q = '''
+            query taskList($first: Int!, $after: String){
+                taskList(first: $first, after: $after){
+                    id
+                    cursor
+                }
+            }
+        '''
+        self.q1 = '''
+            query timeentryList($first: Int!, $after: String){
+                timeentryList(first: $first, after: $after){
+                    startTime
+                    cursor
+                }
+            }
+        '''
+
+    def test_task_list_pages(self):
+        ids = []
+        after = None
+        for page in range(3):
+            with CaptureQueriesContext(connection) as context:
+                response = self.query(
+                    self.q,
+                    variables={'first': 2, 'after': after}
+                )
+            self.assertResponseNoErrors(response)
+            self.assertFalse([
+                query for query in context.captured_queries if 'COUNT(' in query['sql']
+            ])
+            items = json.loads(response.content)['data']['taskList']
+            ids.extend(int(item['id']) for item in items)
+            after = items[-1]['cursor']
+        self.assertEqual(ids, [task.id for task in self.tasks])
+
+    def test_time_entry_list_pages(self):
+        response = self.query(self.q1, variables={'first': 3})
+        items = json.loads(response.content)['data']['timeentryList']
+        self.assertEqual([item['startTime'] for item in items], ['10:00:00', '11:00:00', '12:00:00'])
+        response = self.query(self.q1, variables={'first': 3, 'after': items[-1]['cursor']})
+        items = json.loads(response.content)['data']['timeentryList']
+        self.assertEqual([item['startTime'] for item in items], ['13:00:00', '14:00:00'])
+
+    def test_time_entry_list_is_scoped(self):
+        project = ProjectFactory.create(
+            user_group=[UserGroupFactory.create(members=[self.user])]
+        )
+        # an entry in a project of the user, and one of another project
+        TimeEntryFactory.create(
+            date=datetime(2020, 1, 1).date(),
+            start_time=time(16),
+            end_time=time(17),
+            user=UserFactory.create(),
+            task=TaskFactory.create(task_group=TaskGroupFactory.create(project=project)),
+        )
+        TimeEntryFactory.create(
+            date=datetime(2020, 1, 1).date(),
+            start_time=time(17),
+            end_time=time(18),
+            user=UserFactory.create(),
+            task=TaskFactory.create(task_group=TaskGroupFactory.create(project=ProjectFactory.create())),
+        )
+        response = self.query(self.q1, variables={'first': 10})
+        items = json.loads(response.content)['data']['timeentryList']
+        self.assertEqual(
+            [item['startTime'] for item in items],
+            ['10:00:00', '11:00:00', '12:00:00', '13:00:00', '14:00:00', '16:00:00'],
+        )
+
+    def test_invalid_cursor(self):
+        response = self.query(self.q, variables={'first': 2, 'after': 'invalid'})
+        self.assertResponseHasErrors(response)
+
 
 """
 Test case for TaskGroup mutations and query
@@ -353,6 +650,93 @@ class TestDeleteTaskGroup(ChronoGraphQLTestCase):
                          self.taskGroup.id)
 
 
+class TaskGroupsBulk(ChronoGraphQLTestCase):
+    def setUp(self):
+        self.users = UserFactory.create_batch(2)
+        self.user_group = UserGroupFactory.create()
+        self.project = ProjectFactory.create()
+        self.mutation = '''mutation CreateTaskGroups($input: [TaskGroupBulkCreateInputType!]!){
+            createTaskGroups(data: $input){
+                errors {
+                    field
+                    arrayErrors {
+                        key
+                        objectErrors {
+                            field
+                            messages
+                        }
+                    }
+                }
+                result {
+                    id
+                    title
+                    users {
+                        id
+                    }
+                    userGroup {
+                        id
+                    }
+                }
+                ok
+            }
+        }'''
+
+    def get_input(self, count):
+        return [
+            {
+                "uuid": str(i),
+                "title": f"Sprint {i}",
+                "status": "INPROGRESS",
+                "users": [user.id for user in self.users],
+                "userGroup": [self.user_group.id],
+                "project": self.project.id,
+            }
+            for i in range(count)
+        ]
+
+    def test_valid_taskgroups_creation(self):
+        response = self.query(
+            self.mutation,
+            input_data=self.get_input(2),
+        )
+
+        content = json.loads(response.content)
+        self.assertResponseNoErrors(response)
+        self.assertTrue(content['data']['createTaskGroups']['ok'], content)
+        result = content['data']['createTaskGroups']['result']
+        self.assertEqual([item['title'] for item in result], ['Sprint 0', 'Sprint 1'])
+        for item in result:
+            self.assertEqual({user['id'] for user in item['users']},
+                             {str(user.id) for user in self.users})
+            self.assertEqual(item['userGroup'], [{'id': str(self.user_group.id)}])
+
+    def test_taskgroups_creation_query_count(self):
+        # the members in the result are not batched, only the writes are counted
+        mutation = '''mutation CreateTaskGroups($input: [TaskGroupBulkCreateInputType!]!){
+            createTaskGroups(data: $input){ ok result { id } }
+        }'''
+        with CaptureQueriesContext(connection) as small:
+            self.query(mutation, input_data=self.get_input(2))
+        with CaptureQueriesContext(connection) as large:
+            self.query(mutation, input_data=self.get_input(20))
+        self.assertEqual(len(small), len(large))
+
+    def test_invalid_taskgroups_creation(self):
+        input = self.get_input(2)
+        input[0]['users'].append(0)
+        response = self.query(
+            self.mutation,
+            input_data=input,
+        )
+
+        content = json.loads(response.content)
+        self.assertFalse(content['data']['createTaskGroups']['ok'], content)
+        array_errors = content['data']['createTaskGroups']['errors'][0]['arrayErrors']
+        self.assertEqual([error['key'] for error in array_errors], ['0'])
+        self.assertEqual(array_errors[0]['objectErrors'][0]['field'], 'users')
+        self.assertFalse(TaskGroup.objects.filter(project=self.project).exists())
+
+
 """
 Test Case for the TimeEntry
 """
@@ -402,6 +786,42 @@ class TimeEntryCreate(ChronoGraphQLTestCase):
         self.assertEqual(content['data']['createTimeentry']['result']['task']['id'],
                          str(self.input['task']))
 
+    def test_overlapping_timeentry_creation(self):
+        TimeEntryFactory.create(
+            user_id=self.input['user'],
+            date=self.input['date'],
+            start_time='09:00:00',
+            end_time='11:00:00',
+        )
+        response = self.query(
+            self.mutation,
+            input_data=self.input,
+        )
+
+        content = json.loads(response.content)
+        self.assertResponseNoErrors(response)
+        self.assertFalse(content['data']['createTimeentry']['ok'], content)
+        self.assertEqual(content['data']['createTimeentry']['errors'][0]['field'], 'date')
+
+    def test_overlap_constraint_maps_to_date_error(self):
+        TimeEntryFactory.create(
+            user_id=self.input['user'],
+            date=self.input['date'],
+            start_time='09:00:00',
+            end_time='11:00:00',
+        )
+        # simulate a concurrent write slipping past the validation
+        with patch('task.models.TimeEntry.clean_dates', return_value={}):
+            response = self.query(
+                self.mutation,
+                input_data=self.input,
+            )
+
+        content = json.loads(response.content)
+        self.assertResponseNoErrors(response)
+        self.assertFalse(content['data']['createTimeentry']['ok'], content)
+        self.assertEqual(content['data']['createTimeentry']['errors'][0]['field'], 'date')
+
 
 class UpdateTimeEntry(ChronoGraphQLTestCase):
     def setUp(self):
@@ -485,6 +905,314 @@ class DeleteTimeEntry(ChronoGraphQLTestCase):
                          self.timeEntry.id)
 
 
+class TimeEntriesBulk(ChronoGraphQLTestCase):
+    def setUp(self):
+        self.user = UserFactory.create()
+        self.task = TaskFactory.create()
+        self.create_mutation = '''mutation CreateTimeEntries($input: [TimeEntryBulkCreateInputType!]!){
+            createTimeEntries(data: $input){
+                errors {
+                    field
+                    messages
+                    arrayErrors {
+                        key
+                        objectErrors {
+                            field
+                            messages
+                        }
+                    }
+                }
+                result {
+                    id
+                    startTime
+                }
+                ok
+            }
+        }'''
+        self.upsert_mutation = '''mutation UpsertTimeEntries($input: [TimeEntryUpsertInputType!]!){
+            upsertTimeEntries(data: $input){
+                errors {
+                    field
+                    messages
+                    arrayErrors {
+                        key
+                        objectErrors {
+                            field
+                            messages
+                        }
+                    }
+                }
+                result {
+                    id
+                    startTime
+                    endTime
+                }
+                ok
+            }
+        }'''
+
+        self.input = [
+            {
+                "uuid": "a",
+                "user": self.user.id,
+                "task": self.task.id,
+                "date": "2020-10-10",
+                "startTime": "09:00:00",
+                "endTime": "10:00:00",
+            },
+            {
+                "uuid": "b",
+                "user": self.user.id,
+                "task": self.task.id,
+                "date": "2020-10-10",
+                "startTime": "10:00:00",
+                "endTime": "12:00:00",
+            },
+            {
+                "uuid": "c",
+                "user": self.user.id,
+                "task": self.task.id,
+                "date": "2020-10-11",
+                "startTime": "09:30:00",
+                "endTime": "11:00:00",
+            },
+        ]
+
+    def test_valid_timeentries_creation(self):
+        response = self.query(
+            self.create_mutation,
+            input_data=self.input,
+        )
+
+        content = json.loads(response.content)
+        self.assertResponseNoErrors(response)
+        self.assertTrue(content['data']['createTimeEntries']['ok'], content)
+        self.assertIsNone(content['data']['createTimeEntries']['errors'], content)
+        self.assertEqual([item['startTime'] for item in content['data']['createTimeEntries']['result']],
+                         [item['startTime'] for item in self.input])
+        self.assertEqual(TimeEntry.objects.filter(user=self.user).count(), 3)
+
+    def test_overlapping_timeentries_creation(self):
+        # overlaps with an item of the batch
+        self.input[1]['startTime'] = '09:30:00'
+        # overlaps with a stored entry
+        TimeEntryFactory.create(
+            user=self.user,
+            date='2020-10-11',
+            start_time='10:30:00',
+            end_time='11:30:00',
+        )
+        response = self.query(
+            self.create_mutation,
+            input_data=self.input,
+        )
+
+        content = json.loads(response.content)
+        self.assertResponseNoErrors(response)
+        self.assertFalse(content['data']['createTimeEntries']['ok'], content)
+        array_errors = content['data']['createTimeEntries']['errors'][0]['arrayErrors']
+        self.assertEqual([error['key'] for error in array_errors], ['a', 'b', 'c'])
+        self.assertEqual(array_errors[0]['objectErrors'][0]['field'], 'date')
+        self.assertEqual(TimeEntry.objects.filter(user=self.user).count(), 1)
+
+    def test_valid_timeentries_upsert(self):
+        entry = TimeEntryFactory.create(
+            user=self.user,
+            date='2020-10-10',
+            start_time='09:00:00',
+            end_time='10:00:00',
+        )
+        # moving the stored entry does not overlap with itself
+        self.input[0]['id'] = entry.id
+        self.input[0]['endTime'] = '09:45:00'
+        response = self.query(
+            self.upsert_mutation,
+            input_data=self.input,
+        )
+
+        content = json.loads(response.content)
+        self.assertResponseNoErrors(response)
+        self.assertTrue(content['data']['upsertTimeEntries']['ok'], content)
+        self.assertEqual(content['data']['upsertTimeEntries']['result'][0]['id'], str(entry.id))
+        self.assertEqual(content['data']['upsertTimeEntries']['result'][0]['endTime'], '09:45:00')
+        self.assertEqual(TimeEntry.objects.filter(user=self.user).count(), 3)
+
+
+class RunningTimers(ChronoGraphQLTestCase):
+    def setUp(self):
+        self.user = UserFactory.create()
+        self.force_login(self.user)
+        self.task = TaskFactory.create()
+        self.start_mutation = '''mutation StartTimer($task: ID!){
+            startTimer(task: $task){
+                errors {
+                    field
+                    messages
+                }
+                result {
+                    id
+                    endTime
+                    duration
+                }
+                ok
+            }
+        }'''
+        self.stop_mutation = '''mutation StopTimer{
+            stopTimer{
+                errors {
+                    field
+                    messages
+                }
+                result {
+                    id
+                    date
+                    startTime
+                    endTime
+                }
+                ok
+            }
+        }'''
+        self.running_query = '''query RunningTimers($group: ID!){
+            runningTimers(group: $group){
+                id
+                duration
+                user {
+                    id
+                }
+            }
+        }'''
+
+    def test_start_timer(self):
+        response = self.query(self.start_mutation, variables={'task': self.task.id})
+
+        content = json.loads(response.content)
+        self.assertResponseNoErrors(response)
+        self.assertTrue(content['data']['startTimer']['ok'], content)
+        self.assertIsNone(content['data']['startTimer']['result']['endTime'])
+        self.assertIsNotNone(content['data']['startTimer']['result']['duration'])
+        self.assertEqual(TimeEntry.running_timer(self.user).task, self.task)
+
+    def test_one_running_timer(self):
+        self.query(self.start_mutation, variables={'task': self.task.id})
+        response = self.query(self.start_mutation, variables={'task': self.task.id})
+
+        content = json.loads(response.content)
+        self.assertFalse(content['data']['startTimer']['ok'], content)
+        self.assertEqual(content['data']['startTimer']['errors'][0]['messages'],
+                         TimeEntry.running_timer_error())
+        self.assertEqual(TimeEntry.objects.filter(user=self.user).count(), 1)
+
+    def test_open_entry_while_a_timer_runs(self):
+        TimeEntryFactory.create(user=self.user, date='2020-10-10', start_time='09:00:00', end_time=None)
+        response = self.query(
+            '''mutation CreateTimeEntry($input: TimeEntryCreateInputType!){
+                createTimeentry(data: $input){ ok errors { field messages } }
+            }''',
+            input_data={
+                'user': self.user.id,
+                'task': self.task.id,
+                'date': '2020-10-11',
+                'startTime': '09:00:00',
+            },
+        )
+
+        content = json.loads(response.content)
+        self.assertFalse(content['data']['createTimeentry']['ok'], content)
+        self.assertEqual(content['data']['createTimeentry']['errors'][0]['field'], 'endTime')
+
+    def test_stop_timer(self):
+        entry = TimeEntryFactory.create(user=self.user, date='2020-10-10', start_time='09:00:00', end_time=None)
+        with patch('task.models.local_now', return_value=datetime(2020, 10, 10, 9, 30)):
+            response = self.query(self.stop_mutation)
+
+        content = json.loads(response.content)
+        self.assertTrue(content['data']['stopTimer']['ok'], content)
+        self.assertEqual(content['data']['stopTimer']['result']['endTime'], '09:30:00')
+        entry.refresh_from_db()
+        self.assertEqual(entry.duration_seconds, 30 * 60)
+        self.assertIsNone(TimeEntry.running_timer(self.user))
+
+    def test_stop_timer_past_midnight(self):
+        TimeEntryFactory.create(user=self.user, date='2020-10-10', start_time='22:00:00', end_time=None)
+        with patch('task.models.local_now', return_value=datetime(2020, 10, 12, 1, 30)):
+            response = self.query(self.stop_mutation)
+
+        content = json.loads(response.content)
+        self.assertTrue(content['data']['stopTimer']['ok'], content)
+        self.assertEqual(
+            list(TimeEntry.objects.filter(user=self.user).order_by('date').values_list(
+                'date', 'start_time', 'end_time'
+            )),
+            [
+                (datetime(2020, 10, 10).date(), time(22), time(23, 59, 59)),
+                (datetime(2020, 10, 11).date(), time(0), time(23, 59, 59)),
+                (datetime(2020, 10, 12).date(), time(0), time(1, 30)),
+            ],
+        )
+
+    def test_stop_timer_at_next_entry(self):
+        entry = TimeEntryFactory.create(user=self.user, date='2020-10-10', start_time='09:00:00', end_time=None)
+        # logged while the timer runs
+        TimeEntryFactory.create(user=self.user, date='2020-10-10', start_time='10:00:00', end_time='11:00:00')
+        with patch('task.models.local_now', return_value=datetime(2020, 10, 10, 12, 0)):
+            response = self.query(self.stop_mutation)
+
+        content = json.loads(response.content)
+        self.assertTrue(content['data']['stopTimer']['ok'], content)
+        self.assertEqual(content['data']['stopTimer']['result']['endTime'], '10:00:00')
+        entry.refresh_from_db()
+        self.assertEqual(entry.duration_seconds, 60 * 60)
+        self.assertIsNone(TimeEntry.running_timer(self.user))
+
+    def test_stop_timer_past_midnight_at_next_entry(self):
+        TimeEntryFactory.create(user=self.user, date='2020-10-10', start_time='22:00:00', end_time=None)
+        TimeEntryFactory.create(user=self.user, date='2020-10-11', start_time='09:00:00', end_time='10:00:00')
+        with patch('task.models.local_now', return_value=datetime(2020, 10, 12, 1, 30)):
+            response = self.query(self.stop_mutation)
+
+        content = json.loads(response.content)
+        self.assertTrue(content['data']['stopTimer']['ok'], content)
+        self.assertEqual(
+            list(TimeEntry.objects.filter(user=self.user).order_by('date', 'start_time').values_list(
+                'date', 'start_time', 'end_time'
+            )),
+            [
+                (datetime(2020, 10, 10).date(), time(22), time(23, 59, 59)),
+                (datetime(2020, 10, 11).date(), time(0), time(9)),
+                (datetime(2020, 10, 11).date(), time(9), time(10)),
+            ],
+        )
+
+    def test_stop_without_timer(self):
+        response = self.query(self.stop_mutation)
+
+        content = json.loads(response.content)
+        self.assertFalse(content['data']['stopTimer']['ok'], content)
+
+    def test_running_timers(self):
+        member = UserFactory.create()
+        group = UserGroupFactory.create(members=[self.user, member])
+        running = TimeEntryFactory.create(user=member, date='2020-10-10', start_time='09:00:00', end_time=None)
+        # stopped, and running outside of the group
+        TimeEntryFactory.create(user=member, date='2020-10-09', start_time='09:00:00', end_time='10:00:00')
+        TimeEntryFactory.create(user=UserFactory.create(), date='2020-10-10', start_time='09:00:00', end_time=None)
+        response = self.query(self.running_query, variables={'group': group.id})
+
+        content = json.loads(response.content)
+        self.assertResponseNoErrors(response)
+        timers = content['data']['runningTimers']
+        self.assertEqual([timer['id'] for timer in timers], [str(running.id)])
+        self.assertEqual(timers[0]['user']['id'], str(member.id))
+        self.assertIsNotNone(timers[0]['duration'])
+
+    def test_running_timers_of_another_group(self):
+        group = UserGroupFactory.create(members=[UserFactory.create()])
+        response = self.query(self.running_query, variables={'group': group.id})
+
+        content = json.loads(response.content)
+        self.assertIsNone(content['data']['runningTimers'])
+
+
 """Summary api"""
 
 
@@ -609,6 +1337,22 @@ class TestSummaryAPI(ChronoGraphQLTestCase):
         self.assertEqual(content['data']['summaryMonthly']['totalHoursDay'][0]['duration'],
         str(HOURS_DAY))
 
+    def test_monthly_summary_task_list_is_batched(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.query(
+                self.q1
+            )
+
+        content = json.loads(response.content)
+        self.assertResponseNoErrors(response)
+        days = content['data']['summaryMonthly']['totalHoursDay']
+        self.assertEqual([entry['id'] for entry in days[0]['taskList']],
+                         [str(self.timeentry1.id), str(self.timeentry3.id)])
+        self.assertEqual(
+            len([query for query in queries if 'FROM "task_timeentry"' in query['sql']]),
+            1,
+        )
+
     def test_monthly_summary_with_timeentry_another_month(self):
         response = self.query(
             self.q1
@@ -983,3 +1727,255 @@ class TestDashbaoardMyProjectAPI(ChronoGraphQLTestCase):
         str(hour1))
         self.assertEqual(content['data']['dashboard']['myProject'][1]['clientName'],
         self.client2.name)
+
+
+class TestDashboardQueryCount(ChronoGraphQLTestCase):
+    def setUp(self):
+        self.user = UserFactory.create()
+        self.force_login(self.user)
+        self.user_group = UserGroupFactory.create(
+            members=[self.user]
+        )
+        for day in range(3):
+            project = ProjectFactory.create(
+                user_group=[self.user_group]
+            )
+            task = TaskFactory.create(
+                task_group=TaskGroupFactory.create(project=project),
+                user=self.user
+            )
+            TimeEntryFactory.create(
+                date=datetime.now().date() - timedelta(days=day),
+                start_time=time(10, 10, 10),
+                end_time=time(12, 10, 10),
+                user=self.user,
+                task=task,
+            )
+
+        self.q = """
+            query DashBoard{
+                dashboard {
+                    thisWeek {
+                        totalHours
+                        totalHoursDay {
+                            date
+                            duration
+                        }
+                    }
+                    hoursByProject {
+                        projectTotal
+                        projectParticular {
+                            duration
+                            projectName
+                        }
+                    }
+                    mostActiveProject {
+                        projectTotal
+                        projectParticular {
+                            duration
+                            projectName
+                        }
+                    }
+                    myProject {
+                        clientName
+                        editedOn
+                        hoursSpent
+                        projectName
+                        status
+                    }
+                }
+            }
+        """
+
+    def test_dashboard_query_count(self):
+        # session, user, accessible projects and a single aggregate for the whole dashboard
+        with self.assertNumQueries(4):
+            response = self.query(
+                self.q
+            )
+        # the whole dashboard is cached across requests
+        with self.assertNumQueries(2):
+            response = self.query(
+                self.q
+            )
+
+        content = json.loads(response.content)
+        self.assertResponseNoErrors(response)
+        self.assertEqual(content['data']['dashboard']['hoursByProject']['projectTotal'], '6:00:00')
+        self.assertEqual(len(content['data']['dashboard']['myProject']), 3)
+
+
+class TestSummaryCache(ChronoGraphQLTestCase):
+    def setUp(self):
+        self.user = UserFactory.create()
+        self.other_user = UserFactory.create()
+        self.force_login(self.user)
+        self.user_group = UserGroupFactory.create(
+            members=[self.user, self.other_user]
+        )
+        self.project = ProjectFactory.create(
+            user_group=[self.user_group]
+        )
+        self.task = TaskFactory.create(
+            task_group=TaskGroupFactory.create(project=self.project),
+            user=self.user
+        )
+        self.today = datetime.now().date()
+        TimeEntryFactory.create(
+            date=self.today,
+            start_time=time(8),
+            end_time=time(9),
+            user=self.user,
+            task=self.task,
+        )
+        self.q = """
+            query SummaryWeekly{
+                summaryWeekly {
+                    totalHoursWeekly
+                }
+            }
+        """
+        self.q1 = """
+            query DashBoard{
+                dashboard {
+                    hoursByProject {
+                        projectTotal
+                    }
+                    myProject {
+                        hoursSpent
+                    }
+                }
+            }
+        """
+        self.mutation = '''mutation CreateTimeEntry($input: TimeEntryCreateInputType!){
+            createTimeentry(data: $input){
+                ok
+            }
+        }'''
+
+    def get_summary_weekly(self):
+        response = self.query(self.q)
+        self.assertResponseNoErrors(response)
+        return json.loads(response.content)['data']['summaryWeekly']['totalHoursWeekly']
+
+    def get_dashboard(self):
+        response = self.query(self.q1)
+        self.assertResponseNoErrors(response)
+        return json.loads(response.content)['data']['dashboard']
+
+    def test_cache_hit_skips_aggregates(self):
+        self.assertEqual(self.get_summary_weekly(), '1:00:00')
+        # session and user only
+        with self.assertNumQueries(2):
+            self.assertEqual(self.get_summary_weekly(), '1:00:00')
+
+    def test_time_entry_mutation_invalidates(self):
+        self.assertEqual(self.get_summary_weekly(), '1:00:00')
+        response = self.query(self.mutation, input_data={
+            "user": self.user.id,
+            "task": self.task.id,
+            "date": str(self.today),
+            "startTime": "10:00:00",
+            "endTime": "12:00:00",
+        })
+        self.assertResponseNoErrors(response)
+        self.assertEqual(self.get_summary_weekly(), '3:00:00')
+
+    def test_time_of_project_members_invalidates(self):
+        self.assertEqual(self.get_dashboard()['myProject'], [{'hoursSpent': '1:00:00'}])
+        TimeEntryFactory.create(
+            date=self.today,
+            start_time=time(8),
+            end_time=time(10),
+            user=self.other_user,
+            task=self.task,
+        )
+        self.assertEqual(self.get_dashboard()['myProject'], [{'hoursSpent': '3:00:00'}])
+
+    def test_membership_change_invalidates(self):
+        self.assertEqual(self.get_dashboard()['hoursByProject']['projectTotal'], '1:00:00')
+        self.user_group.members.remove(self.user)
+        self.assertEqual(self.get_dashboard()['hoursByProject']['projectTotal'], None)
+
+
+""" Search Api """
+
+
+class TestSearchAPI(ChronoGraphQLTestCase):
+    def setUp(self):
+        self.user = UserFactory.create()
+        self.force_login(self.user)
+        self.user_group = UserGroupFactory.create(
+            members=[self.user]
+        )
+        self.project = ProjectFactory.create(
+            title='Invoice portal',
+            user_group=[self.user_group]
+        )
+        self.task_group = TaskGroupFactory.create(
+            title='Billing', project=self.project
+        )
+        self.task = TaskFactory.create(
+            title='Invoice bug on export',
+            task_group=self.task_group,
+        )
+        self.time_entry = TimeEntryFactory.create(
+            description='looked into the invoice bug',
+            date=datetime(2020, 1, 1).date(),
+            start_time=time(10),
+            end_time=time(11),
+            user=self.user,
+            task=self.task,
+        )
+        # not accessible to the user
+        TaskFactory.create(
+            title='Invoice bug elsewhere',
+            task_group=TaskGroupFactory.create(project=ProjectFactory.create()),
+        )
+        self.q = """
+            query Search($query: String!, $types: [SearchType!]){
+                search(query: $query, types: $types) {
+                    id
+                    type
+                    label
+                    rank
+                }
+            }
+        """
+
+    def test_search(self):
+        response = self.query(self.q, variables={'query': 'invoice bugs'})
+        content = json.loads(response.content)
+        self.assertResponseNoErrors(response)
+        self.assertEqual(
+            sorted((result['type'], int(result['id'])) for result in content['data']['search']),
+            [('TASK', self.task.id), ('TIME_ENTRY', self.time_entry.id)]
+        )
+        ranks = [result['rank'] for result in content['data']['search']]
+        self.assertEqual(ranks, sorted(ranks, reverse=True))
+
+    def test_search_types(self):
+        response = self.query(self.q, variables={'query': 'invoice', 'types': ['PROJECT', 'TASK_GROUP']})
+        content = json.loads(response.content)
+        self.assertResponseNoErrors(response)
+        self.assertEqual(
+            [(result['type'], result['label']) for result in content['data']['search']],
+            [('PROJECT', 'Invoice portal')]
+        )
+
+    def test_search_is_kept_in_sync(self):
+        self.task_group.title = 'Invoice reminders'
+        self.task_group.save()
+        response = self.query(self.q, variables={'query': 'reminder', 'types': ['TASK_GROUP']})
+        content = json.loads(response.content)
+        self.assertEqual(
+            [int(result['id']) for result in content['data']['search']],
+            [self.task_group.id]
+        )
+
+    def test_search_single_query(self):
+        self.query(self.q, variables={'query': 'invoice'})
+        # session, user and a single union, accessible projects being cached
+        with self.assertNumQueries(3):
+            response = self.query(self.q, variables={'query': 'invoice'})
+        self.assertResponseNoErrors(response)
@@ -0,0 +1,87 @@
+from types import SimpleNamespace
+
+import psycopg2
+from django.db import connection
+from django.http import HttpResponse
+from django.test import RequestFactory
+from mock import patch
+
+from chrono.db.pool import ConnectionPool
+from utils.middlewares import ReleaseConnectionMiddleware
+from utils.tests import ChronoGraphQLTestCase
+
+
+class TestConnectionPool(ChronoGraphQLTestCase):
+    def pool(self, **kwargs):
+        conn_params = connection.get_connection_params()
+        pool = ConnectionPool(lambda: psycopg2.connect(**conn_params), **kwargs)
+        self.addCleanup(pool.close)
+        return pool
+
+    def test_connection_is_reused(self):
+        pool = self.pool(max_size=2)
+        first = pool.get()
+        pool.put(first)
+        self.assertIs(pool.get(), first)
+        self.assertEqual(pool.stats()['connects'], 1)
+        self.assertEqual(pool.stats()['in_use'], 1)
+
+    def test_open_transaction_is_rolled_back(self):
+        pool = self.pool(max_size=1)
+        conn = pool.get()
+        conn.cursor().execute('SELECT 1')
+        pool.put(conn)
+        self.assertEqual(conn.get_transaction_status(), psycopg2.extensions.TRANSACTION_STATUS_IDLE)
+
+    def test_checkout_waits_until_timeout(self):
+        pool = self.pool(max_size=1, timeout=0.05)
+        conn = pool.get()
+        with self.assertRaises(psycopg2.OperationalError):
+            pool.get()
+        stats = pool.stats()
+        self.assertEqual((stats['waits'], stats['timeouts'], stats['max_waiting']), (1, 1, 1))
+        self.assertGreaterEqual(stats['wait_time'], 0.05)
+        pool.put(conn)
+        self.assertIs(pool.get(), conn)
+
+    def test_broken_connection_is_replaced(self):
+        pool = self.pool(max_size=1)
+        conn = pool.get()
+        pool.put(conn)
+        # closed behind the back of the pool, as by a server restart
+        conn.close()
+        self.assertIsNot(pool.get(), conn)
+        self.assertEqual(pool.stats()['discards'], 1)
+        self.assertEqual(pool.stats()['size'], 1)
+
+    def test_idle_connection_expires(self):
+        pool = self.pool(max_size=1, idle_timeout=0)
+        conn = pool.get()
+        pool.put(conn)
+        self.assertIsNot(pool.get(), conn)
+        self.assertTrue(conn.closed)
+
+    def test_forked_process_does_not_reuse_connections(self):
+        pool = self.pool(max_size=1)
+        conn = pool.get()
+        pool.put(conn)
+        pool.pid = -1
+        self.assertIsNot(pool.get(), conn)
+        conn.close()
+
+
+class TestReleaseConnectionMiddleware(ChronoGraphQLTestCase):
+    def call(self, response):
+        middleware = ReleaseConnectionMiddleware(lambda request: response)
+        return middleware(RequestFactory().get('/'))
+
+    @patch('utils.middlewares.connection', SimpleNamespace(in_atomic_block=False))
+    @patch('utils.middlewares.close_old_connections')
+    def test_connection_is_released(self, close_old_connections):
+        self.call(HttpResponse())
+        close_old_connections.assert_called_once_with()
+
+    @patch('utils.middlewares.close_old_connections')
+    def test_inside_transaction(self, close_old_connections):
+        self.call(HttpResponse())
+        close_old_connections.assert_not_called()
@@ -0,0 +1,92 @@
+from datetime import date, time
+
+from django.db import connection
+from django.db.migrations.executor import MigrationExecutor
+from django.test import TransactionTestCase
+
+
+class MigrationTestCase(TransactionTestCase):
+    """
+    Migrate the database back to migrate_from, where setUpBeforeMigration
+    seeds the rows with the historical models, then forward to migrate_to
+    """
+    migrate_from = None
+    migrate_to = None
+
+    def setUp(self):
+        executor = MigrationExecutor(connection)
+        executor.migrate(self.migrate_from)
+        self.setUpBeforeMigration(executor.loader.project_state(self.migrate_from).apps)
+        executor = MigrationExecutor(connection)
+        executor.migrate(self.migrate_to)
+        self.apps = executor.loader.project_state(self.migrate_to).apps
+
+    def tearDown(self):
+        executor = MigrationExecutor(connection)
+        executor.migrate(executor.loader.graph.leaf_nodes())
+
+    def setUpBeforeMigration(self, apps):
+        pass
+
+
+class TestTimeRangeMigration(MigrationTestCase):
+    migrate_from = [('task', '0002_taskgroup_project')]
+    migrate_to = [('task', '0003_timeentry_time_range')]
+
+    def setUpBeforeMigration(self, apps):
+        User = apps.get_model('user', 'User')
+        TimeEntry = apps.get_model('task', 'TimeEntry')
+        user = User.objects.create(username='jon', email='jon@dave.com')
+
+        def entry(start_time, end_time, day=date(2020, 10, 10)):
+            return TimeEntry.objects.create(
+                user=user, date=day, start_time=start_time, end_time=end_time,
+            ).id
+
+        # overlaps the legacy validation let through
+        self.entry = entry(time(10, 0), time(12, 0))
+        self.same_start = entry(time(10, 0), time(10, 15))
+        self.contained = entry(time(10, 30), time(11, 0))
+        self.running = entry(time(11, 15), None)
+        self.partial = entry(time(11, 30), time(13, 0))
+        self.next_day = entry(time(10, 30), time(11, 0), day=date(2020, 10, 11))
+
+    def test_overlapping_entries_are_trimmed(self):
+        TimeEntry = self.apps.get_model('task', 'TimeEntry')
+        entries = {
+            entry.id: (entry.start_time, entry.end_time, entry.time_range)
+            for entry in TimeEntry.objects.all()
+        }
+        self.assertEqual(entries[self.entry][:2], (time(10, 0), time(12, 0)))
+        self.assertEqual(entries[self.entry][2].lower, 36000)
+        for entry_id in (self.same_start, self.contained, self.running):
+            start_time, end_time, time_range = entries[entry_id]
+            self.assertEqual(start_time, end_time)
+            self.assertTrue(time_range.isempty)
+        self.assertEqual(entries[self.partial][:2], (time(12, 0), time(13, 0)))
+        self.assertEqual(
+            (entries[self.partial][2].lower, entries[self.partial][2].upper), (43200, 46800)
+        )
+        self.assertEqual(entries[self.next_day][:2], (time(10, 30), time(11, 0)))
+
+    def test_original_times_are_restored(self):
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT id FROM task_timeentry_overlap_backup ORDER BY id')
+            self.assertEqual(
+                [row[0] for row in cursor.fetchall()],
+                [self.same_start, self.contained, self.running, self.partial],
+            )
+        executor = MigrationExecutor(connection)
+        executor.migrate(self.migrate_from)
+        TimeEntry = executor.loader.project_state(self.migrate_from).apps.get_model('task', 'TimeEntry')
+        self.assertEqual(
+            list(TimeEntry.objects.order_by('id').values_list('start_time', 'end_time')),
+            [
+                (time(10, 0), time(12, 0)),
+                (time(10, 0), time(10, 15)),
+                (time(10, 30), time(11, 0)),
+                (time(11, 15), None),
+                (time(11, 30), time(13, 0)),
+                (time(10, 30), time(11, 0)),
+            ],
+        )
@@ -1,9 +1,20 @@
+import io
 from datetime import datetime, time
 
 from django.core.exceptions import ValidationError
+from django.core.management import CommandError, call_command
+from django.db import IntegrityError, transaction
+from django.db.models import Sum
 
-from task.models import TimeEntry
-from utils.factories import TaskFactory, TimeEntryFactory, UserFactory
+from task.models import DailyTimeSummary, Task, TimeEntry
+from user.models import User
+from utils.factories import (
+    ProjectFactory,
+    TaskFactory,
+    TaskGroupFactory,
+    TimeEntryFactory,
+    UserFactory,
+)
 from utils.tests import ChronoGraphQLTestCase
 
 
@@ -36,9 +47,46 @@ class TestTimeEntryModel(ChronoGraphQLTestCase):
             end_time='15:10:26',
             user=self.user
         )
-        errors = TimeEntry.clean_dates(self.data, timeentry1)
+        errors = TimeEntry.clean_dates(self.data)
         self.assertIn('date', errors)
 
+    def test_time_entry_does_not_overlap_itself(self):
+        timeentry1 = TimeEntryFactory.create(
+            date='2020-10-10',
+            start_time='10:10:19',
+            end_time='15:10:26',
+            user=self.user
+        )
+        errors = TimeEntry.clean_dates(self.data, timeentry1)
+        self.assertNotIn('date', errors)
+
+    def test_overlap_enforced_by_database(self):
+        TimeEntryFactory.create(
+            date='2020-10-10',
+            start_time='10:00:00',
+            end_time='12:00:00',
+            user=self.user
+        )
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            TimeEntryFactory.create(
+                date='2020-10-10',
+                start_time='11:00:00',
+                end_time='13:00:00',
+                user=self.user
+            )
+        # adjacent entries and entries of other users are allowed
+        TimeEntryFactory.create(
+            date='2020-10-10',
+            start_time='12:00:00',
+            end_time='13:00:00',
+            user=self.user
+        )
+        TimeEntryFactory.create(
+            date='2020-10-10',
+            start_time='11:00:00',
+            end_time='13:00:00',
+        )
+
     def test_duration(self):
         timeentry = TimeEntryFactory()
         timeentry.date = datetime.now().date()
@@ -51,3 +99,96 @@ class TestTimeEntryModel(ChronoGraphQLTestCase):
                      - datetime.combine(timeentry.date, timeentry.start_time)
 
         self.assertEqual(timeentry.duration, difference)
+        self.assertEqual(timeentry.duration_seconds, difference.total_seconds())
+
+    def test_open_entry_has_no_duration_seconds(self):
+        timeentry = TimeEntryFactory(start_time=time(10, 10, 10))
+        self.assertIsNone(timeentry.duration_seconds)
+
+
+class TestDailyTimeSummary(ChronoGraphQLTestCase):
+    def setUp(self):
+        self.user = UserFactory.create()
+        self.task = TaskFactory.create(
+            task_group=TaskGroupFactory.create(project=ProjectFactory.create())
+        )
+        self.timeentry1 = TimeEntryFactory.create(
+            date='2020-10-10',
+            start_time=time(10, 0),
+            end_time=time(12, 0),
+            user=self.user,
+            task=self.task,
+        )
+        self.timeentry2 = TimeEntryFactory.create(
+            date='2020-10-10',
+            start_time=time(13, 0),
+            end_time=time(13, 30),
+            user=self.user,
+            task=self.task,
+        )
+
+    def get_summary(self):
+        return list(DailyTimeSummary.objects.order_by('date').values_list(
+            'date', 'task', 'project', 'total_seconds', 'entry_count',
+        ))
+
+    def test_summary_follows_time_entries(self):
+        project = self.task.task_group.project_id
+        self.assertEqual(self.get_summary(), [
+            (datetime(2020, 10, 10).date(), self.task.id, project, 9000, 2),
+        ])
+
+        timeentry = TimeEntry.objects.get(id=self.timeentry2.id)
+        timeentry.date = datetime(2020, 10, 11).date()
+        timeentry.save()
+        self.assertEqual(self.get_summary(), [
+            (datetime(2020, 10, 10).date(), self.task.id, project, 7200, 1),
+            (datetime(2020, 10, 11).date(), self.task.id, project, 1800, 1),
+        ])
+
+        self.timeentry1.delete()
+        self.assertEqual(self.get_summary(), [
+            (datetime(2020, 10, 11).date(), self.task.id, project, 1800, 1),
+        ])
+
+    def test_summary_follows_project_of_task(self):
+        project = ProjectFactory.create()
+        task_group = self.task.task_group
+        task_group.project = project
+        task_group.save()
+        self.assertEqual(
+            set(DailyTimeSummary.objects.values_list('project', flat=True)),
+            {project.id},
+        )
+
+    def test_rebuild_summary(self):
+        expected = self.get_summary()
+        DailyTimeSummary.objects.all().delete()
+        call_command('rebuild_time_summary', stdout=io.StringIO())
+        self.assertEqual(self.get_summary(), expected)
+
+
+class TestGenerateDataset(ChronoGraphQLTestCase):
+    def generate(self):
+        call_command(
+            'generate_dataset', users=6, projects=3, tasks=40, time_entries=500, days=30,
+            stdout=io.StringIO(),
+        )
+
+    def test_generate_dataset(self):
+        self.generate()
+        self.assertEqual(User.objects.filter(email__endswith='@dataset.chrono').count(), 6)
+        self.assertEqual(Task.objects.count(), 40)
+        self.assertEqual(TimeEntry.objects.count(), 500)
+        # the derived columns are copied in consistent with the times
+        entry = TimeEntry.objects.order_by('id').first()
+        self.assertEqual(
+            entry.duration_seconds,
+            (datetime.combine(entry.date, entry.end_time) - datetime.combine(entry.date, entry.start_time)).seconds,
+        )
+        self.assertEqual(
+            DailyTimeSummary.objects.aggregate(total=Sum('total_seconds'))['total'],
+            TimeEntry.objects.aggregate(total=Sum('duration_seconds'))['total'],
+        )
+        with self.assertRaises(CommandError):
+            self.generate()
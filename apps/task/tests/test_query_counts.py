@@ -0,0 +1,344 @@
+import datetime
+import json
+
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+
+from utils.tests import ChronoGraphQLTestCase
+from utils.factories import (
+    UserFactory,
+    UserGroupFactory,
+    ProjectFactory,
+    TaskGroupFactory,
+    TaskFactory,
+    TimeEntryFactory,
+)
+
+
+"""
+Query budgets of the operations, their SQL count must not grow with the rows
+"""
+
+TASK_LIST = """
+    query TaskList{
+        taskList(first: 100) {
+            id
+            title
+            user {
+                id
+            }
+            taskGroup {
+                id
+                title
+            }
+        }
+    }
+"""
+
+TASK_LIST_NESTED = """
+    query TaskList{
+        taskList(first: 100) {
+            id
+            title
+            createdBy {
+                id
+            }
+            taskGroup {
+                id
+                title
+                users {
+                    id
+                    email
+                }
+                userGroup {
+                    id
+                }
+                project {
+                    id
+                    title
+                    client {
+                        id
+                        name
+                    }
+                }
+            }
+        }
+    }
+"""
+
+TASKGROUP_LIST = """
+    query TaskGroupList{
+        taskgroupList(first: 100) {
+            id
+            title
+            project {
+                id
+                title
+            }
+        }
+    }
+"""
+
+TASKGROUP_LIST_MEMBERS = """
+    query TaskGroupList{
+        taskgroupList(first: 100) {
+            id
+            ...members
+            project {
+                id
+                userGroup {
+                    id
+                    title
+                }
+            }
+        }
+    }
+
+    fragment members on TaskGroupListType {
+        users {
+            id
+        }
+        userGroup {
+            id
+        }
+    }
+"""
+
+TASKGROUP_LIST_TASKS = """
+    query TaskGroupList{
+        taskgroupList(first: 100) {
+            id
+            title
+            task {
+                id
+                title
+                timeentry {
+                    id
+                    duration
+                }
+            }
+        }
+    }
+"""
+
+PROJECT_LIST = """
+    query ProjectList{
+        projectList(first: 100) {
+            id
+            title
+            client {
+                id
+            }
+        }
+    }
+"""
+
+TIMEENTRY_LIST = """
+    query TimeEntryList{
+        timeentryList(first: 100) {
+            id
+            date
+            duration
+            task {
+                id
+                title
+            }
+        }
+    }
+"""
+
+TIMEENTRY_LIST_NESTED = """
+    query TimeEntryList{
+        timeentryList(first: 100) {
+            id
+            duration
+            user {
+                id
+            }
+            task {
+                id
+                taskGroup {
+                    id
+                    project {
+                        id
+                    }
+                }
+            }
+        }
+    }
+"""
+
+SUMMARY_WEEKLY = """
+    query SummaryWeekly{
+        summaryWeekly {
+            totalHoursWeekly
+            totalHoursDay {
+                date
+                duration
+                taskList {
+                    id
+                    duration
+                    task {
+                        id
+                        title
+                    }
+                }
+            }
+        }
+    }
+"""
+
+DASHBOARD = """
+    query DashBoard{
+        dashboard {
+            thisWeek {
+                totalHours
+                totalHoursDay {
+                    date
+                    duration
+                }
+            }
+            hoursByProject {
+                projectTotal
+                projectParticular {
+                    duration
+                    projectName
+                }
+            }
+            mostActiveProject {
+                projectTotal
+            }
+            myProject {
+                projectName
+                clientName
+                hoursSpent
+            }
+        }
+    }
+"""
+
+
+class TestQueryBudgets(ChronoGraphQLTestCase):
+    def setUp(self):
+        self.user = UserFactory.create()
+        self.force_login(self.user)
+        self.user_group = UserGroupFactory.create(members=[self.user])
+        self.entries = 0
+
+    def add_tasks(self, count):
+        for _ in range(count):
+            project = ProjectFactory.create(user_group=[self.user_group])
+            TaskFactory.create(
+                user=self.user,
+                task_group=TaskGroupFactory.create(project=project),
+            )
+
+    def add_task_groups(self, count):
+        for _ in range(count):
+            project = ProjectFactory.create(user_group=[self.user_group])
+            task_group = TaskGroupFactory.create(project=project, users=[self.user])
+            task_group.user_group.add(self.user_group)
+            TaskFactory.create(user=self.user, task_group=task_group)
+
+    def add_time_entries(self, count):
+        # twenty minute entries of today, each in a project of its own
+        day = datetime.datetime.combine(datetime.date.today(), datetime.time())
+        for i in range(self.entries, self.entries + count):
+            start = day + datetime.timedelta(minutes=25 * i)
+            TimeEntryFactory.create(
+                user=self.user,
+                task=TaskFactory.create(
+                    user=self.user,
+                    task_group=TaskGroupFactory.create(
+                        project=ProjectFactory.create(user_group=[self.user_group]),
+                    ),
+                ),
+                date=day.date(),
+                start_time=start.time(),
+                end_time=(start + datetime.timedelta(minutes=20)).time(),
+            )
+        self.entries += count
+
+    def test_task_list(self):
+        self.assertQueryBudget('taskList', TASK_LIST, self.add_tasks)
+
+    def test_task_list_nested(self):
+        self.assertQueryBudget('taskListNested', TASK_LIST_NESTED, self.add_task_groups)
+
+    def test_taskgroup_list(self):
+        self.assertQueryBudget('taskgroupList', TASKGROUP_LIST, self.add_tasks)
+
+    def test_taskgroup_list_members(self):
+        self.assertQueryBudget('taskgroupListMembers', TASKGROUP_LIST_MEMBERS, self.add_task_groups)
+
+    # counted as GRAPHQL_LIST_SIZE tasks of GRAPHQL_LIST_SIZE entries per task group
+    @override_settings(GRAPHQL_MAX_COST=1000000)
+    def test_taskgroup_list_tasks(self):
+        self.assertQueryBudget('taskgroupListTasks', TASKGROUP_LIST_TASKS, self.add_time_entries)
+
+    def test_project_list(self):
+        self.assertQueryBudget('projectList', PROJECT_LIST, self.add_tasks)
+
+    def test_timeentry_list(self):
+        self.assertQueryBudget('timeentryList', TIMEENTRY_LIST, self.add_time_entries)
+
+    def test_timeentry_list_nested(self):
+        self.assertQueryBudget('timeentryListNested', TIMEENTRY_LIST_NESTED, self.add_time_entries)
+
+    def test_summary_weekly(self):
+        self.assertQueryBudget('summaryWeekly', SUMMARY_WEEKLY, self.add_time_entries)
+
+    def test_dashboard(self):
+        self.assertQueryBudget('dashboard', DASHBOARD, self.add_time_entries)
+
+
+class TestQueryOptimizer(ChronoGraphQLTestCase):
+    def setUp(self):
+        self.user = UserFactory.create()
+        self.force_login(self.user)
+
+    def list_sql(self, query, table):
+        """
+        The statement reading the list, the first one from its table
+        """
+        with CaptureQueriesContext(connection) as context:
+            response = self.query(query)
+        self.assertResponseNoErrors(response)
+        return next(
+            query['sql'] for query in context.captured_queries
+            if f'FROM "{table}"' in query['sql']
+        )
+
+    def test_unrequested_columns_are_deferred(self):
+        TaskFactory.create(user=self.user, task_group=TaskGroupFactory.create())
+        sql = self.list_sql(TASK_LIST, 'task_task')
+        self.assertIn('"task_task"."title"', sql)
+        self.assertIn('"task_taskgroup"."title"', sql)
+        self.assertNotIn('"task_task"."description"', sql)
+        self.assertNotIn('"task_taskgroup"."description"', sql)
+
+    def test_resolver_hints(self):
+        TimeEntryFactory.create(user=self.user)
+        sql = self.list_sql(TIMEENTRY_LIST, 'task_timeentry')
+        # read by the resolver of duration
+        self.assertIn('"task_timeentry"."duration_seconds"', sql)
+        self.assertIn('"task_timeentry"."end_time"', sql)
+        self.assertNotIn('"task_timeentry"."description"', sql)
+
+    @override_settings(GRAPHQL_MAX_COST=1000000)
+    def test_reverse_relations_are_prefetched(self):
+        task_group = TaskGroupFactory.create()
+        tasks = TaskFactory.create_batch(2, user=self.user, task_group=task_group)
+        entry = TimeEntryFactory.create(user=self.user, task=tasks[0])
+        response = self.query(TASKGROUP_LIST_TASKS)
+        self.assertResponseNoErrors(response)
+        task_list = json.loads(response.content)['data']['taskgroupList'][0]['task']
+        self.assertEqual(
+            {int(task['id']): [int(entry['id']) for entry in task['timeentry']] for task in task_list},
+            {tasks[0].id: [entry.id], tasks[1].id: []},
+        )
+        sql = self.list_sql(TASKGROUP_LIST_TASKS, 'task_timeentry')
+        # the foreign key matching the entries to their task
+        self.assertIn('"task_timeentry"."task_id"', sql)
+        self.assertNotIn('"task_timeentry"."description"', sql)
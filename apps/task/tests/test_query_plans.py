@@ -0,0 +1,170 @@
+from datetime import date, time, timedelta
+
+from django.db import connection
+
+from task.models import DailyTimeSummary, TimeEntry
+
+from utils.tests import ChronoGraphQLTestCase
+from utils.factories import (
+    UserFactory,
+    TaskGroupFactory,
+    TaskFactory,
+    ProjectFactory,
+    UserGroupFactory,
+)
+
+
+"""
+Query plans of the hot operations, explained against a seeded dataset
+"""
+
+LARGE_TABLES = ('task_timeentry', 'task_dailytimesummary', 'task_task')
+
+HOT_OPERATIONS = {
+    'summaryWeekly': {
+        'query': """
+            query SummaryWeekly{
+                summaryWeekly {
+                    totalHoursWeekly
+                    totalHoursDay {
+                        date
+                        duration
+                        taskList {
+                            id
+                            duration
+                        }
+                    }
+                }
+            }
+        """,
+        'index_conds': [
+            ('task_dailytimesummary', 'user_id'),
+            ('task_timeentry', 'user_id'),
+        ],
+        'max_cost': 100,
+    },
+    'dashboard': {
+        'query': """
+            query DashBoard{
+                dashboard {
+                    thisWeek {
+                        totalHours
+                    }
+                    hoursByProject {
+                        projectTotal
+                    }
+                    mostActiveProject {
+                        projectTotal
+                    }
+                    myProject {
+                        projectName
+                        hoursSpent
+                    }
+                }
+            }
+        """,
+        'index_conds': [
+            ('task_dailytimesummary', 'user_id'),
+            ('task_dailytimesummary', 'project_id'),
+        ],
+        'max_cost': 200,
+    },
+    'taskList': {
+        'query': """
+            query TaskList($user: ID){
+                taskList(user: $user, first: 50){
+                    id
+                    title
+                }
+            }
+        """,
+        'index_conds': [
+            ('task_task', 'user_id'),
+        ],
+        'max_cost': 100,
+    },
+}
+
+
+class TestHotQueryPlans(ChronoGraphQLTestCase):
+    users = 20
+    days = 60
+    entries_per_day = 3
+
+    def setUp(self):
+        users = UserFactory.create_batch(self.users)
+        self.user = users[0]
+        self.force_login(self.user)
+        user_group = UserGroupFactory.create(members=users)
+        self.user_group = user_group
+        tasks = [
+            TaskFactory.create(
+                task_group=TaskGroupFactory.create(
+                    project=ProjectFactory.create(user_group=[user_group])
+                ),
+                user=user,
+            )
+            for user in users
+        ]
+        today = date.today()
+        entries = []
+        for user, task in zip(users, tasks):
+            for day in range(self.days):
+                for hour in range(self.entries_per_day):
+                    entry = TimeEntry(
+                        user=user,
+                        task=task,
+                        date=today - timedelta(days=day),
+                        start_time=time(9 + hour),
+                        end_time=time(9 + hour, 45),
+                    )
+                    entry.update_time_fields()
+                    entries.append(entry)
+        # a running timer for every other user, started today after the entries
+        for user, task in list(zip(users, tasks))[::2]:
+            entry = TimeEntry(user=user, task=task, date=today, start_time=time(18))
+            entry.update_time_fields()
+            entries.append(entry)
+        TimeEntry.objects.bulk_create(entries)
+        DailyTimeSummary.rebuild()
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE')
+
+    def assertHotOperation(self, name, variables=None):
+        operation = HOT_OPERATIONS[name]
+        self.assertQueryPlan(
+            operation['query'],
+            variables=variables,
+            index_conds=operation['index_conds'],
+            no_seq_scan=LARGE_TABLES,
+            max_cost=operation['max_cost'],
+        )
+
+    def test_summary_weekly_plan(self):
+        self.assertHotOperation('summaryWeekly')
+
+    def test_dashboard_plan(self):
+        self.assertHotOperation('dashboard')
+
+    def test_task_list_plan(self):
+        self.assertHotOperation('taskList', variables={'user': self.user.id})
+
+    def test_running_timers_plan(self):
+        query = """
+            query RunningTimers($group: ID!){
+                runningTimers(group: $group){
+                    id
+                    startTime
+                }
+            }
+        """
+        variables = {'group': self.user_group.id}
+        self.assertQueryPlan(query, variables=variables, no_seq_scan=LARGE_TABLES, max_cost=100)
+        # served from the partial index of the running timers alone, which
+        # holds no history so the planner may read it whole
+        timeentry_indexes = {
+            node['Index Name']
+            for _, node in self.explain_query(query, variables)
+            if node.get('Index Name', '').startswith('task_timeentry_')
+        }
+        self.assertEqual(timeentry_indexes, {TimeEntry.RUNNING_TIMER_CONSTRAINT})
@@ -0,0 +1,511 @@
+import csv
+import json
+import tempfile
+import threading
+from datetime import date, time
+from types import SimpleNamespace
+
+from asgiref.sync import async_to_sync
+from asgiref.testing import ApplicationCommunicator
+from django.conf import settings
+from django.core.cache import cache
+from django.core.management import CommandError, call_command
+from django.db import connection
+from django.test import Client, TransactionTestCase, override_settings
+from mock import patch
+from promise import Promise
+
+from chrono.asgi import application
+from chrono.db.base import pools
+from chrono.executors import RootFieldExecutor, resolver_pool
+from chrono.tracing import recent_traces
+from chrono.views import document_backend, get_query_hash
+from task.management.commands.serve import warm_up
+from utils.tests import ChronoGraphQLTestCase
+from utils.factories import (
+    UserFactory,
+    UserGroupFactory,
+    ProjectFactory,
+    TaskGroupFactory,
+    TaskFactory,
+    TimeEntryFactory,
+)
+
+
+class TestTimeEntryExport(ChronoGraphQLTestCase):
+    def setUp(self):
+        self.user = UserFactory.create()
+        self.other_user = UserFactory.create()
+        self.user_group = UserGroupFactory.create(
+            members=[self.user]
+        )
+        self.project = ProjectFactory.create(
+            user_group=[self.user_group]
+        )
+        self.task = TaskFactory.create(
+            task_group=TaskGroupFactory.create(project=self.project)
+        )
+        self.timeentry1 = TimeEntryFactory.create(
+            user=self.user,
+            task=self.task,
+            date='2020-10-10',
+            start_time=time(10, 0),
+            end_time=time(11, 0),
+        )
+        # entry of another user in the project of the user
+        self.timeentry2 = TimeEntryFactory.create(
+            user=self.other_user,
+            task=self.task,
+            date='2020-10-11',
+            start_time=time(10, 0),
+            end_time=time(11, 0),
+        )
+        # entry outside of the projects of the user
+        self.timeentry3 = TimeEntryFactory.create(
+            user=self.other_user,
+            date='2020-10-12',
+            start_time=time(10, 0),
+            end_time=time(11, 0),
+        )
+        self.url = '/export/time-entries'
+
+    def test_export_requires_login(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 403)
+
+    def test_csv_export(self):
+        self.force_login(self.user)
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        rows = list(csv.DictReader(
+            line.decode() for line in response.streaming_content
+        ))
+        self.assertEqual([int(row['id']) for row in rows],
+                         [self.timeentry1.id, self.timeentry2.id])
+        self.assertEqual(rows[0]['project_title'], self.project.title)
+        self.assertEqual(rows[0]['client_name'], self.project.client.name)
+
+    def test_ndjson_export_with_filters(self):
+        self.force_login(self.user)
+        response = self.client.get(self.url, {
+            'format': 'ndjson',
+            'project': self.project.id,
+            'date_gte': '2020-10-11',
+        })
+        self.assertEqual(response.status_code, 200)
+        rows = [json.loads(line) for line in b''.join(response.streaming_content).splitlines()]
+        self.assertEqual(len(rows), 1)
+        self.assertEqual(rows[0]['id'], self.timeentry2.id)
+        self.assertEqual(rows[0]['start_time'], '10:00:00')
+
+
+class TestTimeEntryExportAsgi(TransactionTestCase):
+    """
+    The export served by the ASGI application, which consumes the body of
+    the streaming response on the event loop
+    """
+
+    def setUp(self):
+        self.user = UserFactory.create()
+        project = ProjectFactory.create(
+            user_group=[UserGroupFactory.create(members=[self.user])]
+        )
+        task = TaskFactory.create(task_group=TaskGroupFactory.create(project=project))
+        self.timeentries = [
+            TimeEntryFactory.create(
+                user=self.user,
+                task=task,
+                date=f'2020-10-1{day}',
+                start_time=time(10, 0),
+                end_time=time(11, 0),
+            )
+            for day in range(3)
+        ]
+        client = Client()
+        client.force_login(self.user)
+        self.session_cookie = f'{settings.SESSION_COOKIE_NAME}={client.cookies[settings.SESSION_COOKIE_NAME].value}'
+
+    @async_to_sync
+    async def get(self, path, query_string=b''):
+        communicator = ApplicationCommunicator(application, {
+            'type': 'http',
+            'asgi': {'version': '3.0'},
+            'http_version': '1.1',
+            'method': 'GET',
+            'scheme': 'http',
+            'path': path,
+            'query_string': query_string,
+            'headers': [(b'cookie', self.session_cookie.encode())],
+            'client': ('127.0.0.1', 0),
+            'server': ('testserver', 80),
+        })
+        await communicator.send_input({'type': 'http.request'})
+        start = await communicator.receive_output(timeout=5)
+        body = b''
+        while True:
+            message = await communicator.receive_output(timeout=5)
+            body += message.get('body', b'')
+            if not message.get('more_body'):
+                break
+        await communicator.wait(timeout=5)
+        return start['status'], body
+
+    def test_csv_export(self):
+        with patch('task.views.EXPORT_CHUNK_SIZE', 2):
+            status, body = self.get('/export/time-entries')
+        self.assertEqual(status, 200)
+        rows = list(csv.DictReader(body.decode().splitlines()))
+        self.assertEqual([int(row['id']) for row in rows], [entry.id for entry in self.timeentries])
+
+    def test_ndjson_export(self):
+        status, body = self.get('/export/time-entries', b'format=ndjson&date_gte=2020-10-12')
+        self.assertEqual(status, 200)
+        self.assertEqual([json.loads(line)['id'] for line in body.splitlines()], [self.timeentries[2].id])
+
+    def test_connections_are_released(self):
+        connection.close()
+        in_use = sum(pool.stats()['in_use'] for pool in pools.values())
+        status, body = self.get('/export/time-entries')
+        self.assertEqual(status, 200)
+        self.assertEqual(len(body.splitlines()), len(self.timeentries) + 1)
+        # the request and export threads returned their connections
+        self.assertEqual(sum(pool.stats()['in_use'] for pool in pools.values()), in_use)
+
+
+class TestPersistedQueries(ChronoGraphQLTestCase):
+    def setUp(self):
+        self.user = UserFactory.create()
+        self.force_login(self.user)
+        self.q = """
+            query SummaryWeekly{
+                summaryWeekly {
+                    totalHoursWeekly
+                }
+            }
+        """
+        self.query_hash = get_query_hash(self.q)
+        manifest = tempfile.NamedTemporaryFile('w', suffix='.json')
+        json.dump({self.query_hash: self.q}, manifest)
+        manifest.flush()
+        self.addCleanup(manifest.close)
+        self.settings = override_settings(GRAPHQL_PERSISTED_QUERIES=manifest.name)
+        self.settings.enable()
+        self.addCleanup(self.settings.disable)
+
+    def persisted_query(self, query_hash):
+        return self._client.post(
+            self.GRAPHQL_URL,
+            json.dumps({'extensions': {'persistedQuery': {'version': 1, 'sha256Hash': query_hash}}}),
+            content_type='application/json',
+        )
+
+    def test_persisted_query(self):
+        response = self.persisted_query(self.query_hash)
+        self.assertResponseNoErrors(response)
+        self.assertEqual(json.loads(response.content)['data']['summaryWeekly']['totalHoursWeekly'], None)
+
+    def test_unknown_persisted_query(self):
+        response = self.persisted_query(get_query_hash('{ dashboard { myProject { projectName } } }'))
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(json.loads(response.content)['errors'][0]['message'], 'PersistedQueryNotFound')
+
+    def test_strict_mode(self):
+        with override_settings(GRAPHQL_PERSISTED_QUERIES_STRICT=True):
+            self.assertResponseNoErrors(self.persisted_query(self.query_hash))
+            self.assertResponseNoErrors(self.query(self.q))
+            response = self.query('{ dashboard { myProject { projectName } } }')
+        self.assertEqual(response.status_code, 403)
+
+    def test_document_is_parsed_once(self):
+        self.query(self.q)
+        hits = document_backend.document_from_string.cache_info().hits
+        self.assertResponseNoErrors(self.query(self.q))
+        self.assertResponseNoErrors(self.persisted_query(self.query_hash))
+        self.assertEqual(document_backend.document_from_string.cache_info().hits, hits + 2)
+
+    def test_warm_up_prepares_persisted_queries(self):
+        document_backend.document_from_string.cache_clear()
+        # the connection of the test transaction must stay open
+        with patch('task.management.commands.serve.connections') as connections:
+            warm_up()
+        connections.close_all.assert_called_once_with()
+        self.assertResponseNoErrors(self.persisted_query(self.query_hash))
+        self.assertEqual(document_backend.document_from_string.cache_info().misses, 1)
+
+    @patch('task.management.commands.serve.ChronoApplication')
+    def test_serve_refuses_process_cache(self, ChronoApplication):
+        with self.assertRaises(CommandError):
+            call_command('serve', workers=2)
+        ChronoApplication.assert_not_called()
+        call_command('serve', workers=1)
+        ChronoApplication.return_value.run.assert_called_once_with()
+
+    @override_settings(CACHES={'default': {
+        'BACKEND': 'django.core.cache.backends.memcached.MemcachedCache',
+        'LOCATION': 'memcached:11211',
+    }})
+    @patch('task.management.commands.serve.ChronoApplication')
+    def test_serve_with_shared_cache(self, ChronoApplication):
+        call_command('serve', workers=2)
+        self.assertEqual(ChronoApplication.call_args[0][0]['workers'], 2)
+
+
+class TestQueryCost(ChronoGraphQLTestCase):
+    def setUp(self):
+        self.user = UserFactory.create()
+        self.force_login(self.user)
+        self.q = """
+            query TaskGroupList($first: Int!){
+                taskgroupList(first: $first) {
+                    id
+                    task {
+                        id
+                        timeentry {
+                            id
+                        }
+                    }
+                }
+            }
+        """
+
+    def test_cost_is_reported(self):
+        response = self.query(self.q, variables={'first': 2})
+        self.assertResponseNoErrors(response)
+        # 2 task groups, 50 tasks each, 50 time entries each
+        self.assertEqual(
+            json.loads(response.content)['extensions']['cost'],
+            {'depth': 4, 'cost': 1 + 2 + 2 + 2 * 50 + 2 * 50 + 2 * 50 * 50}
+        )
+
+    def test_list_requires_first(self):
+        response = self.query('''
+            query TaskGroupList{
+                taskgroupList {
+                    id
+                }
+            }
+        ''')
+        self.assertResponseHasErrors(response)
+        self.assertIn('"first"', json.loads(response.content)['errors'][0]['message'])
+
+    @override_settings(GRAPHQL_LIST_SIZE=2)
+    def test_related_list_is_cut_to_list_size(self):
+        TaskFactory.create_batch(3, task_group=TaskGroupFactory.create())
+        response = self.query('''
+            query TaskGroupList{
+                taskgroupList(first: 1) {
+                    id
+                    task {
+                        id
+                    }
+                }
+            }
+        ''')
+        self.assertResponseNoErrors(response)
+        content = json.loads(response.content)
+        self.assertEqual(len(content['data']['taskgroupList'][0]['task']), 2)
+        # 1 task group, cut to 2 tasks
+        self.assertEqual(content['extensions']['cost'], {'depth': 3, 'cost': 1 + 1 + 1 + 2})
+
+    def test_cost_budget(self):
+        response = self.query(self.q, variables={'first': 50})
+        self.assertResponseHasErrors(response)
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('exceeds the budget', json.loads(response.content)['errors'][0]['message'])
+
+    def test_depth_limit(self):
+        with override_settings(GRAPHQL_MAX_DEPTH=3):
+            response = self.query(self.q, variables={'first': 1})
+        self.assertResponseHasErrors(response)
+        self.assertEqual(
+            json.loads(response.content)['errors'][0]['message'],
+            'Query depth 4 exceeds the limit of 3'
+        )
+
+
+class TestRootFieldExecutor(ChronoGraphQLTestCase):
+    def info(self, path, selections=2, operation='query'):
+        return SimpleNamespace(
+            path=path,
+            operation=SimpleNamespace(
+                operation=operation,
+                selection_set=SimpleNamespace(selections=[None] * selections),
+            ),
+        )
+
+    def resolve(self, info):
+        executor = RootFieldExecutor()
+        promise = executor.execute(lambda root, info: threading.current_thread().name, None, info)
+        executor.wait_until_finished()
+        return Promise.resolve(promise).get()
+
+    def test_root_fields_resolve_in_pool(self):
+        with patch('chrono.executors.connection', SimpleNamespace(in_atomic_block=False)):
+            self.assertTrue(self.resolve(self.info(['a'])).startswith('graphql-resolver'))
+            # nested fields, single fields and mutations stay inline
+            self.assertEqual(self.resolve(self.info(['a', 'b'])), threading.current_thread().name)
+            self.assertEqual(self.resolve(self.info(['a'], selections=1)), threading.current_thread().name)
+            self.assertEqual(
+                self.resolve(self.info(['a'], operation='mutation')), threading.current_thread().name
+            )
+
+    def test_inline_in_transaction(self):
+        # the tests run in a transaction the pool connections cannot see
+        self.assertEqual(self.resolve(self.info(['a'])), threading.current_thread().name)
+
+    def test_errors_are_raised(self):
+        def fail(root, info):
+            raise ValueError('failed')
+
+        executor = RootFieldExecutor()
+        with patch('chrono.executors.connection', SimpleNamespace(in_atomic_block=False)):
+            promise = executor.execute(fail, None, self.info(['a']))
+        executor.wait_until_finished()
+        with self.assertRaises(ValueError):
+            promise.get()
+
+
+class TestConcurrentRootFields(TransactionTestCase):
+    """
+    A query with several top-level fields resolved in the pool threads,
+    outside of a transaction as in production
+    """
+
+    def setUp(self):
+        self.user = UserFactory.create()
+        project = ProjectFactory.create(
+            user_group=[UserGroupFactory.create(members=[self.user])]
+        )
+        task_group = TaskGroupFactory.create(project=project)
+        self.tasks = [
+            TaskFactory.create(user=self.user, task_group=task_group)
+            for _ in range(2)
+        ]
+        for task, (start, end) in zip(self.tasks, ((10, 12), (13, 14))):
+            TimeEntryFactory.create(
+                user=self.user,
+                task=task,
+                date=date.today(),
+                start_time=time(start, 0),
+                end_time=time(end, 0),
+            )
+        cache.clear()
+        self.client.force_login(self.user)
+        self.q = """
+            query Overview($user: ID){
+                dashboard {
+                    thisWeek {
+                        totalHours
+                    }
+                }
+                summaryWeekly {
+                    totalHoursWeekly
+                }
+                taskList(user: $user, first: 20) {
+                    id
+                }
+            }
+        """
+
+    def query(self, query, variables=None):
+        response = self.client.post(
+            ChronoGraphQLTestCase.GRAPHQL_URL,
+            json.dumps({'query': query, 'variables': variables}),
+            content_type='application/json',
+        )
+        return json.loads(response.content)
+
+    @staticmethod
+    def connections_in_use():
+        return sum(pool.stats()['in_use'] for pool in pools.values())
+
+    @override_settings(GRAPHQL_RESOLVER_THREADS=4)
+    def test_root_fields_resolve_concurrently(self):
+        connection.close()
+        in_use = self.connections_in_use()
+        with patch.object(resolver_pool, 'submit', wraps=resolver_pool.submit) as submit:
+            content = self.query(self.q, {'user': self.user.id})
+        self.assertNotIn('errors', content)
+        self.assertEqual(submit.call_count, 3)
+        # the request user is read in the pool threads
+        self.assertEqual(content['data']['dashboard']['thisWeek']['totalHours'], '3:00:00')
+        self.assertEqual(content['data']['summaryWeekly']['totalHoursWeekly'], '3:00:00')
+        self.assertEqual(
+            sorted(int(task['id']) for task in content['data']['taskList']),
+            sorted(task.id for task in self.tasks),
+        )
+        # the request and pool threads returned their connections
+        self.assertEqual(self.connections_in_use(), in_use)
+
+    @override_settings(GRAPHQL_RESOLVER_THREADS=4)
+    def test_errors_are_reported(self):
+        connection.close()
+        in_use = self.connections_in_use()
+        content = self.query("""
+            query Overview{
+                summaryWeekly {
+                    totalHoursWeekly
+                }
+                taskList(first: 1, after: "invalid") {
+                    id
+                }
+            }
+        """)
+        self.assertEqual(content['data']['summaryWeekly']['totalHoursWeekly'], '3:00:00')
+        self.assertIsNone(content['data']['taskList'])
+        self.assertEqual([error['message'] for error in content['errors']], ['Invalid cursor'])
+        self.assertEqual(self.connections_in_use(), in_use)
+
+
+class TestTracing(ChronoGraphQLTestCase):
+    def setUp(self):
+        self.user = UserFactory.create()
+        self.force_login(self.user)
+        project = ProjectFactory.create(
+            user_group=[UserGroupFactory.create(members=[self.user])]
+        )
+        TaskFactory.create(task_group=TaskGroupFactory.create(project=project))
+        self.q = """
+            query TaskList{
+                taskList(first: 20) {
+                    id
+                    taskGroup {
+                        id
+                    }
+                }
+            }
+        """
+        trace_file = tempfile.NamedTemporaryFile('r', suffix='.ndjson')
+        self.addCleanup(trace_file.close)
+        self.trace_file = trace_file.name
+        recent_traces.clear()
+
+    def test_sampled_operation_is_traced(self):
+        with override_settings(GRAPHQL_TRACE_SAMPLE_RATE=1, GRAPHQL_TRACE_FILE=self.trace_file):
+            self.assertResponseNoErrors(self.query(self.q, op_name='TaskList'))
+        with open(self.trace_file) as trace_file:
+            lines = trace_file.readlines()
+        self.assertEqual(len(lines), 1)
+        trace = json.loads(lines[0])['resourceSpans'][0]['scopeSpans'][0]['spans']
+        self.assertEqual(len({span['traceId'] for span in trace}), 1)
+        spans = {span['name']: span for span in trace}
+        attributes = {
+            name: {item['key']: list(item['value'].values())[0] for item in span['attributes']}
+            for name, span in spans.items()
+        }
+        self.assertNotIn('parentSpanId', spans['TaskList'])
+        self.assertEqual(spans['Query.taskList']['parentSpanId'], spans['TaskList']['spanId'])
+        # taskList.0.taskGroup is a child of taskList
+        self.assertEqual(spans['TaskListType.taskGroup']['parentSpanId'], spans['Query.taskList']['spanId'])
+        self.assertEqual(attributes['TaskListType.taskGroup']['graphql.field.path'], 'taskList.0.taskGroup')
+        self.assertGreater(int(attributes['Query.taskList']['db.sql.count']), 0)
+        self.assertEqual(attributes['TaskListType.id']['db.sql.count'], '0')
+        self.assertLessEqual(int(spans['TaskList']['startTimeUnixNano']), int(spans['Query.taskList']['startTimeUnixNano']))
+        self.assertEqual(len(recent_traces), 1)
+
+    def test_operation_is_not_sampled(self):
+        with override_settings(GRAPHQL_TRACE_SAMPLE_RATE=0, GRAPHQL_TRACE_FILE=self.trace_file):
+            self.assertResponseNoErrors(self.query(self.q, op_name='TaskList'))
+        with open(self.trace_file) as trace_file:
+            self.assertEqual(trace_file.read(), '')
+        self.assertEqual(len(recent_traces), 0)
@@ -1,3 +1,123 @@
-from django.shortcuts import render
+import csv
+import json
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
 
-# Create your views here.
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connection
+from django.http import HttpResponseBadRequest, HttpResponseForbidden, StreamingHttpResponse
+
+from task.filters import TimeEntryExportFilter
+from task.models import TimeEntry
+
+# rows fetched per round trip of the server-side cursor
+EXPORT_CHUNK_SIZE = 2000
+
+# (queryset lookup, exported column)
+EXPORT_FIELDS = (
+    ('id', 'id'),
+    ('date', 'date'),
+    ('start_time', 'start_time'),
+    ('end_time', 'end_time'),
+    ('description', 'description'),
+    ('user', 'user'),
+    ('user__email', 'user_email'),
+    ('task', 'task'),
+    ('task__title', 'task_title'),
+    ('task__task_group', 'task_group'),
+    ('task__task_group__title', 'task_group_title'),
+    ('task__task_group__project', 'project'),
+    ('task__task_group__project__title', 'project_title'),
+    ('task__task_group__project__client', 'client'),
+    ('task__task_group__project__client__name', 'client_name'),
+)
+
+
+class Echo:
+    """
+    File-like object handing back what is written, lets csv.writer
+    produce one row at a time for the streaming response
+    """
+
+    def write(self, value):
+        return value
+
+
+def iterate_in_thread(rows):
+    """
+    Iterate the rows in a thread of their own. Under ASGI the body of a
+    streaming response is consumed on the event loop, where the ORM refuses
+    to run, and the server-side cursor must stay on the connection of the
+    thread that opened it.
+    """
+    executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='export')
+
+    def fetch():
+        return list(islice(rows, EXPORT_CHUNK_SIZE))
+
+    def release():
+        try:
+            rows.close()
+        finally:
+            # the thread ends with the export, its connection is not reused
+            connection.close()
+
+    try:
+        while True:
+            chunk = executor.submit(fetch).result()
+            if not chunk:
+                return
+            yield from chunk
+    finally:
+        executor.submit(release).result()
+        executor.shutdown()
+
+
+def stream_csv(rows):
+    writer = csv.writer(Echo())
+    yield writer.writerow([column for _, column in EXPORT_FIELDS])
+    for row in rows:
+        yield writer.writerow(row)
+
+
+def stream_ndjson(rows):
+    columns = [column for _, column in EXPORT_FIELDS]
+    for row in rows:
+        yield json.dumps(dict(zip(columns, row)), cls=DjangoJSONEncoder) + '\n'
+
+
+EXPORT_FORMATS = {
+    'csv': (stream_csv, 'text/csv', 'csv'),
+    'ndjson': (stream_ndjson, 'application/x-ndjson', 'ndjson'),
+}
+
+
+def export_time_entries(request):
+    """
+    Streams the time entries accessible to the user, own entries and
+    entries of the projects of the user, as csv or ndjson.
+    Supports user, project, client, date_gte and date_lte filters.
+    """
+    user = request.user
+    if not user.is_authenticated:
+        return HttpResponseForbidden()
+    export_format = request.GET.get('format', 'csv')
+    if export_format not in EXPORT_FORMATS:
+        return HttpResponseBadRequest(f'Unsupported format {export_format}')
+
+    filterset = TimeEntryExportFilter(request.GET, queryset=TimeEntry.get_for(user))
+    if not filterset.is_valid():
+        return HttpResponseBadRequest(filterset.errors.as_json(),
+                                      content_type='application/json')
+
+    rows = filterset.qs.order_by('date', 'start_time', 'id').values_list(
+        *[lookup for lookup, _ in EXPORT_FIELDS]
+    ).iterator(chunk_size=EXPORT_CHUNK_SIZE)
+    # inside a transaction (ATOMIC_REQUESTS, tests) another connection would not see its rows
+    if not connection.in_atomic_block:
+        rows = iterate_in_thread(rows)
+
+    stream, content_type, extension = EXPORT_FORMATS[export_format]
+    response = StreamingHttpResponse(stream(rows), content_type=content_type)
+    response['Content-Disposition'] = f'attachment; filename="time-entries.{extension}"'
+    return response
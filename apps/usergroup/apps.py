@@ -3,3 +3,6 @@ from django.apps import AppConfig
 
 class UsergroupConfig(AppConfig):
     name = 'usergroup'
+
+    def ready(self):
+        import usergroup.signals  # noqa
@@ -21,7 +21,13 @@ class UserGroup(models.Model):
 
     @staticmethod
     def get_for(user):
-        return UserGroup.objects.filter(members=user).distinct()
+        from usergroup.scopes import get_scope_ids
+        return UserGroup.objects.filter(id__in=get_scope_ids(
+            user, 'usergroup',
+            lambda: UserGroup.objects.filter(
+                members=user
+            ).values_list('id', flat=True).distinct()
+        ))
 
 
 class GroupMember(models.Model):
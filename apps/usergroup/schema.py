@@ -3,6 +3,7 @@ from graphene_django import DjangoObjectType
 from graphene_django_extras import DjangoObjectField, DjangoObjectType
 
 from usergroup.models import UserGroup, GroupMember
+from utils.optimizer import optimize
 
 
 class UserGroupType(DjangoObjectType):
@@ -28,7 +29,7 @@ class Query(object):
     groupmember = graphene.Field(GroupMemberType)
 
     def resolve_groupslist(self, info, **kwargs):
-        return GroupMember.objects.all()
+        return optimize(GroupMember.objects.all(), info)
 
     def resolve_groups(self, info, **kwargs):
         id = kwargs.get('id')
@@ -0,0 +1,105 @@
+"""
+Ids of the projects, task groups and user groups accessible to a user.
+
+Scopes are memoized on the user object for the lifetime of the request
+and shared across requests through the cache, stored as packed sorted
+int arrays. Each user has a cache version which is replaced whenever
+a change of membership may alter their scopes, and the memos filled
+before a change made in the process, by the request itself, are dropped.
+"""
+from array import array
+from uuid import uuid4
+
+from django.core.cache import cache
+from django.db import transaction
+
+from usergroup.models import GroupMember
+
+SCOPE_CACHE_TIMEOUT = 60 * 60 * 24
+
+# replaced on every invalidation, a memo filled under another one is stale
+memo_generation = uuid4().hex
+
+
+def version_key(user_id):
+    return f'permission-scope-version:{user_id}'
+
+
+def get_version(user_id):
+    return cache.get_or_set(version_key(user_id), uuid4().hex, None)
+
+
+def pack_ids(ids):
+    return array('i', sorted(ids)).tobytes()
+
+
+def unpack_ids(data):
+    ids = array('i')
+    ids.frombytes(data)
+    return ids.tolist()
+
+
+def get_scope_ids(user, scope, fetch_ids):
+    """
+    Ids of the scope accessible to the user, fetch_ids is
+    only called when neither the request nor the cache has them
+    """
+    if not user.is_authenticated:
+        return []
+    generation, scopes = getattr(user, '_permission_scopes', (None, None))
+    if generation != memo_generation:
+        scopes = {}
+        user._permission_scopes = (memo_generation, scopes)
+    if scope not in scopes:
+        key = f'permission-scope:{scope}:{user.pk}:{get_version(user.pk)}'
+        data = cache.get(key)
+        if data is None:
+            data = pack_ids(fetch_ids())
+            cache.set(key, data, SCOPE_CACHE_TIMEOUT)
+        scopes[scope] = unpack_ids(data)
+    return scopes[scope]
+
+
+def invalidate_users(user_ids):
+    """
+    Drop the cached scopes of the users, again once the transaction
+    commits so a concurrent request cannot cache the old memberships
+    """
+    def replace_versions():
+        global memo_generation
+        memo_generation = uuid4().hex
+        cache.set_many({
+            version_key(user_id): uuid4().hex
+            for user_id in user_ids
+        }, None)
+
+    user_ids = set(user_ids)
+    if user_ids:
+        replace_versions()
+        transaction.on_commit(replace_versions)
+
+
+def invalidate_groups(group_ids):
+    """
+    Drop the cached scopes of the members of the groups
+    """
+    if group_ids:
+        invalidate_users(GroupMember.objects.filter(
+            group__in=group_ids
+        ).values_list('member', flat=True))
+
+
+def group_access_changed(instance, action, reverse, pk_set, field_name):
+    """
+    m2m_changed handler for the user_group field of a model,
+    the members of the added or removed groups are invalidated
+    """
+    if action not in ('post_add', 'post_remove', 'pre_clear'):
+        return
+    if reverse:
+        # instance is the group
+        invalidate_groups([instance.pk])
+    elif action == 'pre_clear':
+        invalidate_groups(getattr(instance, field_name).values_list('pk', flat=True))
+    else:
+        invalidate_groups(pk_set)
@@ -0,0 +1,24 @@
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+
+from usergroup.models import GroupMember, UserGroup
+from usergroup.scopes import invalidate_users
+
+
+@receiver(post_save, sender=GroupMember)
+@receiver(post_delete, sender=GroupMember)
+def group_member_changed(sender, instance, **kwargs):
+    invalidate_users([instance.member_id])
+
+
+@receiver(m2m_changed, sender=UserGroup.members.through)
+def group_members_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    if action not in ('post_add', 'post_remove', 'pre_clear'):
+        return
+    if reverse:
+        # instance is the member
+        invalidate_users([instance.pk])
+    elif action == 'pre_clear':
+        invalidate_users(instance.members.values_list('pk', flat=True))
+    else:
+        invalidate_users(pk_set)
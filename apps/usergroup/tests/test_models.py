@@ -0,0 +1,73 @@
+from project.models import Project
+from user.models import User
+from task.models import TaskGroup
+from usergroup.models import GroupMember, UserGroup
+from utils.factories import (
+    ProjectFactory,
+    TaskGroupFactory,
+    UserFactory,
+    UserGroupFactory,
+)
+from utils.tests import ChronoGraphQLTestCase
+
+
+class TestPermissionScopes(ChronoGraphQLTestCase):
+    def setUp(self):
+        self.user = UserFactory.create()
+        self.user_group = UserGroupFactory.create(
+            members=[self.user]
+        )
+        self.project = ProjectFactory.create(
+            user_group=[self.user_group]
+        )
+        self.task_group = TaskGroupFactory.create()
+        self.task_group.user_group.add(self.user_group)
+
+    def get_scopes(self, user=None):
+        # a fresh user object, as in a new request, only shares the cache
+        user = user or User.objects.get(pk=self.user.pk)
+        return (
+            set(Project.get_for(user)),
+            set(TaskGroup.get_for(user)),
+            set(UserGroup.get_for(user)),
+        )
+
+    def test_scopes_are_memoized(self):
+        self.assertEqual(self.get_scopes(), (
+            {self.project}, {self.task_group}, {self.user_group},
+        ))
+        # only the final queries, the ids come from the cache
+        user = User.objects.get(pk=self.user.pk)
+        with self.assertNumQueries(3):
+            self.get_scopes(user)
+        # and from the user object within a request
+        with self.assertNumQueries(0):
+            Project.get_ids_for(user)
+
+    def test_memo_follows_memberships_within_request(self):
+        # one user object, as within a request running a mutation
+        user = User.objects.get(pk=self.user.pk)
+        self.assertEqual(self.get_scopes(user)[0], {self.project})
+        other_project = ProjectFactory.create()
+        other_project.user_group.add(self.user_group)
+        self.assertEqual(self.get_scopes(user)[0], {self.project, other_project})
+
+        GroupMember.objects.filter(member=self.user).delete()
+        self.assertEqual(self.get_scopes(user), (set(), set(), set()))
+
+    def test_scopes_follow_memberships(self):
+        self.get_scopes()
+        other_project = ProjectFactory.create()
+        other_project.user_group.add(self.user_group)
+        self.assertEqual(self.get_scopes()[0], {self.project, other_project})
+
+        self.project.user_group.remove(self.user_group)
+        self.assertEqual(self.get_scopes()[0], {other_project})
+
+        GroupMember.objects.filter(member=self.user).delete()
+        self.assertEqual(self.get_scopes(), (set(), set(), set()))
+
+        GroupMember.objects.create(member=self.user, group=self.user_group)
+        self.assertEqual(self.get_scopes(), (
+            {other_project}, {self.task_group}, {self.user_group},
+        ))
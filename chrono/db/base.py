@@ -0,0 +1,88 @@
+import threading
+
+from django.db.backends.postgresql import base, creation
+
+from chrono.db.pool import ConnectionPool
+
+# one pool per database of the worker process
+pools = {}
+pools_lock = threading.Lock()
+
+
+def close_pools():
+    for pool in list(pools.values()):
+        pool.close()
+
+
+class DatabaseCreation(creation.DatabaseCreation):
+    def _destroy_test_db(self, test_database_name, verbosity):
+        # the idle connections of the pool would keep the test database open
+        close_pools()
+        super()._destroy_test_db(test_database_name, verbosity)
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    """
+    The postgresql backend, taking its connections from a pool shared by
+    the threads of the process when `POOL['MAX_SIZE']` is set. Closing the
+    connection, at the end of a request with CONN_MAX_AGE=0, returns it to
+    the pool.
+    """
+
+    creation_class = DatabaseCreation
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.pool = None
+
+    def get_pool(self, conn_params):
+        options = self.settings_dict.get('POOL') or {}
+        if not options.get('MAX_SIZE'):
+            return None
+        key = (self.alias, repr(sorted(conn_params.items())), repr(sorted(options.items())))
+        with pools_lock:
+            if key not in pools:
+                isolation_level = self.settings_dict['OPTIONS'].get('isolation_level')
+
+                def connect():
+                    connection = base.Database.connect(**conn_params)
+                    if isolation_level is not None and isolation_level != connection.isolation_level:
+                        connection.set_session(isolation_level=isolation_level)
+                    return connection
+
+                pools[key] = ConnectionPool(
+                    connect,
+                    max_size=options['MAX_SIZE'],
+                    idle_timeout=options.get('IDLE_TIMEOUT', 300),
+                    timeout=options.get('TIMEOUT', 10),
+                    health_check=options.get('HEALTH_CHECK', True),
+                )
+            return pools[key]
+
+    def get_new_connection(self, conn_params):
+        pool = self.get_pool(conn_params)
+        if pool is None:
+            return super().get_new_connection(conn_params)
+        connection = pool.get()
+        self.pool = pool
+        # set by the postgresql backend before autocommit overrides it
+        self.isolation_level = self.settings_dict['OPTIONS'].get('isolation_level', connection.isolation_level)
+        return connection
+
+    def _close(self):
+        if self.connection is None or self.pool is None:
+            return super()._close()
+        pool, self.pool = self.pool, None
+        with self.wrap_database_errors:
+            if self.in_atomic_block:
+                # the wrapper keeps the closed connection until the block ends
+                pool.discard(self.connection)
+            else:
+                pool.put(self.connection)
+
+    @property
+    def _nodb_connection(self):
+        # short-lived and never closed, not taken from the pool
+        connection = super()._nodb_connection
+        connection.settings_dict['POOL'] = None
+        return connection
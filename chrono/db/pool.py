@@ -0,0 +1,160 @@
+import os
+import threading
+import time
+from collections import deque
+
+import psycopg2
+from psycopg2.extensions import TRANSACTION_STATUS_IDLE
+
+
+class ConnectionPool:
+    """
+    Thread-safe pool of the connections to one database, shared by the
+    request and resolver threads of a worker process.
+
+    At most `max_size` connections are open; a checkout waits up to
+    `timeout` seconds for one to be returned. Connections idle for more
+    than `idle_timeout` seconds are closed, and with `health_check` a
+    connection is tested before it is handed out again.
+    """
+
+    def __init__(self, connect, max_size, idle_timeout=300, timeout=10, health_check=True):
+        self.connect = connect
+        self.max_size = max_size
+        self.idle_timeout = idle_timeout
+        self.timeout = timeout
+        self.health_check = health_check
+        self.condition = threading.Condition()
+        self.reset()
+
+    def reset(self):
+        self.pid = os.getpid()
+        # (connection, returned at), the most recently returned last
+        self.idle = deque()
+        # open connections, idle or checked out
+        self.size = 0
+        self.waiting = 0
+        self.metrics = dict.fromkeys(
+            ('checkouts', 'connects', 'discards', 'waits', 'timeouts', 'max_waiting'), 0
+        )
+        self.metrics['wait_time'] = 0.0
+
+    def stats(self):
+        with self.condition:
+            return {
+                'size': self.size,
+                'idle': len(self.idle),
+                'in_use': self.size - len(self.idle),
+                'waiting': self.waiting,
+                **self.metrics,
+            }
+
+    def get(self):
+        while True:
+            connection = self.checkout()
+            if connection is None:
+                try:
+                    connection = self.connect()
+                except Exception:
+                    self.release_slot()
+                    raise
+                with self.condition:
+                    self.metrics['connects'] += 1
+                return connection
+            if not self.health_check or self.is_usable(connection):
+                return connection
+            self.discard(connection)
+
+    def checkout(self):
+        """
+        Take the most recently returned idle connection, or reserve a slot
+        for a new one (None), waiting while the pool is exhausted.
+        """
+        with self.condition:
+            if self.pid != os.getpid():
+                # forked, the connections belong to the parent process
+                self.reset()
+            self.metrics['checkouts'] += 1
+            waited_since = None
+            try:
+                while True:
+                    self.close_expired()
+                    if self.idle:
+                        return self.idle.pop()[0]
+                    if self.size < self.max_size:
+                        self.size += 1
+                        return None
+                    now = time.monotonic()
+                    if waited_since is None:
+                        waited_since = now
+                        self.metrics['waits'] += 1
+                    remaining = waited_since + self.timeout - now
+                    if remaining <= 0:
+                        self.metrics['timeouts'] += 1
+                        raise psycopg2.OperationalError(
+                            f'No database connection available after {self.timeout}s, '
+                            f'all {self.max_size} are in use'
+                        )
+                    self.waiting += 1
+                    self.metrics['max_waiting'] = max(self.metrics['max_waiting'], self.waiting)
+                    try:
+                        self.condition.wait(remaining)
+                    finally:
+                        self.waiting -= 1
+            finally:
+                if waited_since is not None:
+                    self.metrics['wait_time'] += time.monotonic() - waited_since
+
+    def put(self, connection):
+        if self.pid != os.getpid():
+            return
+        if not connection.closed and connection.get_transaction_status() != TRANSACTION_STATUS_IDLE:
+            try:
+                connection.rollback()
+            except psycopg2.Error:
+                pass
+        if connection.closed or connection.get_transaction_status() != TRANSACTION_STATUS_IDLE:
+            self.discard(connection)
+            return
+        with self.condition:
+            self.idle.append((connection, time.monotonic()))
+            self.condition.notify()
+
+    def discard(self, connection):
+        try:
+            connection.close()
+        finally:
+            self.release_slot(discarded=True)
+
+    def release_slot(self, discarded=False):
+        with self.condition:
+            self.size -= 1
+            self.metrics['discards'] += discarded
+            self.condition.notify()
+
+    def close_expired(self):
+        expired = time.monotonic() - self.idle_timeout
+        while self.idle and self.idle[0][1] < expired:
+            self.idle.popleft()[0].close()
+            self.size -= 1
+
+    def close(self):
+        """
+        Close the idle connections, before forking or dropping the database.
+        """
+        with self.condition:
+            if self.pid != os.getpid():
+                self.reset()
+            while self.idle:
+                self.idle.popleft()[0].close()
+                self.size -= 1
+
+    def is_usable(self, connection):
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute('SELECT 1')
+            if connection.get_transaction_status() != TRANSACTION_STATUS_IDLE:
+                connection.rollback()
+        except psycopg2.Error:
+            return False
+        return True
@@ -0,0 +1,64 @@
+from concurrent.futures import ThreadPoolExecutor, wait
+
+from django.conf import settings
+from django.db import close_old_connections, connection
+from promise import Promise
+
+# shared by the requests of the worker process, bounding its database work
+resolver_pool = ThreadPoolExecutor(
+    max_workers=settings.GRAPHQL_RESOLVER_THREADS or 1,
+    thread_name_prefix='graphql-resolver',
+)
+
+
+def resolve_in_pool(fn, args, kwargs):
+    try:
+        return fn(*args, **kwargs)
+    finally:
+        # the pool threads outlive the request, release expired connections
+        close_old_connections()
+
+
+class RootFieldExecutor:
+    """
+    Executor resolving the top-level fields of a query concurrently in the
+    resolver pool, so their aggregates overlap instead of adding up. Nested
+    fields and mutations are resolved inline, and so is everything inside a
+    transaction, which the connections of the pool could not see.
+    """
+
+    def __init__(self):
+        self.pending = []
+
+    def wait_until_finished(self):
+        # the promises are settled in the request thread, where the
+        # nested fields of the results are then resolved
+        while self.pending:
+            pending = self.pending
+            self.pending = []
+            wait([future for future, _ in pending])
+            for future, promise in pending:
+                if future.exception() is not None:
+                    promise.do_reject(future.exception())
+                else:
+                    promise.do_resolve(future.result())
+
+    def clean(self):
+        self.pending = []
+
+    def is_concurrent(self, info):
+        return (
+            settings.GRAPHQL_RESOLVER_THREADS
+            and info.operation.operation == 'query'
+            and len(info.path) == 1
+            and len(info.operation.selection_set.selections) > 1
+            and not connection.in_atomic_block
+        )
+
+    def execute(self, fn, *args, **kwargs):
+        info = args[1] if len(args) > 1 else None
+        if info is None or not self.is_concurrent(info):
+            return fn(*args, **kwargs)
+        promise = Promise()
+        self.pending.append((resolver_pool.submit(resolve_in_pool, fn, args, kwargs), promise))
+        return promise
@@ -0,0 +1,147 @@
+from django.conf import settings
+from django.db.models import Manager
+from graphql.language import ast
+from graphql.type import GraphQLList, GraphQLNonNull
+from graphql.type.definition import GraphQLInterfaceType, GraphQLObjectType
+from promise import Promise, is_thenable
+
+from utils.pagination import page_size
+
+
+def is_model_type(graphql_type):
+    graphene_type = getattr(graphql_type, 'graphene_type', None)
+    return getattr(getattr(graphene_type, '_meta', None), 'model', None) is not None
+
+
+class QueryCost:
+    """
+    Static depth and cost of an operation: every field costs one per
+    object it is resolved for, and a list of model objects multiplies the
+    cost of its selection by its `first` argument, or by list_size for the
+    lists taking no `first`, such as the related objects of a model, which
+    ListSizeMiddleware cuts to that size. Lists of computed objects, such
+    as errors or days, are bounded and count once. Introspection fields
+    are free.
+    """
+
+    def __init__(self, schema, document_ast, list_size, operation_name=None, variables=None):
+        self.schema = schema
+        self.list_size = list_size
+        self.variables = variables or {}
+        self.fragments = {}
+        self.operation = None
+        for definition in document_ast.definitions:
+            if isinstance(definition, ast.FragmentDefinition):
+                self.fragments[definition.name.value] = definition
+            elif isinstance(definition, ast.OperationDefinition):
+                if not operation_name or (definition.name and definition.name.value == operation_name):
+                    self.operation = self.operation or definition
+        self.depth = 0
+        self.cost = 0
+        if self.operation:
+            root_type = {
+                'query': schema.get_query_type,
+                'mutation': schema.get_mutation_type,
+                'subscription': schema.get_subscription_type,
+            }[self.operation.operation]()
+            self.cost = self.measure(self.operation.selection_set, root_type, 1, 1)
+
+    def get_list_size(self, field_node):
+        for argument in field_node.arguments:
+            if argument.name.value != 'first':
+                continue
+            value = argument.value
+            if isinstance(value, ast.Variable):
+                value = self.variables.get(value.name.value)
+            elif isinstance(value, ast.IntValue):
+                value = int(value.value)
+            if isinstance(value, int) and value >= 0:
+                return page_size(value)
+        return self.list_size
+
+    def get_fields(self, selection_set, parent_type):
+        for selection in selection_set.selections:
+            if isinstance(selection, ast.Field):
+                yield selection, parent_type
+            else:
+                if isinstance(selection, ast.FragmentSpread):
+                    selection = self.fragments.get(selection.name.value)
+                    if selection is None:
+                        continue
+                if selection.type_condition:
+                    parent_type = self.schema.get_type(selection.type_condition.name.value)
+                yield from self.get_fields(selection.selection_set, parent_type)
+
+    def measure(self, selection_set, parent_type, multiplier, depth):
+        self.depth = max(self.depth, depth)
+        cost = 0
+        for field_node, field_parent_type in self.get_fields(selection_set, parent_type):
+            name = field_node.name.value
+            if name.startswith('__'):
+                continue
+            cost += multiplier
+            if not field_node.selection_set:
+                continue
+            if not isinstance(field_parent_type, (GraphQLObjectType, GraphQLInterfaceType)):
+                continue
+            field = field_parent_type.fields.get(name)
+            if field is None:
+                continue
+            field_type = field.type
+            if isinstance(field_type, GraphQLNonNull):
+                field_type = field_type.of_type
+            is_list = isinstance(field_type, GraphQLList)
+            while isinstance(field_type, (GraphQLNonNull, GraphQLList)):
+                field_type = field_type.of_type
+            child_multiplier = multiplier
+            if is_list and is_model_type(field_type):
+                child_multiplier *= self.get_list_size(field_node)
+            cost += self.measure(field_node.selection_set, field_type, child_multiplier, depth + 1)
+        return cost
+
+
+def is_model_list(field):
+    """
+    Whether the field is a list of model objects taking no `first`, counted
+    as list_size objects by QueryCost
+    """
+    field_type = field.type
+    if isinstance(field_type, GraphQLNonNull):
+        field_type = field_type.of_type
+    if not isinstance(field_type, GraphQLList) or 'first' in field.args:
+        return False
+    while isinstance(field_type, (GraphQLNonNull, GraphQLList)):
+        field_type = field_type.of_type
+    return is_model_type(field_type)
+
+
+class ListSizeMiddleware:
+    """
+    Graphene middleware cutting the lists of model objects taking no
+    `first`, such as `taskgroup { task }`, to GRAPHQL_LIST_SIZE objects, so
+    the cost QueryCost counts for them bounds what is resolved. A queryset
+    not yet loaded is limited in SQL.
+    """
+
+    def __init__(self):
+        # (type name, field name): whether the field is cut
+        self.fields = {}
+
+    def resolve(self, next, root, info, **args):
+        key = (info.parent_type.name, info.field_name)
+        if key not in self.fields:
+            self.fields[key] = is_model_list(info.parent_type.fields[info.field_name])
+        result = next(root, info, **args)
+        if not self.fields[key]:
+            return result
+        if is_thenable(result):
+            return Promise.resolve(result).then(self.cut)
+        return self.cut(result)
+
+    @staticmethod
+    def cut(objects):
+        if isinstance(objects, Manager):
+            objects = objects.all()
+        if objects is None:
+            return None
+        return objects[:settings.GRAPHQL_LIST_SIZE]
@@ -1,5 +1,7 @@
 import graphene
 
+# registers the converter of the reverse relations before the types are built
+import utils.optimizer  # noqa
 from user import schema as user_schema, mutations as user_mutations
 from usergroup import schema as usergroup_schema, mutations as usergroup_mutations
 from task import schema as task_schema, mutations as task_mutations
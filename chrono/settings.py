@@ -59,6 +59,7 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',
 
 ] + THIRD_PARTY_APPS + [
     f'{APPS_DIR_NAME}.{app}.apps.{"".join([word.title() for word in app.split("_")])}Config' for app in LOCAL_APPS
@@ -67,6 +68,7 @@ INSTALLED_APPS = [
 
 
 MIDDLEWARE = [
+    'utils.middlewares.ReleaseConnectionMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -100,18 +102,40 @@ WSGI_APPLICATION = 'chrono.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/3.0/ref/settings/#databases
 
+# chrono.db is the postgresql backend with a connection pool per worker
+# process, closed connections (at the end of each request with
+# CONN_MAX_AGE=0) go back to the pool, DATABASE_POOL_SIZE=0 disables it
 DATABASES = {
     'default': {
-        'ENGINE': 'django.db.backends.postgresql',
+        'ENGINE': 'chrono.db',
         'NAME': os.environ.get('DATABASE_NAME', 'postgres'),
         'USER': os.environ.get('DATABASE_USER', 'postgres'),
         'PASSWORD': os.environ.get('DATABASE_PASSWORD', 'postgres'),
         'PORT': os.environ.get('DATABASE_PORT', '5432'),
         'HOST': os.environ.get('DATABASE_HOST', 'db'),
+        'CONN_MAX_AGE': int(os.environ.get('DATABASE_CONN_MAX_AGE', 0)),
+        'POOL': {
+            'MAX_SIZE': int(os.environ.get('DATABASE_POOL_SIZE', 20)),
+            'IDLE_TIMEOUT': int(os.environ.get('DATABASE_POOL_IDLE_TIMEOUT', 300)),
+            # seconds a checkout waits while all connections are in use
+            'TIMEOUT': int(os.environ.get('DATABASE_POOL_TIMEOUT', 10)),
+            'HEALTH_CHECK': os.environ.get('DATABASE_POOL_HEALTH_CHECK', 'true') == 'true',
+        },
     }
 }
 
-   
+
+# Cache, shared by the workers when pointed to memcached/redis. The default
+# is local to each process, `manage.py serve` refuses it with more than one
+# worker as they would keep serving results another one invalidated
+# https://docs.djangoproject.com/en/3.0/topics/cache/
+
+CACHES = {
+    'default': {
+        'BACKEND': os.environ.get('CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': os.environ.get('CACHE_LOCATION', ''),
+    }
+}
 
 
 # Password validation
@@ -162,6 +186,8 @@ GRAPHENE = {
     'SCHEMA_INDENT': 2,  # Defaults to None (displays all data on a single line)
     'MIDDLEWARE': (
         # 'utils.middlewares.AuthorizationMiddleware',
+        'utils.middlewares.TracingMiddleware',
+        'chrono.query_cost.ListSizeMiddleware',
     ),
 }
 
@@ -173,8 +199,46 @@ GRAPHENE_DJANGO_EXTRAS = {
     # 'CACHE_TIMEOUT': 300    # seconds
 }
 
+# `manage.py serve`, a worker is replaced after SERVER_MAX_REQUESTS requests
+# (plus up to SERVER_MAX_REQUESTS_JITTER) and gets SERVER_GRACEFUL_TIMEOUT
+# seconds to finish its requests on reload or shutdown
+SERVER_BIND = os.environ.get('SERVER_BIND', '0.0.0.0:9000')
+SERVER_WORKERS = int(os.environ.get('SERVER_WORKERS', 2 * os.cpu_count() + 1))
+SERVER_MAX_REQUESTS = int(os.environ.get('SERVER_MAX_REQUESTS', 1000))
+SERVER_MAX_REQUESTS_JITTER = int(os.environ.get('SERVER_MAX_REQUESTS_JITTER', 100))
+SERVER_TIMEOUT = int(os.environ.get('SERVER_TIMEOUT', 30))
+SERVER_GRACEFUL_TIMEOUT = int(os.environ.get('SERVER_GRACEFUL_TIMEOUT', 30))
+
+# Threads of each worker process resolving the top-level fields of a
+# query concurrently, 0 resolves them one after another
+GRAPHQL_RESOLVER_THREADS = int(os.environ.get('GRAPHQL_RESOLVER_THREADS', 4))
+
+# Share of the GraphQL operations traced, a span per resolved field with its
+# duration and SQL, kept in a buffer of the worker process and appended as
+# OpenTelemetry (OTLP) JSON lines to GRAPHQL_TRACE_FILE when set
+GRAPHQL_TRACE_SAMPLE_RATE = float(os.environ.get('GRAPHQL_TRACE_SAMPLE_RATE', 0))
+GRAPHQL_TRACE_BUFFER_SIZE = int(os.environ.get('GRAPHQL_TRACE_BUFFER_SIZE', 100))
+GRAPHQL_TRACE_FILE = os.environ.get('GRAPHQL_TRACE_FILE', '')
+
+# Parsed and validated documents kept by each worker process
+GRAPHQL_DOCUMENT_CACHE_SIZE = int(os.environ.get('GRAPHQL_DOCUMENT_CACHE_SIZE', 256))
+
+# Budgets of a GraphQL operation, checked before it is executed,
+# a list of related objects, which takes no `first` argument, is counted as
+# GRAPHQL_LIST_SIZE items and cut to that size when resolved
+GRAPHQL_MAX_DEPTH = int(os.environ.get('GRAPHQL_MAX_DEPTH', 10))
+GRAPHQL_MAX_COST = int(os.environ.get('GRAPHQL_MAX_COST', 20000))
+GRAPHQL_LIST_SIZE = int(os.environ.get('GRAPHQL_LIST_SIZE', 50))
+
+# Manifest of the persisted queries, {sha256 hash of the document: document},
+# strict mode rejects every document not in it
+GRAPHQL_PERSISTED_QUERIES = os.environ.get(
+    'GRAPHQL_PERSISTED_QUERIES', os.path.join(BASE_DIR, 'persisted_queries.json')
+)
+GRAPHQL_PERSISTED_QUERIES_STRICT = os.environ.get('GRAPHQL_PERSISTED_QUERIES_STRICT') == 'true'
+
 if DEBUG:
-    GRAPHENE['MIDDLEWARE'] = (
+    GRAPHENE['MIDDLEWARE'] += (
         'graphene_django.debug.DjangoDebugMiddleware',
     )
 
@@ -0,0 +1,138 @@
+import json
+import os
+import random
+import threading
+import time
+from collections import deque
+
+from django.conf import settings
+
+# the traces of the worker process, most recent last
+recent_traces = deque(maxlen=settings.GRAPHQL_TRACE_BUFFER_SIZE)
+trace_file_lock = threading.Lock()
+
+SPAN_KIND_INTERNAL = 1
+SPAN_KIND_SERVER = 2
+STATUS_CODE_ERROR = 2
+
+
+def attribute(key, value):
+    if isinstance(value, bool):
+        return {'key': key, 'value': {'boolValue': value}}
+    if isinstance(value, int):
+        return {'key': key, 'value': {'intValue': str(value)}}
+    if isinstance(value, float):
+        return {'key': key, 'value': {'doubleValue': value}}
+    return {'key': key, 'value': {'stringValue': str(value)}}
+
+
+class Span:
+    __slots__ = ('name', 'kind', 'span_id', 'parent_id', 'start', 'end', 'attributes', 'error', 'sql_count', 'sql_time')
+
+    def __init__(self, name, parent_id=None, kind=SPAN_KIND_INTERNAL, **attributes):
+        self.name = name
+        self.kind = kind
+        self.span_id = os.urandom(8).hex()
+        self.parent_id = parent_id
+        self.attributes = attributes
+        self.error = False
+        self.sql_count = 0
+        self.sql_time = 0
+        self.end = None
+        self.start = time.time_ns()
+
+    def finish(self, error=False):
+        self.end = time.time_ns()
+        self.error = error
+
+    def record_sql(self, execute, sql, params, many, context):
+        # installed with connection.execute_wrapper, so it also counts the
+        # queries of the nested fields resolved meanwhile
+        start = time.perf_counter_ns()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.sql_count += 1
+            self.sql_time += time.perf_counter_ns() - start
+
+    def to_otlp(self, trace_id):
+        span = {
+            'traceId': trace_id,
+            'spanId': self.span_id,
+            'name': self.name,
+            'kind': self.kind,
+            'startTimeUnixNano': str(self.start),
+            'endTimeUnixNano': str(self.end or self.start),
+            'attributes': [
+                *(attribute(key, value) for key, value in self.attributes.items()),
+                attribute('db.sql.count', self.sql_count),
+                attribute('db.sql.time_ms', self.sql_time / 1000000),
+            ],
+        }
+        if self.parent_id:
+            span['parentSpanId'] = self.parent_id
+        if self.error:
+            span['status'] = {'code': STATUS_CODE_ERROR}
+        return span
+
+
+class Trace:
+    """
+    Spans of one GraphQL operation: the operation and each resolved field,
+    a field is the child of the field it was resolved for.
+    """
+
+    def __init__(self, operation_name):
+        self.trace_id = os.urandom(16).hex()
+        self.root = Span(
+            operation_name or 'graphql', kind=SPAN_KIND_SERVER,
+            **{'graphql.operation.name': operation_name or ''},
+        )
+        self.spans = [self.root]
+        # field path (without list indices) -> span id
+        self.span_ids = {}
+
+    def start_span(self, info):
+        path = tuple(info.path)
+        parent = path[:-1]
+        while parent and isinstance(parent[-1], int):
+            parent = parent[:-1]
+        span = Span(
+            f'{info.parent_type.name}.{info.field_name}',
+            parent_id=self.span_ids.get(parent, self.root.span_id),
+            **{'graphql.field.path': '.'.join(map(str, path)), 'graphql.field.type': str(info.return_type)},
+        )
+        self.span_ids[path] = span.span_id
+        # resolvers of the top-level fields run in other threads, list.append is atomic
+        self.spans.append(span)
+        return span
+
+    def to_otlp(self):
+        return {
+            'resourceSpans': [{
+                'resource': {'attributes': [attribute('service.name', 'chrono')]},
+                'scopeSpans': [{
+                    'scope': {'name': 'chrono.graphql'},
+                    'spans': [span.to_otlp(self.trace_id) for span in self.spans],
+                }],
+            }],
+        }
+
+
+def start_trace(operation_name):
+    """
+    A trace for a sampled operation, None for the others.
+    """
+    if random.random() < settings.GRAPHQL_TRACE_SAMPLE_RATE:
+        return Trace(operation_name)
+    return None
+
+
+def finish_trace(trace, result):
+    trace.root.finish(error=bool(result and result.errors))
+    recent_traces.append(trace)
+    if settings.GRAPHQL_TRACE_FILE:
+        line = json.dumps(trace.to_otlp(), separators=(',', ':')) + '\n'
+        # one write per trace, appended whole when several workers share the file
+        with trace_file_lock, open(settings.GRAPHQL_TRACE_FILE, 'a') as trace_file:
+            trace_file.write(line)
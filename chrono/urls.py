@@ -17,14 +17,17 @@ from django.contrib import admin
 from django.urls import path
 from django.views.decorators.csrf import csrf_exempt
 #from graphene_django.views import GraphQLView
-from graphene_file_upload.django import FileUploadGraphQLView
 
-FileUploadGraphQLView.graphiql_template = "graphene_graphiql_explorer/graphiql.html"
+from chrono.views import ChronoGraphQLView
+from task.views import export_time_entries
+
+ChronoGraphQLView.graphiql_template = "graphene_graphiql_explorer/graphiql.html"
 
 
 urlpatterns = [
     path('admin/', admin.site.urls),
-    path('graphiql', csrf_exempt(FileUploadGraphQLView.as_view(graphiql=True))),
-    path('graphql', csrf_exempt(FileUploadGraphQLView.as_view())),
+    path('graphiql', csrf_exempt(ChronoGraphQLView.as_view(graphiql=True))),
+    path('graphql', csrf_exempt(ChronoGraphQLView.as_view())),
+    path('export/time-entries', export_time_entries),
 ]
    
\ No newline at end of file
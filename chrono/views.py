@@ -0,0 +1,152 @@
+import hashlib
+import json
+from functools import lru_cache, partial
+
+from django.conf import settings
+from django.http import HttpResponseBadRequest, HttpResponseForbidden
+from graphene_django.views import HttpError
+from graphene_file_upload.django import FileUploadGraphQLView
+from graphql.backend.base import GraphQLDocument
+from graphql.backend.core import GraphQLCoreBackend
+from graphql.error import GraphQLError
+from graphql.execution import ExecutionResult, execute
+from graphql.language.base import parse
+from graphql.validation import validate
+
+from chrono.executors import RootFieldExecutor
+from chrono.query_cost import QueryCost
+from chrono.tracing import finish_trace, start_trace
+
+
+def execute_validated(validation_errors, schema, document_ast, *args, **kwargs):
+    if validation_errors:
+        return ExecutionResult(errors=validation_errors, invalid=True)
+
+    query_cost = QueryCost(
+        schema, document_ast, settings.GRAPHQL_LIST_SIZE,
+        kwargs.get('operation_name'), kwargs.get('variable_values'),
+    )
+    extensions = {'cost': {'depth': query_cost.depth, 'cost': query_cost.cost}}
+    errors = []
+    if query_cost.depth > settings.GRAPHQL_MAX_DEPTH:
+        errors.append(GraphQLError(
+            f'Query depth {query_cost.depth} exceeds the limit of {settings.GRAPHQL_MAX_DEPTH}'
+        ))
+    if query_cost.cost > settings.GRAPHQL_MAX_COST:
+        errors.append(GraphQLError(
+            f'Query cost {query_cost.cost} exceeds the budget of {settings.GRAPHQL_MAX_COST}'
+        ))
+    if errors:
+        return ExecutionResult(errors=errors, invalid=True, extensions=extensions)
+
+    result = execute(schema, document_ast, *args, **kwargs)
+    result.extensions.update(extensions)
+    return result
+
+
+class CachedDocumentBackend(GraphQLCoreBackend):
+    """
+    Parses and validates each document once, keeping the documents
+    most recently used by the worker process
+    """
+
+    def __init__(self, maxsize, executor=None):
+        super().__init__(executor)
+        self.document_from_string = lru_cache(maxsize=maxsize)(self.build_document)
+
+    def build_document(self, schema, document_string):
+        document_ast = parse(document_string)
+        return GraphQLDocument(
+            schema=schema,
+            document_string=document_string,
+            document_ast=document_ast,
+            execute=partial(
+                execute_validated,
+                validate(schema, document_ast),
+                schema,
+                document_ast,
+                **self.execute_params
+            ),
+        )
+
+
+document_backend = CachedDocumentBackend(settings.GRAPHQL_DOCUMENT_CACHE_SIZE)
+
+
+def get_query_hash(query):
+    return hashlib.sha256(query.encode()).hexdigest()
+
+
+@lru_cache(maxsize=None)
+def load_persisted_queries(path):
+    """
+    Registered documents by the sha256 hash of their text, read from
+    the manifest once per worker process
+    """
+    try:
+        with open(path) as manifest:
+            return json.load(manifest)
+    except FileNotFoundError:
+        return {}
+
+
+def get_persisted_queries():
+    return load_persisted_queries(settings.GRAPHQL_PERSISTED_QUERIES)
+
+
+class ChronoGraphQLView(FileUploadGraphQLView):
+    """
+    GraphQL view accepting persisted queries: the client sends the sha256
+    hash of a registered document in `extensions.persistedQuery.sha256Hash`
+    instead of its text. In strict mode every other document is rejected.
+    The depth and cost of the operation are reported in the response
+    extensions, the top-level fields of a query resolve concurrently and
+    a sample of the operations is traced.
+    """
+
+    def __init__(self, *args, **kwargs):
+        kwargs.setdefault('backend', document_backend)
+        kwargs.setdefault('executor', RootFieldExecutor())
+        super().__init__(*args, **kwargs)
+
+    def execute_graphql_request(self, request, data, query, variables, operation_name, show_graphiql=False):
+        request.graphql_trace = start_trace(operation_name)
+        result = super().execute_graphql_request(
+            request, data, query, variables, operation_name, show_graphiql
+        )
+        request.graphql_extensions = result.extensions if result else None
+        if request.graphql_trace:
+            finish_trace(request.graphql_trace, result)
+        return result
+
+    def json_encode(self, request, d, pretty=False):
+        # the response of the operation, not of an HttpError
+        if 'errors' in d or 'data' in d:
+            if getattr(request, 'graphql_extensions', None):
+                d['extensions'] = request.graphql_extensions
+        return super().json_encode(request, d, pretty)
+
+    def get_graphql_params(self, request, data):
+        query, variables, operation_name, id = super().get_graphql_params(request, data)
+        query_hash = self.get_persisted_query_hash(request, data)
+        if query_hash and query:
+            if get_query_hash(query) != query_hash:
+                raise HttpError(HttpResponseBadRequest('provided sha does not match query'))
+        elif query_hash:
+            query = get_persisted_queries().get(query_hash)
+            if query is None:
+                raise HttpError(HttpResponseBadRequest('PersistedQueryNotFound'))
+        if query and settings.GRAPHQL_PERSISTED_QUERIES_STRICT:
+            if (query_hash or get_query_hash(query)) not in get_persisted_queries():
+                raise HttpError(HttpResponseForbidden('Operation is not registered'))
+        return query, variables, operation_name, id
+
+    @staticmethod
+    def get_persisted_query_hash(request, data):
+        extensions = request.GET.get('extensions') or data.get('extensions') or {}
+        if isinstance(extensions, str):
+            try:
+                extensions = json.loads(extensions)
+            except ValueError:
+                raise HttpError(HttpResponseBadRequest('Extensions are invalid JSON.'))
+        return (extensions.get('persistedQuery') or {}).get('sha256Hash')
@@ -0,0 +1,10 @@
+def get_dataloader(info, loader_class, *args):
+    """
+    Dataloader shared by all the resolvers of a request,
+    one instance per loader class and arguments
+    """
+    loaders = info.context.__dict__.setdefault('_dataloaders', {})
+    key = (loader_class, *args)
+    if key not in loaders:
+        loaders[key] = loader_class(*args)
+    return loaders[key]
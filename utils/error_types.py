@@ -62,5 +62,9 @@ def mutation_is_not_valid(serializer) -> List[CustomErrorType]:
     Checks if serializer is valid, if not returns list of errorTypes
     """
     if not serializer.is_valid():
+        if isinstance(serializer.errors, list):
+            # many=True serializers report errors for each item of the data
+            return serializer_error_to_error_types({'data': serializer.errors},
+                                                   {'data': serializer.initial_data})
         return serializer_error_to_error_types(serializer.errors, serializer.initial_data)
     return []
@@ -0,0 +1,3 @@
+"""
+Load test of a running chrono server, see `python -m utils.loadtest --help`
+"""
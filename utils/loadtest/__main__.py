@@ -0,0 +1,65 @@
+import argparse
+
+from utils.loadtest.operations import SCENARIOS, SHARED_ACCOUNT_SCENARIOS
+from utils.loadtest.runner import run
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        prog='python -m utils.loadtest',
+        description='Closed-loop load test of a chrono server, by simulated timesheet users',
+    )
+    parser.add_argument('--url', default='http://localhost:9000/graphql')
+    parser.add_argument('--scenario', choices=list(SCENARIOS), default='mix')
+    parser.add_argument('--concurrency', type=int, default=50, help='Virtual users')
+    parser.add_argument('--duration', type=float, default=60, help='Seconds, after the ramp up')
+    parser.add_argument('--ramp-up', type=float, default=0, help='Seconds over which the virtual users start')
+    parser.add_argument('--think-time', type=float, default=0, help='Seconds between the requests of a user')
+    parser.add_argument(
+        '--accounts', type=int, default=100,
+        help='Accounts the virtual users log in with in turn, the users of generate_dataset',
+    )
+    parser.add_argument('--email', default='user{n}@dataset.chrono', help='Email of account n')
+    parser.add_argument('--password', default='chrono-dataset')
+    parser.add_argument('--timeout', type=float, default=30, help='Seconds before a request fails')
+    parser.add_argument('--seed', type=int, default=1)
+    options = parser.parse_args()
+
+    accounts = [options.email.format(n=n) for n in range(options.accounts)]
+    if options.scenario in SHARED_ACCOUNT_SCENARIOS:
+        accounts = accounts[:1]
+    stats, elapsed, failures = run(
+        options.url, accounts, options.password, SCENARIOS[options.scenario],
+        options.concurrency, options.duration, options.ramp_up, options.think_time,
+        options.timeout, options.seed,
+    )
+    total = stats.summary()
+
+    print(f'{options.scenario}: {options.concurrency} virtual users for {elapsed:.1f}s, '
+          f'{total["requests"] / elapsed:.1f} requests/s')
+    if failures:
+        print(f'{len(failures)} virtual users could not log in: {failures[0]}')
+    print()
+    print(f'{"operation":>16} {"requests":>9} {"ok":>7} {"rejected":>9} {"errors":>7} {"error %":>8} '
+          f'{"p50":>8} {"p90":>8} {"p95":>8} {"p99":>8} {"max":>8}  (ms)')
+    for name in [*sorted(stats.latencies), None]:
+        summary = stats.summary(name)
+        print(
+            f'{name or "total":>16} {summary["requests"]:>9} {summary["ok"]:>7} {summary["rejected"]:>9} '
+            f'{summary["error"]:>7} {summary["error_rate"] * 100:>8.2f} '
+            + ' '.join(f'{summary[key]:>8.1f}' for key in ('p50', 'p90', 'p95', 'p99', 'max'))
+        )
+    print()
+    histogram = stats.histogram()
+    largest = max(count for _, count in histogram) or 1
+    for bound, count in histogram:
+        label = f'<= {bound:g} ms' if bound != float('inf') else f'> {histogram[-2][0]:g} ms'
+        print(f'{label:>12} {count:>8} {"#" * round(count / largest * 50)}')
+    if stats.errors:
+        print()
+        for error, count in sorted(stats.errors.items(), key=lambda item: -item[1])[:10]:
+            print(f'{count:>8} {error}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,148 @@
+"""
+Operations replayed by the load test, as sent by the tests in apps/*/tests/test_apis.py
+"""
+import datetime
+from collections import namedtuple
+
+Operation = namedtuple('Operation', ('name', 'query', 'variables'))
+
+LOGIN = '''
+    mutation Login($email: String!, $password: String!){
+        login(input: {email: $email, password: $password}) {
+            errors { field messages }
+            me { id }
+        }
+    }
+'''
+
+MY_TASKS = '''
+    query MyTasks($user: ID){
+        taskList(user: $user, first: 20) { id }
+    }
+'''
+
+DELETE_TIME_ENTRY = '''
+    mutation DeleteTimeEntry($id: ID!){
+        deleteTimeentry(id: $id){ ok errors { field messages } }
+    }
+'''
+
+CREATE_TIME_ENTRY = '''
+    mutation CreateTimeEntry($input: TimeEntryCreateInputType!){
+        createTimeentry(data: $input){
+            ok
+            errors { field messages }
+            result { id }
+        }
+    }
+'''
+
+# the entries of the load test go to days no real timesheet uses
+BASE_DATE = datetime.date(2100, 1, 1)
+
+
+def own_time_entry(user):
+    """
+    One minute entries in a range of days of the virtual user only, so
+    they are all accepted
+    """
+    slot = user.next_slot()
+    start = datetime.datetime.combine(
+        BASE_DATE + datetime.timedelta(days=user.index + slot // 1440 * user.concurrency),
+        datetime.time(),
+    ) + datetime.timedelta(minutes=slot % 1440)
+    return {'input': {
+        'user': user.id,
+        'task': user.random.choice(user.tasks),
+        'date': start.date().isoformat(),
+        'startTime': start.time().isoformat(),
+        'endTime': (start + datetime.timedelta(seconds=30)).time().isoformat(),
+    }}
+
+
+def overlapping_time_entry(user):
+    """
+    Entries of every virtual user on the same day, most overlap another
+    """
+    start = datetime.datetime.combine(BASE_DATE, datetime.time()) + datetime.timedelta(
+        minutes=user.random.randrange(24 * 60 - 60)
+    )
+    return {'input': {
+        'user': user.id,
+        'task': user.random.choice(user.tasks),
+        'date': BASE_DATE.isoformat(),
+        'startTime': start.time().isoformat(),
+        'endTime': (start + datetime.timedelta(minutes=user.random.randint(5, 60))).time().isoformat(),
+    }}
+
+
+SUMMARY_WEEKLY = Operation('summaryWeekly', '''
+    query SummaryWeekly{
+        summaryWeekly {
+            totalHoursWeekly
+            totalHoursDay { date duration taskList { id description duration } }
+        }
+    }
+''', None)
+
+SUMMARY_MONTHLY = Operation('summaryMonthly', '''
+    query SummaryMonthly{
+        summaryMonthly {
+            totalHoursMonthly
+            totalHoursDay { date duration }
+        }
+    }
+''', None)
+
+DASHBOARD = Operation('dashboard', '''
+    query DashBoard{
+        dashboard {
+            thisWeek { totalHours totalHoursDay { date duration } }
+            hoursByProject { projectTotal projectParticular { duration projectName } }
+            mostActiveProject { projectTotal projectParticular { duration projectName } }
+            myProject { projectName clientName editedOn status hoursSpent }
+        }
+    }
+''', None)
+
+TASK_LIST = Operation('taskList', '''
+    query TaskList($user: ID){
+        taskList(user: $user, first: 20) { id title description taskGroup { id title } }
+    }
+''', lambda user: {'user': user.id})
+
+TIMEENTRY_LIST = Operation('timeentryList', '''
+    query TimeEntryList{
+        timeentryList(first: 20) { id date startTime endTime duration task { id title } }
+    }
+''', None)
+
+PROJECT_LIST = Operation('projectList', '''
+    query ProjectList{
+        projectList(first: 20) { id title client { id name } }
+    }
+''', None)
+
+CREATE = Operation('createTimeEntry', CREATE_TIME_ENTRY, own_time_entry)
+
+CREATE_OVERLAPPING = Operation('createTimeEntry', CREATE_TIME_ENTRY, overlapping_time_entry)
+
+# (operation, weight), a day of timesheet users: mostly reads, an entry now and then
+SCENARIOS = {
+    'mix': [
+        (DASHBOARD, 20),
+        (SUMMARY_WEEKLY, 20),
+        (SUMMARY_MONTHLY, 5),
+        (TASK_LIST, 15),
+        (TIMEENTRY_LIST, 15),
+        (PROJECT_LIST, 5),
+        (CREATE, 20),
+    ],
+    # every virtual user writes to the same user and day, for the overlap check
+    'overlap': [
+        (CREATE_OVERLAPPING, 1),
+    ],
+}
+
+# scenarios whose virtual users all log in with the first account
+SHARED_ACCOUNT_SCENARIOS = {'overlap'}
@@ -0,0 +1,210 @@
+"""
+Closed-loop load generator: each virtual user sends its next request as
+soon as the previous one is answered (after an optional think time).
+"""
+import http.cookiejar
+import json
+import random
+import threading
+import time
+import urllib.error
+import urllib.request
+from collections import defaultdict
+
+from utils.loadtest.operations import DELETE_TIME_ENTRY, LOGIN, MY_TASKS
+
+# upper bounds (ms) of the buckets of the latency histogram
+HISTOGRAM_BUCKETS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, float('inf'))
+
+OK, REJECTED, ERROR = 'ok', 'rejected', 'error'
+
+
+class GraphQLError(Exception):
+    pass
+
+
+class Session:
+    """
+    HTTP client of a virtual user, keeping the session cookie of the login
+    """
+
+    def __init__(self, url, timeout):
+        self.url = url
+        self.timeout = timeout
+        self.opener = urllib.request.build_opener(
+            urllib.request.HTTPCookieProcessor(http.cookiejar.CookieJar())
+        )
+
+    def execute(self, query, variables=None):
+        request = urllib.request.Request(
+            self.url,
+            data=json.dumps({'query': query, 'variables': variables}).encode(),
+            headers={'Content-Type': 'application/json'},
+        )
+        try:
+            with self.opener.open(request, timeout=self.timeout) as response:
+                content = json.loads(response.read())
+        except urllib.error.HTTPError as e:
+            raise GraphQLError(f'HTTP {e.code}')
+        if content.get('errors'):
+            raise GraphQLError(content['errors'][0].get('message'))
+        return content['data']
+
+
+def mutation_errors(data):
+    """
+    Validation errors of the mutation, refused writes rather than failures
+    """
+    return any(isinstance(value, dict) and value.get('errors') for value in data.values())
+
+
+class Stats:
+    def __init__(self):
+        # operation -> outcome -> latencies (ms)
+        self.latencies = defaultdict(lambda: defaultdict(list))
+        self.errors = defaultdict(int)
+
+    def record(self, name, outcome, latency, error=None):
+        self.latencies[name][outcome].append(latency)
+        if error:
+            self.errors[f'{name}: {error}'] += 1
+
+    def merge(self, other):
+        for name, outcomes in other.latencies.items():
+            for outcome, latencies in outcomes.items():
+                self.latencies[name][outcome].extend(latencies)
+        for error, count in other.errors.items():
+            self.errors[error] += count
+
+    def summary(self, name=None):
+        """
+        Requests, outcomes and latency percentiles of an operation, or of all
+        """
+        outcomes = defaultdict(list)
+        for operation, operation_outcomes in self.latencies.items():
+            if name is None or operation == name:
+                for outcome, latencies in operation_outcomes.items():
+                    outcomes[outcome].extend(latencies)
+        latencies = sorted(latency for values in outcomes.values() for latency in values)
+        requests = len(latencies)
+        return {
+            'requests': requests,
+            **{outcome: len(outcomes[outcome]) for outcome in (OK, REJECTED, ERROR)},
+            'error_rate': len(outcomes[ERROR]) / requests if requests else 0,
+            **{
+                f'p{q}': latencies[max(int(requests * q / 100) - 1, 0)] if requests else 0
+                for q in (50, 90, 95, 99)
+            },
+            'max': latencies[-1] if requests else 0,
+        }
+
+    def histogram(self):
+        counts = [0] * len(HISTOGRAM_BUCKETS)
+        for outcomes in self.latencies.values():
+            for latencies in outcomes.values():
+                for latency in latencies:
+                    counts[next(i for i, bound in enumerate(HISTOGRAM_BUCKETS) if latency <= bound)] += 1
+        return list(zip(HISTOGRAM_BUCKETS, counts))
+
+
+class VirtualUser(threading.Thread):
+    def __init__(self, index, concurrency, session, email, password, scenario, deadline, think_time, seed):
+        super().__init__(daemon=True)
+        self.index = index
+        self.concurrency = concurrency
+        self.session = session
+        self.email = email
+        self.password = password
+        self.operations, self.weights = zip(*scenario)
+        self.deadline = deadline
+        self.think_time = think_time
+        self.random = random.Random(seed * 100003 + index)
+        self.stats = Stats()
+        self.created = []
+        self.slots = 0
+        self.id = None
+        self.tasks = []
+        self.failure = None
+
+    def next_slot(self):
+        self.slots += 1
+        return self.slots - 1
+
+    def login(self):
+        data = self.session.execute(LOGIN, {'email': self.email, 'password': self.password})
+        if data['login']['errors']:
+            raise GraphQLError(f'Login of {self.email} failed: {data["login"]["errors"]}')
+        self.id = data['login']['me']['id']
+        self.tasks = [task['id'] for task in self.session.execute(MY_TASKS, {'user': self.id})['taskList']]
+        if not self.tasks:
+            # any task, the entries only need one
+            self.tasks = [task['id'] for task in self.session.execute(MY_TASKS)['taskList']]
+
+    def run(self):
+        try:
+            self.login()
+        except Exception as e:
+            self.failure = e
+            return
+        while time.monotonic() < self.deadline:
+            operation = self.random.choices(self.operations, self.weights)[0]
+            self.request(operation)
+            if self.think_time:
+                time.sleep(self.think_time)
+
+    def request(self, operation):
+        variables = operation.variables(self) if operation.variables else None
+        start = time.perf_counter()
+        try:
+            data = self.session.execute(operation.query, variables)
+        except Exception as e:
+            self.stats.record(operation.name, ERROR, (time.perf_counter() - start) * 1000, error=e)
+            return
+        latency = (time.perf_counter() - start) * 1000
+        if mutation_errors(data):
+            self.stats.record(operation.name, REJECTED, latency)
+            return
+        self.stats.record(operation.name, OK, latency)
+        # the entries created are deleted after the run
+        if result := (data.get('createTimeentry') or {}).get('result'):
+            self.created.append(result['id'])
+
+    def clean_up(self):
+        for entry_id in self.created:
+            try:
+                self.session.execute(DELETE_TIME_ENTRY, {'id': entry_id})
+            except Exception:
+                pass
+
+
+def run(url, accounts, password, scenario, concurrency, duration, ramp_up=0, think_time=0, timeout=30, seed=1):
+    """
+    Run the scenario with `concurrency` virtual users for `duration` seconds,
+    the virtual users start evenly over `ramp_up` seconds and log in with
+    the accounts in turn. Returns the stats, the elapsed time and the
+    failed logins.
+    """
+    deadline = time.monotonic() + ramp_up + duration
+    users = [
+        VirtualUser(
+            i, concurrency, Session(url, timeout), accounts[i % len(accounts)], password,
+            scenario, deadline, think_time, seed,
+        )
+        for i in range(concurrency)
+    ]
+    start = time.monotonic()
+    for user in users:
+        user.start()
+        if ramp_up:
+            time.sleep(ramp_up / concurrency)
+    for user in users:
+        user.join()
+    elapsed = time.monotonic() - start
+    stats = Stats()
+    failures = []
+    for user in users:
+        stats.merge(user.stats)
+        if user.failure:
+            failures.append(user.failure)
+        user.clean_up()
+    return stats, elapsed, failures
@@ -0,0 +1,63 @@
+from django.db import close_old_connections, connection
+from promise import Promise, is_thenable
+
+
+class ReleaseConnectionMiddleware:
+    """
+    Release the database connection of the request in the thread that used
+    it. Under ASGI request_started/request_finished are sent from other
+    threads of the pool, so their close_old_connections would miss it and
+    the connection would stay checked out until the thread is reused.
+    Streaming responses are released before their body is consumed too,
+    under ASGI it is consumed and closed on the event loop, so their views
+    read the database from a thread of their own (see the export).
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        try:
+            return self.get_response(request)
+        finally:
+            self.release()
+
+    @staticmethod
+    def release():
+        # inside a transaction (ATOMIC_REQUESTS, tests) it is not ours to close
+        if not connection.in_atomic_block:
+            close_old_connections()
+
+
+class TracingMiddleware:
+    """
+    Graphene middleware recording a span per resolved field, with its
+    duration and SQL, for the operations sampled by the view
+    (`request.graphql_trace`). The others only pay the lookup.
+    """
+
+    def resolve(self, next, root, info, **args):
+        trace = getattr(info.context, 'graphql_trace', None)
+        if trace is None:
+            return next(root, info, **args)
+        span = trace.start_span(info)
+        try:
+            with connection.execute_wrapper(span.record_sql):
+                result = next(root, info, **args)
+        except Exception:
+            span.finish(error=True)
+            raise
+        if not is_thenable(result):
+            span.finish()
+            return result
+
+        # resolved through a dataloader, the span lasts until it is settled
+        def finish(value):
+            span.finish()
+            return value
+
+        def fail(error):
+            span.finish(error=True)
+            raise error
+
+        return Promise.resolve(result).then(finish, fail)
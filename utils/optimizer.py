@@ -0,0 +1,235 @@
+from functools import partial
+
+from django.core.exceptions import FieldDoesNotExist
+from django.db.models import ManyToManyRel, ManyToOneRel, Prefetch
+from graphene import Dynamic
+from graphene.utils.str_converters import to_snake_case
+from graphene_django_extras import DjangoFilterListField, DjangoObjectField
+from graphene_django_extras.converter import convert_django_field, convert_many_rel_to_djangomodel
+from graphene_django_extras.fields import DjangoListField
+from graphql.language.ast import FragmentSpread, InlineFragment
+from graphql.type.definition import get_named_type
+
+
+def resolver_hints(only=(), select_related=(), prefetch_related=()):
+    """
+    Declares what a custom resolver reads from its object, the paths are
+    relative to the model of the type, for instance:
+
+        @resolver_hints(only=('end_time', 'duration_seconds'))
+        def resolve_duration(root, info): ...
+    """
+    def decorator(resolver):
+        resolver.optimizer_hints = {
+            'only': only,
+            'select_related': select_related,
+            'prefetch_related': prefetch_related,
+        }
+        return resolver
+    return decorator
+
+
+class QueryPlan:
+    """
+    Fields to load, relations to join and relations to prefetch for a
+    selection set. Reverse relations are prefetched through their accessor
+    (`task_set`), which their list fields read, unless filtered.
+    """
+
+    def __init__(self, info):
+        self.info = info
+        self.only = set()
+        self.select_related = set()
+        self.prefetch_related = []
+
+    def apply(self, queryset):
+        if self.select_related:
+            queryset = queryset.select_related(*sorted(self.select_related))
+        if self.prefetch_related:
+            queryset = queryset.prefetch_related(*self.prefetch_related)
+        return queryset.only(*sorted(self.only))
+
+    def selections(self, selection_set):
+        """
+        Fields of the selection set, with those of its fragments
+        """
+        for selection in selection_set.selections:
+            if isinstance(selection, FragmentSpread):
+                yield from self.selections(self.info.fragments[selection.name.value].selection_set)
+            elif isinstance(selection, InlineFragment):
+                yield from self.selections(selection.selection_set)
+            else:
+                yield selection
+
+    def add(self, model, graphql_type, field_asts, prefix=''):
+        graphene_type = graphql_type.graphene_type
+        self.only.add(prefix + model._meta.pk.name)
+        # a field selected more than once, with aliases or fragments
+        selected = {}
+        for field_ast in field_asts:
+            if field_ast.selection_set:
+                for selection in self.selections(field_ast.selection_set):
+                    selected.setdefault(selection.name.value, []).append(selection)
+        complete = True
+        for graphql_name, selections in selected.items():
+            if graphql_name.startswith('__'):
+                continue
+            name = to_snake_case(graphql_name)
+            graphene_field = graphene_type._meta.fields.get(name)
+            resolver = (
+                getattr(graphene_field, 'resolver', None)
+                or getattr(graphene_type, f'resolve_{name}', None)
+            )
+            if hints := getattr(resolver, 'optimizer_hints', None):
+                self.add_hints(hints, prefix)
+                continue
+            try:
+                field = model._meta.get_field(name)
+            except FieldDoesNotExist:
+                # an attribute set by the resolver of the list, unless it
+                # has a resolver of its own whose reads are unknown
+                if resolver is not None:
+                    complete = False
+                continue
+            if not field.concrete:
+                if isinstance(field, (ManyToOneRel, ManyToManyRel)):
+                    self.add_reverse(prefix, field, graphql_type.fields[graphql_name], selections)
+                continue
+            if not field.many_to_many:
+                self.only.add(prefix + field.name)
+            if not field.is_relation:
+                continue
+            target = get_named_type(graphql_type.fields[graphql_name].type)
+            related = getattr(getattr(target, 'graphene_type', None), '_meta', None)
+            if getattr(related, 'model', None) is not field.related_model:
+                continue
+            if field.many_to_many:
+                self.prefetch(prefix + field.name, field.related_model, target, selections)
+            else:
+                self.select_related.add(prefix + field.name)
+                self.add(field.related_model, target, selections, f'{prefix}{field.name}__')
+        if not complete:
+            # the fields the resolvers read are unknown, all are loaded
+            self.only.update(
+                prefix + field.name for field in model._meta.concrete_fields
+            )
+
+    def add_hints(self, hints, prefix):
+        self.only.update(prefix + path for path in hints['only'])
+        for path in hints['select_related']:
+            self.select_related.add(prefix + path)
+            # the joined objects are loaded whole
+            self.only.add(prefix + path)
+        self.prefetch_related.extend(prefix + lookup for lookup in hints['prefetch_related'])
+
+    def add_reverse(self, prefix, relation, graphql_field, selections):
+        target = get_named_type(graphql_field.type)
+        related = getattr(getattr(target, 'graphene_type', None), '_meta', None)
+        if getattr(related, 'model', None) is not relation.related_model:
+            return
+        # a filtered list is queried by its resolver
+        if any(selection.arguments for selection in selections):
+            return
+        # the prefetched objects are matched to theirs on the foreign key
+        only = () if relation.many_to_many else (relation.field.name,)
+        self.prefetch(prefix + relation.get_accessor_name(), relation.related_model, target, selections, only)
+
+    def prefetch(self, lookup, model, graphql_type, field_asts, only=()):
+        plan = QueryPlan(self.info)
+        plan.add(model, graphql_type, field_asts)
+        plan.only.update(only)
+        self.prefetch_related.append(
+            Prefetch(lookup, queryset=plan.apply(model._default_manager.all()))
+        )
+
+
+def optimize(queryset, info, only=()):
+    """
+    Joins, prefetches and restricts the columns of the queryset to what the
+    selection set of the field resolves, `only` are fields read by the
+    resolver of the field itself
+    """
+    plan = QueryPlan(info)
+    plan.add(queryset.model, get_named_type(info.return_type), info.field_asts)
+    plan.only.update(only)
+    return plan.apply(queryset)
+
+
+class OptimizedObjectField(DjangoObjectField):
+    """
+    DjangoObjectField loading the object with its selection set planned by
+    the optimizer
+    """
+
+    @staticmethod
+    def object_resolver(manager, root, info, **kwargs):
+        id = kwargs.pop('id', None)
+        try:
+            return optimize(manager.get_queryset(), info).get(pk=id)
+        except manager.model.DoesNotExist:
+            return None
+
+
+def resolve_related(accessor, root, info, **kwargs):
+    return getattr(root, accessor)
+
+
+class RelatedListField(DjangoListField):
+    """
+    DjangoListField of a reverse relation, read through its accessor so the
+    objects prefetched by the optimizer are used
+    """
+
+    def __init__(self, _type, accessor, *args, **kwargs):
+        self.accessor = accessor
+        super().__init__(_type, *args, **kwargs)
+
+    def get_resolver(self, parent_resolver):
+        return super().get_resolver(partial(resolve_related, self.accessor))
+
+
+class RelatedFilterListField(DjangoFilterListField):
+    """
+    DjangoFilterListField of a reverse relation, read through its accessor
+    so the objects prefetched by the optimizer are used, a filtered list is
+    queried on its own
+    """
+
+    def __init__(self, _type, accessor, *args, **kwargs):
+        self.accessor = accessor
+        super().__init__(_type, *args, **kwargs)
+
+    def get_resolver(self, parent_resolver):
+        return partial(self.related_resolver, self.accessor, self.filterset_class, self.filtering_args)
+
+    @staticmethod
+    def related_resolver(accessor, filterset_class, filtering_args, root, info, **kwargs):
+        qs = getattr(root, accessor).all()
+        filter_kwargs = {k: v for k, v in kwargs.items() if k in filtering_args}
+        if filter_kwargs:
+            qs = filterset_class(data=filter_kwargs, queryset=qs, request=info.context).qs
+        return qs
+
+
+@convert_django_field.register(ManyToManyRel)
+@convert_django_field.register(ManyToOneRel)
+def convert_reverse_relation(field, registry=None, input_flag=None, nested_field=False):
+    """
+    The reverse relations of the output types as the related list fields,
+    graphene_django_extras reads them by their query name (`task`), which
+    finds no objects on the model and falls back to a query per object
+    """
+    if input_flag:
+        return convert_many_rel_to_djangomodel(field, registry, input_flag, nested_field)
+
+    def dynamic_type():
+        _type = registry.get_type_for_model(field.related_model)
+        if not _type:
+            return
+        if _type._meta.filter_fields or _type._meta.filterset_class:
+            return RelatedFilterListField(
+                _type, field.get_accessor_name(), filterset_class=_type._meta.filterset_class,
+            )
+        return RelatedListField(_type, field.get_accessor_name())
+
+    return Dynamic(dynamic_type)
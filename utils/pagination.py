@@ -0,0 +1,117 @@
+import base64
+import json
+from functools import partial
+
+import graphene
+from django.db.models import Q
+from graphene_django_extras import DjangoFilterListField
+from graphene_django_extras.settings import graphql_api_settings
+from graphql import GraphQLError
+
+from utils.optimizer import optimize
+
+
+def page_size(first):
+    """
+    Requested page size, capped at the MAX_PAGE_SIZE setting
+    """
+    if first < 0:
+        raise GraphQLError('first must be positive')
+    max_page_size = graphql_api_settings.MAX_PAGE_SIZE
+    return min(first, max_page_size) if max_page_size else first
+
+
+def encode_cursor(obj, ordering):
+    """
+    Opaque cursor holding the values of the ordering fields of the object
+    """
+    values = [obj._meta.get_field(name).value_to_string(obj) for name in ordering]
+    return base64.urlsafe_b64encode(json.dumps(values).encode()).decode()
+
+
+def decode_cursor(cursor, model, ordering):
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        if len(values) != len(ordering):
+            raise ValueError(cursor)
+        return [
+            model._meta.get_field(name).to_python(value)
+            for name, value in zip(ordering, values)
+        ]
+    except Exception:
+        raise GraphQLError('Invalid cursor')
+
+
+def keyset_after(ordering, values):
+    """
+    Objects after the given values of the ordering fields, the expansion of
+    the row comparison (a, b, c) > (x, y, z)
+    """
+    name, value = ordering[0], values[0]
+    after = Q(**{f'{name}__gt': value})
+    if len(ordering) > 1:
+        after |= Q(**{name: value}) & keyset_after(ordering[1:], values[1:])
+    return after
+
+
+class KeysetFilterListField(DjangoFilterListField):
+    """
+    DjangoFilterListField paginated on the ordering fields: `first`, which
+    is required, sets the page size and `after` takes the cursor of the
+    last object of the previous page, so a deep page costs as much as
+    the first one and needs no count. Every object of the page gets its
+    `cursor`. A list ranked by one of its filters keeps that order and only
+    supports `first`. The related objects and columns loaded are planned by
+    the optimizer from the selection set. With `scope`, a function of the
+    user returning the objects accessible to them, the list is limited to
+    those.
+    """
+
+    def __init__(self, _type, ordering=('created_at', 'id'), scope=None, *args, **kwargs):
+        self.ordering = ordering
+        self.scope = scope
+        kwargs.setdefault('args', {})
+        kwargs['args'].update({
+            'first': graphene.Argument(graphene.NonNull(graphene.Int)),
+            'after': graphene.Argument(graphene.String),
+        })
+        super().__init__(_type, *args, **kwargs)
+
+    @staticmethod
+    def list_resolver(manager, filterset_class, filtering_args, root, info, **kwargs):
+        filter_kwargs = {k: v for k, v in kwargs.items() if k in filtering_args}
+        return filterset_class(data=filter_kwargs, queryset=manager.all(), request=info.context).qs
+
+    def get_resolver(self, parent_resolver):
+        return partial(
+            self.keyset_resolver,
+            super().get_resolver(parent_resolver),
+            self.ordering,
+            self.scope,
+        )
+
+    @staticmethod
+    def keyset_resolver(resolver, ordering, scope, root, info, first, after=None, **kwargs):
+        qs = resolver(root, info, **kwargs)
+        if scope is not None:
+            qs = qs & scope(info.context.user)
+        # the ordering fields are read for the cursors
+        qs = optimize(qs, info, only=ordering)
+        if qs.query.order_by:
+            # ranked by a filter, the ordering fields only break ties
+            if after:
+                raise GraphQLError('Ranked lists can not be paginated with a cursor')
+            qs = qs.order_by(*qs.query.order_by, *ordering)
+        else:
+            qs = qs.order_by(*ordering)
+        if after:
+            values = decode_cursor(after, qs.model, ordering)
+            # the leading bound lets the planner range scan the index
+            qs = qs.filter(
+                Q(**{f'{ordering[0]}__gte': values[0]}),
+                keyset_after(ordering, values),
+            )
+        objects = list(qs[:page_size(first)])
+        for obj in objects:
+            obj.cursor = encode_cursor(obj, ordering)
+        return objects
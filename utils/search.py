@@ -0,0 +1,27 @@
+from django.contrib.postgres.search import TrigramSimilarity
+from django.db.models import CharField
+from django.db.models.lookups import IContains
+
+
+@CharField.register_lookup
+class TrigramIContains(IContains):
+    """
+    Case insensitive substring match written as ILIKE, which a pg_trgm
+    GIN index on the bare column can serve, unlike the UPPER(...) LIKE
+    of icontains
+    """
+    lookup_name = 'trigram_icontains'
+
+    def get_rhs_op(self, connection, rhs):
+        return f'ILIKE {rhs}'
+
+
+def order_by_similarity(queryset, name, value):
+    """
+    Filter method keeping the rows similar to the value, most similar first
+    """
+    return queryset.filter(**{
+        f'{name}__trigram_similar': value,
+    }).annotate(
+        similarity=TrigramSimilarity(name, value),
+    ).order_by('-similarity')
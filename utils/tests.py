@@ -1,11 +1,50 @@
+import json
 import os
+import re
 
+from django.conf import settings
 from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
 from graphene_django.utils import GraphQLTestCase
 
 User = get_user_model()
 
+# SQL queries emitted by each budgeted operation, UPDATE_QUERY_COUNTS=true rewrites it
+QUERY_COUNTS_FILE = os.path.join(settings.BASE_DIR, 'utils', 'query_counts.json')
+
+
+def load_query_counts():
+    try:
+        with open(QUERY_COUNTS_FILE) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+
+
+def save_query_count(name, count):
+    counts = load_query_counts()
+    counts[name] = count
+    with open(QUERY_COUNTS_FILE, 'w') as f:
+        json.dump(counts, f, indent=2, sort_keys=True)
+        f.write('\n')
+
+
+# plan nodes reading a table through an index, with its condition in
+# `Index Cond`, or `Recheck Cond` for a bitmap heap scan
+INDEX_SCAN_NODES = ('Index Scan', 'Index Only Scan', 'Bitmap Heap Scan')
+
+
+def plan_nodes(plan):
+    """
+    Every node of an EXPLAIN (FORMAT JSON) plan, depth first
+    """
+    yield plan
+    for child in plan.get('Plans', []):
+        yield from plan_nodes(child)
+
 
 class ChronoGraphQLTestCase(GraphQLTestCase):
     GRAPHQL_URL = '/graphql'
@@ -22,4 +61,109 @@ class ChronoGraphQLTestCase(GraphQLTestCase):
             password=user_password,
         )
         user.user_password = user_password
-        return user
\ No newline at end of file
+        return user
+
+    def capture_sql(self, query, variables=None):
+        """
+        SELECT statements emitted while running the query
+        """
+        with CaptureQueriesContext(connection) as context:
+            response = self.query(query, variables=variables)
+        self.assertResponseNoErrors(response)
+        return [
+            query['sql'] for query in context.captured_queries
+            if query['sql'].lstrip().upper().startswith('SELECT')
+        ]
+
+    def explain(self, sql, seq_scan=True):
+        """
+        Root node of the plan of the statement. With seq_scan=False the
+        planner avoids seq scans wherever an index can serve the statement,
+        so the plan does not depend on the size of the test dataset.
+        """
+        with connection.cursor() as cursor:
+            if not seq_scan:
+                cursor.execute('SET enable_seqscan = off')
+            try:
+                cursor.execute(f'EXPLAIN (FORMAT JSON) {sql}')
+                return cursor.fetchone()[0][0]['Plan']
+            finally:
+                cursor.execute('RESET enable_seqscan')
+
+    def explain_query(self, query, variables=None):
+        """
+        (statement, node) for every node of the plans of the statements
+        of the query, explained with seq_scan=False
+        """
+        for sql in self.capture_sql(query, variables):
+            for node in plan_nodes(self.explain(sql, seq_scan=False)):
+                yield sql, node
+
+    def assertQueryPlan(self, query, variables=None, index_conds=(), no_seq_scan=(), max_cost=None):
+        """
+        Explain every statement of the query and check that for each
+        (table, column) of index_conds the table is read through an index
+        searched on the column, whichever index the planner picks, that the
+        given tables are never seq scanned and that no statement is
+        estimated above max_cost.
+        """
+        searched = set()
+        statements = set()
+        for sql, node in self.explain_query(query, variables):
+            statements.add(sql)
+            if node['Node Type'] in INDEX_SCAN_NODES:
+                condition = node.get('Index Cond') or node.get('Recheck Cond') or ''
+                for table, column in index_conds:
+                    if node['Relation Name'] == table and re.search(rf'\b{column}\b', condition):
+                        searched.add((table, column))
+            if node['Node Type'] == 'Seq Scan':
+                self.assertNotIn(
+                    node['Relation Name'], no_seq_scan,
+                    f'Seq scan on {node["Relation Name"]} in: {sql}'
+                )
+        if max_cost is not None:
+            for sql in statements:
+                cost = self.explain(sql)['Total Cost']
+                self.assertLessEqual(cost, max_cost, f'Estimated cost {cost} of: {sql}')
+        for table, column in index_conds:
+            self.assertIn(
+                (table, column), searched,
+                f'No index scan on {table} with a condition on {column}'
+            )
+
+    def count_queries(self, query, variables=None):
+        """
+        SQL queries emitted by the query, run without the cached results
+        """
+        cache.clear()
+        with CaptureQueriesContext(connection) as context:
+            response = self.query(query, variables=variables)
+        self.assertResponseNoErrors(response)
+        return len(context.captured_queries)
+
+    def assertQueryBudget(self, name, query, seed, variables=None, sizes=(5, 50)):
+        """
+        Run the query after seed(n) added rows up to each of the sizes and
+        check that it emits the same number of queries at every size, so
+        the count does not grow with the rows, and that the count matches
+        the baseline of the operation in QUERY_COUNTS_FILE.
+        """
+        counts = []
+        seeded = 0
+        for size in sizes:
+            seed(size - seeded)
+            seeded = size
+            counts.append(self.count_queries(query, variables))
+        self.assertEqual(
+            len(set(counts)), 1,
+            f'{name} emits {" / ".join(map(str, counts))} queries for {" / ".join(map(str, sizes))} rows'
+        )
+        if os.environ.get('UPDATE_QUERY_COUNTS') == 'true':
+            save_query_count(name, counts[0])
+        baseline = load_query_counts().get(name)
+        self.assertIsNotNone(baseline, f'No query count baseline for {name}, run with UPDATE_QUERY_COUNTS=true')
+        self.assertEqual(
+            counts[0], baseline,
+            f'{name} emits {counts[0]} queries instead of {baseline}, '
+            'run with UPDATE_QUERY_COUNTS=true if that is expected'
+        )